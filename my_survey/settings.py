@@ -37,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "surveys.middleware.QueryMetricsMiddleware",  # Query counts, Server-Timing, /api/metrics/
+    "surveys.middleware.CompressionMiddleware",  # gzip/Brotli for large JSON bodies
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # For static files on Render
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -73,14 +75,26 @@ WSGI_APPLICATION = "my_survey.wsgi.application"
 # Check for DATABASE_URL (Render provides this automatically)
 DATABASE_URL = config('DATABASE_URL', default=None)
 
+# DATABASE_CONN_MAX_AGE: seconds each worker keeps its connection open (0 = one per request)
+# DATABASE_POOLER: "pgbouncer" when the URLs point at PgBouncer in transaction pooling
+#   mode; server-side cursors do not survive transaction pooling, so they are disabled
+# REPLICA_DATABASE_URL: optional read replica used by the analytics views (see surveys/routers.py)
+DATABASE_CONN_MAX_AGE = config('DATABASE_CONN_MAX_AGE', default=600, cast=int)
+DATABASE_POOLER = config('DATABASE_POOLER', default='')
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default=None)
+
+
+def database_from_url(url):
+    database = dj_database_url.parse(url, conn_max_age=DATABASE_CONN_MAX_AGE, conn_health_checks=True)
+    if DATABASE_POOLER == 'pgbouncer':
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return database
+
+
 if DATABASE_URL:
     # Production: Use PostgreSQL from DATABASE_URL
     DATABASES = {
-        'default': dj_database_url.config(
-            default=DATABASE_URL,
-            conn_max_age=600,
-            conn_health_checks=True,
-        )
+        'default': database_from_url(DATABASE_URL)
     }
 else:
     # Local development: Use SQLite
@@ -91,6 +105,20 @@ else:
         }
     }
 
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = database_from_url(REPLICA_DATABASE_URL)
+    # Tests and benchmarks read the primary's test database through this alias
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['surveys.routers.ReplicaRouter']
+
+# SQLite profile (see surveys/sqlite.py): "concurrent" enables WAL and serialized
+# submissions; "default" keeps Django's stock SQLite behaviour
+SQLITE_PROFILE = config('SQLITE_PROFILE', default='concurrent')
+SQLITE_BUSY_TIMEOUT_MS = config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)
+SQLITE_CACHE_SIZE_KB = config('SQLITE_CACHE_SIZE_KB', default=65536, cast=int)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -128,14 +156,14 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # The browsable API re-renders every response as HTML for browsers; development only
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
-        "rest_framework.renderers.BrowsableAPIRenderer",
-    ],
+        "surveys.renderers.TimedJSONRenderer",
+    ] + (["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 50,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "surveys.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -150,6 +178,14 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
 }
 
+# Validated access tokens cached per worker (see surveys/authentication.py); an
+# entry lives until the token expires or JWT_CACHE_SECONDS pass (0 disables).
+# Only used with a shared cache (REDIS_URL), which carries revocations to every worker,
+# or with JWT_CACHE_SINGLE_PROCESS=True when a single process serves all requests
+JWT_CACHE_SIZE = config('JWT_CACHE_SIZE', default=1024, cast=int)
+JWT_CACHE_SECONDS = config('JWT_CACHE_SECONDS', default=300, cast=int)
+JWT_CACHE_SINGLE_PROCESS = config('JWT_CACHE_SINGLE_PROCESS', default=False, cast=bool)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     "CORS_ALLOWED_ORIGINS",
@@ -173,12 +209,115 @@ CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
     "dnt",
+    "idempotency-key",
     "origin",
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
 ]
 
+# Lets browser clients tell a replayed submission from a fresh one (see surveys/idempotency.py)
+CORS_EXPOSE_HEADERS = ["idempotent-replayed"]
+
+# Cache - Redis when REDIS_URL is set (shared between workers), otherwise per-process memory
+REDIS_URL = config('REDIS_URL', default=None)
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'surveys',
+        }
+    }
+
+# Token-bucket rate limits for the public survey endpoints (see surveys/throttling.py)
+# Keyed by ViewSet action, then by bucket: 'ip' (client address) or 'phone' (normalized number).
+# The 'ip' buckets key on the address TRUSTED_PROXY_COUNT resolves: reverse proxies in front of the
+# app that append to X-Forwarded-For (1 on Render, the production default), the client being the
+# entry the outermost one added. 0 ignores the header and uses REMOTE_ADDR; behind a proxy that
+# would put every client in the proxy's bucket
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0 if DEBUG else 1, cast=int)
+SURVEY_THROTTLE_RATES = {
+    'check_phone': {
+        'ip': config('THROTTLE_CHECK_PHONE_IP', default='60/min'),
+        'phone': config('THROTTLE_CHECK_PHONE_PHONE', default='20/min'),
+    },
+    'create': {
+        'ip': config('THROTTLE_CREATE_IP', default='20/hour'),
+        'phone': config('THROTTLE_CREATE_PHONE', default='5/hour'),
+    },
+}
+
+# Approximate analytics (?approx=1, see surveys/approx.py): rows kept in each reservoir sample
+ANALYTICS_RESERVOIR_SIZE = config('ANALYTICS_RESERVOIR_SIZE', default=2000, cast=int)
+
+# Seconds filtered analytics stay cached per data version (0 disables, see surveys/datacache.py)
+ANALYTICS_CACHE_SECONDS = config('ANALYTICS_CACHE_SECONDS', default=300, cast=int)
+
+# Seconds the admin sidebar facet counts are kept; new submissions do not invalidate them (0 disables, see surveys/facets.py)
+FACET_CACHE_SECONDS = config('FACET_CACHE_SECONDS', default=60, cast=int)
+
+# Seconds the supply/demand matching report is kept; new submissions do not invalidate it (0 disables, see surveys/matching.py)
+MATCHING_REPORT_CACHE_SECONDS = config('MATCHING_REPORT_CACHE_SECONDS', default=300, cast=int)
+
+# Memory-mapped analytics snapshot shared by the workers on a host (see surveys/snapshot.py)
+# SNAPSHOT_MAX_DELTA_ROWS: rows newer than the snapshot merged per request; beyond that
+#   requests fall back to SQL until the background rebuild finishes
+# SNAPSHOT_MAX_AGE_SECONDS: rebuild once the snapshot is this old and newer rows exist
+SNAPSHOT_ENABLED = config('SNAPSHOT_ENABLED', default=True, cast=bool)
+SNAPSHOT_PATH = config('SNAPSHOT_PATH', default=os.path.join(BASE_DIR, 'analytics.snapshot'))
+SNAPSHOT_MAX_DELTA_ROWS = config('SNAPSHOT_MAX_DELTA_ROWS', default=5000, cast=int)
+SNAPSHOT_MAX_AGE_SECONDS = config('SNAPSHOT_MAX_AGE_SECONDS', default=300, cast=int)
+
+# Admin changelists and list endpoints estimate the total of unfiltered tables
+# with at least this many rows instead of COUNT(*) (see surveys/pagination.py);
+# PostgreSQL planner estimates are cached for ESTIMATED_COUNT_CACHE_SECONDS
+ESTIMATED_COUNT_THRESHOLD = config('ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+ESTIMATED_COUNT_CACHE_SECONDS = config('ESTIMATED_COUNT_CACHE_SECONDS', default=60, cast=int)
+
+# Near-duplicate detection (see surveys/minhash.py): a submission is flagged when its
+# MinHash signature matches an earlier one's on at least MINHASH_THRESHOLD of the
+# slots; answers with fewer than MINHASH_MIN_SHINGLES words and word pairs must match exactly
+MINHASH_THRESHOLD = config('MINHASH_THRESHOLD', default=0.8, cast=float)
+MINHASH_MIN_SHINGLES = config('MINHASH_MIN_SHINGLES', default=8, cast=int)
+
+# Idempotency-Key on survey submissions (see surveys/idempotency.py): first responses are
+# replayed to retries for IDEMPOTENCY_TTL_SECONDS; a retry arriving while the first request
+# runs gets 409 until it finishes or IDEMPOTENCY_LOCK_SECONDS pass
+IDEMPOTENCY_TTL_SECONDS = config('IDEMPOTENCY_TTL_SECONDS', default=86400, cast=int)
+IDEMPOTENCY_LOCK_SECONDS = config('IDEMPOTENCY_LOCK_SECONDS', default=60, cast=int)
+
+# Background jobs (see surveys/jobs.py and `manage.py run_worker`)
+JOB_WORKER_PROCESSES = config('JOB_WORKER_PROCESSES', default=2, cast=int)
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=3600, cast=int)
+JOB_RESULTS_DIR = config('JOB_RESULTS_DIR', default=os.path.join(BASE_DIR, 'job_results'))
+
+# Response compression (see surveys/compression.py)
+# COMPRESSION_MIN_BYTES: JSON bodies below this size are sent uncompressed
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_MIN_BYTES = config('COMPRESSION_MIN_BYTES', default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config('COMPRESSION_GZIP_LEVEL', default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config('COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+
+# Cold start budget: `manage.py profile_startup` fails when the median time from
+# process launch to the first response exceeds this many milliseconds
+STARTUP_TARGET_MS = config('STARTUP_TARGET_MS', default=750, cast=int)
+
+# Per-worker warm-up started by wsgi.py/asgi.py (see surveys/warmup.py); the
+# readiness probe reports ready once it finishes or the budget runs out
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool)
+WARMUP_BUDGET_SECONDS = config('WARMUP_BUDGET_SECONDS', default=30, cast=float)
+
+# Request instrumentation (see surveys/middleware.py)
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+
 # Security Settings (Production)
 if not DEBUG:
     # HTTPS/SSL Settings
@@ -195,7 +334,17 @@ if not DEBUG:
     # Trust Render proxy headers
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
-# Logging Configuration - Comprehensive debugging
+# Logging Configuration
+# LOG_FORMAT: 'verbose' (human readable) or 'json' (one object per line)
+# LOG_ASYNC: format and write log records on a background thread
+# LOG_DEBUG_SAMPLE_RATE: fraction of DEBUG records kept (0.0 - 1.0)
+LOG_FORMAT = config('LOG_FORMAT', default='verbose' if DEBUG else 'json')
+LOG_ASYNC = config('LOG_ASYNC', default=True, cast=bool)
+LOG_DEBUG_SAMPLE_RATE = config('LOG_DEBUG_SAMPLE_RATE', default=1.0 if DEBUG else 0.01, cast=float)
+SURVEYS_LOG_LEVEL = config('SURVEYS_LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+FRAMEWORK_LOG_LEVEL = config('FRAMEWORK_LOG_LEVEL', default='INFO')
+LOG_HANDLER = 'queue' if LOG_ASYNC else 'console'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -209,47 +358,63 @@ LOGGING = {
             'format': '[{levelname}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'surveys.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'debug_sample': {
+            '()': 'surveys.log.DebugSampleFilter',
+            'rate': LOG_DEBUG_SAMPLE_RATE,
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
+            'filters': [] if LOG_ASYNC else ['debug_sample'],
+        },
+        # Hands records to a background thread that writes them to 'console'
+        'queue': {
+            '()': 'surveys.log.QueueListenerHandler',
+            'targets': ['console'],
+            'filters': ['debug_sample'],
         },
     },
     'loggers': {
         # Django request logging
         'django.request': {
-            'handlers': ['console'],
+            'handlers': [LOG_HANDLER],
             'level': 'DEBUG' if DEBUG else 'INFO',
             'propagate': False,
         },
         # Survey app logging
         'surveys': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'handlers': [LOG_HANDLER],
+            'level': SURVEYS_LOG_LEVEL,
+            'propagate': False,
+        },
+        # Per-request query/timing lines from QueryMetricsMiddleware
+        'surveys.metrics': {
+            'handlers': [LOG_HANDLER],
+            'level': 'INFO',
             'propagate': False,
         },
         # REST Framework logging
         'rest_framework': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'handlers': [LOG_HANDLER],
+            'level': FRAMEWORK_LOG_LEVEL,
             'propagate': False,
         },
         # Authentication logging
         'django.contrib.auth': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+            'handlers': [LOG_HANDLER],
+            'level': FRAMEWORK_LOG_LEVEL,
             'propagate': False,
         },
     },
     'root': {
-        'handlers': ['console'],
+        'handlers': [LOG_HANDLER],
         'level': 'INFO',
     },
 }
-
-print(f"[SETTINGS] DEBUG={DEBUG}")
-print(f"[SETTINGS] ALLOWED_HOSTS={ALLOWED_HOSTS}")
-print(f"[SETTINGS] CORS_ALLOWED_ORIGINS={CORS_ALLOWED_ORIGINS}")
-print(f"[SETTINGS] REST_FRAMEWORK DEFAULT_PERMISSION_CLASSES={REST_FRAMEWORK.get('DEFAULT_PERMISSION_CLASSES')}")
-print(f"[SETTINGS] REST_FRAMEWORK DEFAULT_AUTHENTICATION_CLASSES={REST_FRAMEWORK.get('DEFAULT_AUTHENTICATION_CLASSES')}")
@@ -3,14 +3,13 @@ URL configuration for my_survey project.
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+
+from surveys.lazy import lazy_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("surveys.urls")),
-    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # Token views pull in simplejwt's serializers; load them on first login
+    path("api/token/", lazy_view("rest_framework_simplejwt.views.TokenObtainPairView"), name="token_obtain_pair"),
+    path("api/token/refresh/", lazy_view("rest_framework_simplejwt.views.TokenRefreshView"), name="token_refresh"),
 ]
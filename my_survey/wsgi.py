@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "my_survey.settings")
 
 application = get_wsgi_application()
+
+# Pre-render caches in the background; /api/health/ready/ reports when done
+from surveys import warmup  # noqa: E402
+
+warmup.start()
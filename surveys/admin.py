@@ -1,9 +1,57 @@
 from django.contrib import admin
 from .models import StudentSurvey, TeacherSurvey
+from . import datacache, facets, snapshot, textindex
+from .facets import FacetListFilter, MonthListFilter
+from .pagination import EstimatedCountPaginator
+
+
+class DiscardSnapshotMixin:
+    """Edited and deleted rows would still be counted as they were by the analytics snapshot and sidebar facets; drop both"""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            snapshot.discard()
+            facets.discard(self.model)
+            datacache.bump()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        snapshot.discard()
+        facets.discard(self.model)
+        datacache.bump()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        snapshot.discard()
+        facets.discard(self.model)
+        datacache.bump()
+
+
+class TextIndexMixin:
+    """Keep the open-text index (surveys/textindex.py) in step with admin edits and deletes"""
+
+    def survey_type(self):
+        return next(name for name, model in textindex.SURVEY_MODELS.items() if model is self.model)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            textindex.reindex(self.survey_type(), obj)
+
+    def delete_model(self, request, obj):
+        pk = obj.pk
+        super().delete_model(request, obj)
+        textindex.remove(self.survey_type(), [pk])
+
+    def delete_queryset(self, request, queryset):
+        pks = list(queryset.values_list('pk', flat=True))
+        super().delete_queryset(request, queryset)
+        textindex.remove(self.survey_type(), pks)
 
 
 @admin.register(StudentSurvey)
-class StudentSurveyAdmin(admin.ModelAdmin):
+class StudentSurveyAdmin(DiscardSnapshotMixin, TextIndexMixin, admin.ModelAdmin):
     """Admin interface for student surveys"""
     list_display = [
         'id',
@@ -13,14 +61,15 @@ class StudentSurveyAdmin(admin.ModelAdmin):
         'fair_price_etb',
         'submitted_at'
     ]
+    # Values and counts come from a cached facet summary (surveys/facets.py)
     list_filter = [
-        'quran_experience',
-        'willing_to_try',
-        'taken_online_lessons',
-        'preferred_session_length',
-        'preferred_frequency',
-        'time_preference',
-        'submitted_at'
+        ('quran_experience', FacetListFilter),
+        ('willing_to_try', FacetListFilter),
+        ('taken_online_lessons', FacetListFilter),
+        ('preferred_session_length', FacetListFilter),
+        ('preferred_frequency', FacetListFilter),
+        ('time_preference', FacetListFilter),
+        ('submitted_at', MonthListFilter)
     ]
     search_fields = [
         'teacher_challenges',
@@ -28,9 +77,11 @@ class StudentSurveyAdmin(admin.ModelAdmin):
         'desired_features',
         'online_lessons_reason'
     ]
-    readonly_fields = ['submitted_at', 'ip_address']
-    date_hierarchy = 'submitted_at'
+    readonly_fields = ['submitted_at', 'ip_address', 'duplicate_cluster']
     ordering = ['-submitted_at']
+    # Estimated totals for large unfiltered lists, and no second COUNT(*) for "N of M selected"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Experience & Background', {
@@ -43,14 +94,14 @@ class StudentSurveyAdmin(admin.ModelAdmin):
             'fields': ('trust_factors', 'willing_to_try', 'willing_to_try_reason', 'desired_features')
         }),
         ('Metadata', {
-            'fields': ('submitted_at', 'ip_address'),
+            'fields': ('submitted_at', 'ip_address', 'duplicate_cluster'),
             'classes': ('collapse',)
         }),
     )
 
 
 @admin.register(TeacherSurvey)
-class TeacherSurveyAdmin(admin.ModelAdmin):
+class TeacherSurveyAdmin(DiscardSnapshotMixin, TextIndexMixin, admin.ModelAdmin):
     """Admin interface for teacher surveys"""
     list_display = [
         'id',
@@ -61,13 +112,14 @@ class TeacherSurveyAdmin(admin.ModelAdmin):
         'wants_early_access',
         'submitted_at'
     ]
+    # Values and counts come from a cached facet summary (surveys/facets.py)
     list_filter = [
-        'teaching_background',
-        'would_join_platform',
-        'tried_online_teaching',
-        'wants_early_access',
-        'preferred_session_length',
-        'submitted_at'
+        ('teaching_background', FacetListFilter),
+        ('would_join_platform', FacetListFilter),
+        ('tried_online_teaching', FacetListFilter),
+        ('wants_early_access', FacetListFilter),
+        ('preferred_session_length', FacetListFilter),
+        ('submitted_at', MonthListFilter)
     ]
     search_fields = [
         'teaching_background_details',
@@ -77,9 +129,11 @@ class TeacherSurveyAdmin(admin.ModelAdmin):
         'feedback_preferences',
         'early_access_contact'
     ]
-    readonly_fields = ['submitted_at', 'ip_address']
-    date_hierarchy = 'submitted_at'
+    readonly_fields = ['submitted_at', 'ip_address', 'duplicate_cluster']
     ordering = ['-submitted_at']
+    # Estimated totals for large unfiltered lists, and no second COUNT(*) for "N of M selected"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Teaching Background', {
@@ -95,7 +149,7 @@ class TeacherSurveyAdmin(admin.ModelAdmin):
             'fields': ('wants_early_access', 'early_access_contact')
         }),
         ('Metadata', {
-            'fields': ('submitted_at', 'ip_address'),
+            'fields': ('submitted_at', 'ip_address', 'duplicate_cluster'),
             'classes': ('collapse',)
         }),
     )
@@ -1,65 +1,72 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Count, Avg, Q, F
+from rest_framework import status
+import heapq
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlencode
+from django.conf import settings
+from django.db.models import Count, Avg, Window
+from django.utils import timezone
 from .models import StudentSurvey, TeacherSurvey
+from . import (approx, assignment, datacache, filters, jobs, matching, prerender, pricestats, snapshot, textindex,
+               timeseries)
+from .pagination import estimated_count
+from .routers import replica_reads
+from .serializers import JobSerializer
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_filtered_analytics(request):
     """
     Get analytics data with multi-dimensional filtering
-    Query params: gender, age_range, min_price, max_price, frequency, session_length, platform_interest
+    Query params: gender, age_range, min_price, max_price, frequency, session_length, platform_interest,
+    approx (1/true to answer from the reservoir sample with confidence intervals)
     """
-    # Get filter parameters
-    gender = request.query_params.get('gender')
-    age_range = request.query_params.get('age_range')
-    min_price = request.query_params.get('min_price')
-    max_price = request.query_params.get('max_price')
-    frequency = request.query_params.get('frequency')
-    session_length = request.query_params.get('session_length')
-    platform_interest = request.query_params.get('platform_interest')  # 'willing', 'not_willing'
-    
-    # Build query for students
-    student_query = Q()
-    if gender:
-        student_query &= Q(gender=gender)
-    if age_range:
-        student_query &= Q(age_range=age_range)
-    if min_price:
-        student_query &= Q(fair_price_etb__gte=float(min_price))
-    if max_price:
-        student_query &= Q(fair_price_etb__lte=float(max_price))
-    if frequency:
-        student_query &= Q(preferred_frequency=frequency)
-    if session_length:
-        student_query &= Q(preferred_session_length=int(session_length))
-    if platform_interest == 'willing':
-        student_query &= Q(willing_to_try=True)
-    elif platform_interest == 'not_willing':
-        student_query &= Q(willing_to_try=False)
-    
-    students = StudentSurvey.objects.filter(student_query)
-    
-    # Build query for teachers
-    teacher_query = Q()
-    if gender:
-        teacher_query &= Q(gender=gender)
-    if age_range:
-        teacher_query &= Q(age_range=age_range)
-    if min_price:
-        teacher_query &= Q(fair_rate_etb__gte=float(min_price))
-    if max_price:
-        teacher_query &= Q(fair_rate_etb__lte=float(max_price))
-    if session_length:
-        teacher_query &= Q(preferred_session_length=int(session_length))
-    if platform_interest == 'willing':
-        teacher_query &= Q(would_join_platform=True)
-    elif platform_interest == 'not_willing':
-        teacher_query &= Q(would_join_platform=False)
-    
-    teachers = TeacherSurvey.objects.filter(teacher_query)
+    try:
+        plan = filters.parse(request.query_params, filters.ANALYTICS_FILTERS)
+    except filters.FilterError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.query_params.get('approx', '').lower() in ('1', 'true'):
+        return Response(approx.filtered_analytics(plan))
+
+    return prerender.respond(request, rendered_filtered_analytics(plan))
+
+
+def rendered_filtered_analytics(plan):
+    def build():
+        data = datacache.get_or_build(plan.cache_key('analytics:filtered'), lambda: filtered_analytics(plan))
+        # Equivalent params share the data; echo this request's own spelling
+        return dict(data, filters_applied=plan.applied())
+
+    key = prerender.cache_key('analytics:filtered:json', urlencode(sorted(plan.raw.items())))
+    return prerender.cached(key, build)
+
+
+# Cross-dimensional breakdowns of the filtered analytics payload
+AGE_RANGES = ['8-15', '15-24', '24-32', '32-40', '40+']
+GENDERS = ['male', 'female']
+PRICE_RANGES = [
+    {'min': 0, 'max': 100, 'label': '0-100'},
+    {'min': 100, 'max': 200, 'label': '100-200'},
+    {'min': 200, 'max': 300, 'label': '200-300'},
+    {'min': 300, 'max': 999999, 'label': '300+'}
+]
+SESSION_LENGTHS = [20, 30, 45, 60]
+
+
+def filtered_analytics(plan):
+    """Exact filtered analytics payload for a FilterPlan"""
+    groups = snapshot.grouped(plan)
+    if groups is not None:
+        return snapshot_analytics(plan, groups)
+
+    students = StudentSurvey.objects.filter(plan.q('student'))
+    teachers = TeacherSurvey.objects.filter(plan.q('teacher'))
     
     # Calculate analytics
     total_students = students.count()
@@ -90,11 +97,8 @@ def get_filtered_analytics(request):
     
     # Cross-dimensional analysis: Age × Gender
     age_gender_matrix = []
-    age_ranges = ['8-15', '15-24', '24-32', '32-40', '40+']
-    genders = ['male', 'female']
-    
-    for age in age_ranges:
-        for gen in genders:
+    for age in AGE_RANGES:
+        for gen in GENDERS:
             count = students.filter(age_range=age, gender=gen).count()
             if count > 0:  # Only include non-zero counts
                 age_gender_matrix.append({
@@ -104,17 +108,9 @@ def get_filtered_analytics(request):
                 })
     
     # Price × Session Length heatmap data
-    price_ranges = [
-        {'min': 0, 'max': 100, 'label': '0-100'},
-        {'min': 100, 'max': 200, 'label': '100-200'},
-        {'min': 200, 'max': 300, 'label': '200-300'},
-        {'min': 300, 'max': 999999, 'label': '300+'}
-    ]
-    session_lengths = [20, 30, 45, 60]
-    
     price_session_matrix = []
-    for price_range in price_ranges:
-        for session_len in session_lengths:
+    for price_range in PRICE_RANGES:
+        for session_len in SESSION_LENGTHS:
             count = students.filter(
                 fair_price_etb__gte=price_range['min'],
                 fair_price_etb__lt=price_range['max'],
@@ -127,18 +123,10 @@ def get_filtered_analytics(request):
                     'count': count
                 })
     
-    return Response({
+    return {
         'total_students': total_students,
         'total_teachers': total_teachers,
-        'filters_applied': {
-            'gender': gender,
-            'age_range': age_range,
-            'min_price': min_price,
-            'max_price': max_price,
-            'frequency': frequency,
-            'session_length': session_length,
-            'platform_interest': platform_interest
-        },
+        'filters_applied': plan.applied(),
         'gender_distribution': list(gender_dist),
         'age_distribution': list(age_dist),
         'session_distribution': list(session_dist),
@@ -159,114 +147,403 @@ def get_filtered_analytics(request):
         },
         'age_gender_matrix': age_gender_matrix,
         'price_session_matrix': price_session_matrix
-    })
+    }
+
+
+def snapshot_analytics(plan, groups):
+    """filtered_analytics() from the shared snapshot's grouped counts (see surveys/snapshot.py)"""
+    students, teachers = groups['student'], groups['teacher']
+    student_keys, teacher_keys = snapshot.key_index('student'), snapshot.key_index('teacher')
+    price, gender, age_range = student_keys['price'], student_keys['gender'], student_keys['age_range']
+    session_length = student_keys['session_length']
+
+    distributions = {key: {} for key in ('gender', 'age_range', 'session_length', 'frequency')}
+    positions = [(student_keys[key], counts) for key, counts in distributions.items()]
+    price_labels = {}
+    age_gender = {}
+    price_session = {}
+    for group, count in students.items():
+        for position, counts in positions:
+            counts[group[position]] = counts.get(group[position], 0) + count
+        pair = (group[age_range], group[gender])
+        age_gender[pair] = age_gender.get(pair, 0) + count
+        if group[price] not in price_labels:
+            price_labels[group[price]] = next((
+                price_range['label'] for price_range in PRICE_RANGES
+                if price_range['min'] * 100 <= group[price] < price_range['max'] * 100
+            ), None)
+        pair = (price_labels[group[price]], group[session_length])
+        price_session[pair] = price_session.get(pair, 0) + count
+
+    def total(rows, keys=None, willing=None):
+        if keys is None:
+            return sum(rows.values())
+        return sum(count for group, count in rows.items() if group[keys['willing']] is willing)
+
+    def average(rows, keys):
+        # Decimal, like Avg() over the DecimalField, so both paths round the same way
+        matched = total(rows)
+        cents = sum(group[keys['price']] * count for group, count in rows.items())
+        return Decimal(cents) / (matched * 100) if matched else 0
+
+    def distribution(key, label):
+        counts = distributions[key]
+        return [{label: value, 'count': counts[value]} for value in sorted(counts)]
+
+    return {
+        'total_students': total(students),
+        'total_teachers': total(teachers),
+        'filters_applied': plan.applied(),
+        'gender_distribution': distribution('gender', 'gender'),
+        'age_distribution': distribution('age_range', 'age_range'),
+        'session_distribution': distribution('session_length', 'preferred_session_length'),
+        'frequency_distribution': distribution('frequency', 'preferred_frequency'),
+        'platform_interest': {
+            'students': {
+                'willing': total(students, student_keys, True),
+                'not_willing': total(students, student_keys, False)
+            },
+            'teachers': {
+                'willing': total(teachers, teacher_keys, True),
+                'not_willing': total(teachers, teacher_keys, False)
+            }
+        },
+        'average_prices': {
+            'student_price': round(average(students, student_keys), 2),
+            'teacher_rate': round(average(teachers, teacher_keys), 2)
+        },
+        'age_gender_matrix': [
+            {'age_range': age, 'gender': gen, 'count': age_gender[(age, gen)]}
+            for age in AGE_RANGES for gen in GENDERS if age_gender.get((age, gen))
+        ],
+        'price_session_matrix': [
+            {'price_range': price_range['label'], 'session_length': session_len,
+             'count': price_session[(price_range['label'], session_len)]}
+            for price_range in PRICE_RANGES for session_len in SESSION_LENGTHS
+            if price_session.get((price_range['label'], session_len))
+        ]
+    }
+
+
+def student_row(student):
+    return {
+        'id': f"student_{student.id}",
+        'type': 'student',
+        'name': student.full_name,
+        'phone': student.phone_number,
+        'gender': student.gender,
+        'age_range': student.age_range,
+        'session_length': student.preferred_session_length,
+        'frequency': student.preferred_frequency,
+        'price': student.fair_price_etb,
+        'platform_interest': student.willing_to_try,
+        'subjects': student.subjects_of_interest if student.subjects_of_interest else [],
+        'submitted_at': student.submitted_at.isoformat() if student.submitted_at else None
+    }
+
+
+def teacher_row(teacher):
+    return {
+        'id': f"teacher_{teacher.id}",
+        'type': 'teacher',
+        'name': teacher.full_name,
+        'phone': teacher.phone_number,
+        'gender': teacher.gender,
+        'age_range': teacher.age_range,
+        'session_length': teacher.preferred_session_length,
+        'frequency': None,  # Teachers don't have frequency
+        'price': teacher.fair_rate_etb,
+        'platform_interest': teacher.would_join_platform,
+        'subjects': teacher.confident_topics if teacher.confident_topics else [],
+        'submitted_at': teacher.submitted_at.isoformat() if teacher.submitted_at else None
+    }
+
+
+# (survey type, model, columns read, row builder) in merge order: students first on equal timestamps
+USER_LIST_SOURCES = (
+    ('student', StudentSurvey, ('full_name', 'phone_number', 'gender', 'age_range', 'preferred_session_length',
+                                'preferred_frequency', 'fair_price_etb', 'willing_to_try', 'subjects_of_interest',
+                                'submitted_at'), student_row),
+    ('teacher', TeacherSurvey, ('full_name', 'phone_number', 'gender', 'age_range', 'preferred_session_length',
+                                'fair_rate_etb', 'would_join_platform', 'confident_topics', 'submitted_at'),
+     teacher_row),
+)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def get_user_list(request):
     """
     Get paginated user list with filtering (both students and teachers)
-    Query params: user_type, gender, age_range, min_price, max_price, frequency, session_length, search, page, page_size
+    Query params: user_type, gender, age_range, min_price, max_price, frequency, session_length,
+    platform_interest, search, page, page_size
+
+    Only the rows up to the requested page are read. Totals of large unfiltered tables are
+    estimated (surveys/pagination.py, flagged by total_estimated); otherwise the count rides
+    along with the page query as a window aggregate.
     """
     # Get filter and pagination parameters
     user_type = request.query_params.get('user_type', 'all')  # 'student', 'teacher', or 'all'
-    gender = request.query_params.get('gender')
-    age_range = request.query_params.get('age_range')
-    min_price = request.query_params.get('min_price')
-    max_price = request.query_params.get('max_price')
-    frequency = request.query_params.get('frequency')
-    session_length = request.query_params.get('session_length')
-    search = request.query_params.get('search', '')
-    page = int(request.query_params.get('page', 1))
-    page_size = int(request.query_params.get('page_size', 50))
-    
-    users = []
-    
-    # Fetch students if requested
-    if user_type in ['all', 'student']:
-        query = Q()
-        if gender:
-            query &= Q(gender=gender)
-        if age_range:
-            query &= Q(age_range=age_range)
-        if min_price:
-            query &= Q(fair_price_etb__gte=float(min_price))
-        if max_price:
-            query &= Q(fair_price_etb__lte=float(max_price))
-        if frequency:
-            query &= Q(preferred_frequency=frequency)
-        if session_length:
-            query &= Q(preferred_session_length=int(session_length))
-        if search:
-            query &= Q(Q(full_name__icontains=search) | Q(phone_number__icontains=search))
-        
-        students = StudentSurvey.objects.filter(query).order_by('-submitted_at')
-        
-        for student in students:
-            users.append({
-                'id': f"student_{student.id}",
-                'type': 'student',
-                'name': student.full_name,
-                'phone': student.phone_number,
-                'gender': student.gender,
-                'age_range': student.age_range,
-                'session_length': student.preferred_session_length,
-                'frequency': student.preferred_frequency,
-                'price': student.fair_price_etb,
-                'platform_interest': student.willing_to_try,
-                'subjects': student.subjects_of_interest if student.subjects_of_interest else [],
-                'submitted_at': student.submitted_at.isoformat() if student.submitted_at else None
-            })
-    
-    # Fetch teachers if requested
-    if user_type in ['all', 'teacher']:
-        query = Q()
-        if gender:
-            query &= Q(gender=gender)
-        if age_range:
-            query &= Q(age_range=age_range)
-        if min_price:
-            query &= Q(fair_rate_etb__gte=float(min_price))
-        if max_price:
-            query &= Q(fair_rate_etb__lte=float(max_price))
-        if session_length:
-            query &= Q(preferred_session_length=int(session_length))
-        if search:
-            query &= Q(Q(full_name__icontains=search) | Q(phone_number__icontains=search))
-        
-        teachers = TeacherSurvey.objects.filter(query).order_by('-submitted_at')
-        
-        for teacher in teachers:
-            users.append({
-                'id': f"teacher_{teacher.id}",
-                'type': 'teacher',
-                'name': teacher.full_name,
-                'phone': teacher.phone_number,
-                'gender': teacher.gender,
-                'age_range': teacher.age_range,
-                'session_length': teacher.preferred_session_length,
-                'frequency': None,  # Teachers don't have frequency
-                'price': teacher.fair_rate_etb,
-                'platform_interest': teacher.would_join_platform,
-                'subjects': teacher.confident_topics if teacher.confident_topics else [],
-                'submitted_at': teacher.submitted_at.isoformat() if teacher.submitted_at else None
-            })
-    
-    # Sort all users by submitted_at (most recent first)
-    users.sort(key=lambda x: x['submitted_at'] or '', reverse=True)
-    
-    # Pagination
-    total = len(users)
+    try:
+        plan = filters.parse(request.query_params, filters.USER_LIST_FILTERS)
+        page = int(request.query_params.get('page', 1))
+        page_size = int(request.query_params.get('page_size', 50))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if page < 1 or page_size < 1:
+        return Response({'error': 'page and page_size must be positive integers'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
     start = (page - 1) * page_size
     end = start + page_size
-    paginated_users = users[start:end]
-    
+    total = 0
+    estimated = False
+    streams = []
+    for survey_type, model, columns, to_row in USER_LIST_SOURCES:
+        if user_type not in ('all', survey_type):
+            continue
+        queryset = model.objects.filter(plan.q(survey_type)).order_by('-submitted_at', '-pk')
+        count = estimated_count(queryset)
+        # With one type the database skips to the page; merging two needs each one's first `end` rows
+        offset = start if user_type == survey_type else 0
+        window = queryset.only(*columns)
+        if count is None:
+            window = window.annotate(full_count=Window(Count('pk')))
+        rows = list(window[offset:end])
+        if count is not None:
+            estimated = True
+        elif rows:
+            count = rows[0].full_count
+        else:
+            count = queryset.count() if offset else 0
+        total += count
+        streams.append([to_row(row) for row in rows])
+
+    # Most recent first, as the legacy full sort did
+    users = list(heapq.merge(*streams, key=lambda x: x['submitted_at'] or '', reverse=True))
+    if user_type == 'all':
+        users = users[start:end]
+
     return Response({
         'total': total,
+        'total_estimated': estimated,
         'page': page,
         'page_size': page_size,
         'total_pages': (total + page_size - 1) // page_size if total > 0 else 0,
-        'users': paginated_users
+        'users': users
+    })
+
+
+MAX_TIMESERIES_DAYS = 3 * 366
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def submission_timeseries(request):
+    """
+    Submission counts per day or week from the pre-bucketed daily table
+    Query params: survey_type (student, teacher, all), dimension (all, gender, age_range),
+    start, end (YYYY-MM-DD, default last 30 days), granularity (day, week), window (rolling buckets)
+    """
+    survey_type = request.query_params.get('survey_type', 'all')
+    dimension = request.query_params.get('dimension', 'all')
+    granularity = request.query_params.get('granularity', 'day')
+
+    if survey_type not in ['all', 'student', 'teacher']:
+        return Response({'error': 'survey_type must be "student", "teacher" or "all".'}, status=status.HTTP_400_BAD_REQUEST)
+    if dimension not in ('all',) + timeseries.DIMENSIONS:
+        return Response({'error': f'dimension must be one of: all, {", ".join(timeseries.DIMENSIONS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+    if granularity not in ['day', 'week']:
+        return Response({'error': 'granularity must be "day" or "week".'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+        start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=29)
+        window = int(request.query_params['window']) if 'window' in request.query_params else None
+    except ValueError:
+        return Response({'error': 'start/end must be YYYY-MM-DD and window an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if start > end:
+        return Response({'error': 'start must not be after end.'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days > MAX_TIMESERIES_DAYS:
+        return Response({'error': f'Range is limited to {MAX_TIMESERIES_DAYS} days.'}, status=status.HTTP_400_BAD_REQUEST)
+    if window is not None and not 1 <= window <= 366:
+        return Response({'error': 'window must be between 1 and 366.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    survey_types = ['student', 'teacher'] if survey_type == 'all' else [survey_type]
+    series = timeseries.query(survey_types, dimension, start, end, granularity, window)
+
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'granularity': granularity,
+        'dimension': dimension,
+        'window': window,
+        'series': series,
     })
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def price_statistics(request):
+    """
+    Price quantiles and histograms from the incrementally maintained sketches
+    Query params: survey_type (student, teacher, all), dimension (gender, age_range),
+    quantiles (comma-separated fractions, default 0.1,0.25,0.5,0.75,0.9)
+    """
+    survey_type = request.query_params.get('survey_type', 'all')
+    dimension = request.query_params.get('dimension')
+
+    if survey_type not in ['all', 'student', 'teacher']:
+        return Response({'error': 'survey_type must be "student", "teacher" or "all".'}, status=status.HTTP_400_BAD_REQUEST)
+    if dimension and dimension not in pricestats.DIMENSIONS:
+        return Response({'error': f'dimension must be one of: {", ".join(pricestats.DIMENSIONS)}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        fractions = [float(value) for value in request.query_params['quantiles'].split(',')] \
+            if 'quantiles' in request.query_params else list(pricestats.DEFAULT_QUANTILES)
+    except ValueError:
+        return Response({'error': 'quantiles must be comma-separated numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not fractions or len(fractions) > 20 or not all(0 <= fraction <= 1 for fraction in fractions):
+        return Response({'error': 'quantiles must be 1 to 20 fractions between 0 and 1.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    survey_types = ['student', 'teacher'] if survey_type == 'all' else [survey_type]
+    return Response({
+        'dimension': dimension,
+        'bin_width': pricestats.BIN_WIDTH,
+        'results': pricestats.query(survey_types, dimension, fractions),
+    })
+
+
+def text_scope(request):
+    """(survey_types, field) from survey_type/field params; raises ValueError"""
+    survey_type = request.query_params.get('survey_type', 'all')
+    field = request.query_params.get('field') or None
+    if survey_type not in ['all', 'student', 'teacher']:
+        raise ValueError('survey_type must be "student", "teacher" or "all".')
+    survey_types = ['student', 'teacher'] if survey_type == 'all' else [survey_type]
+    fields = sorted({name for survey_type in survey_types for name in textindex.TEXT_FIELDS[survey_type]})
+    if field and field not in fields:
+        raise ValueError(f'field must be one of: {", ".join(fields)}.')
+    return survey_types, field
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def text_keywords(request):
+    """
+    Most frequent terms in the open-text answers, overall and per field, from the inverted index
+    Query params: survey_type (student, teacher, all), field, limit (default 20, max 100)
+    """
+    try:
+        survey_types, field = text_scope(request)
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= 100:
+        return Response({'error': 'limit must be between 1 and 100.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    key = f"text:keywords:{','.join(survey_types)}:{field or ''}:{limit}"
+    data = datacache.get_or_build(key, lambda: textindex.keywords(survey_types, field, limit))
+    return Response({'survey_types': survey_types, 'field': field, **data})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def text_search(request):
+    """
+    Answers containing every term of q, newest first per survey type
+    Query params: q, survey_type (student, teacher, all), field, page, page_size (default 20, max 100)
+    """
+    try:
+        survey_types, field = text_scope(request)
+        page = int(request.query_params.get('page', 1))
+        page_size = int(request.query_params.get('page_size', 20))
+    except ValueError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if page < 1 or not 1 <= page_size <= 100:
+        return Response({'error': 'page must be positive and page_size between 1 and 100.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    terms = textindex.tokenize(request.query_params.get('q', ''))
+    if not terms:
+        return Response({'error': 'q must contain at least one searchable word.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    total, results = textindex.search(terms, survey_types, field, (page - 1) * page_size, page_size)
+    return Response({
+        'terms': terms,
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'total_pages': (total + page_size - 1) // page_size,
+        'results': results,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def matching_report(request):
+    """
+    Student demand vs teacher capacity and price overlap per subject and session length
+    Query params: subject, session_length (narrow the returned buckets)
+    """
+    subject = request.query_params.get('subject')
+    session_length = request.query_params.get('session_length')
+    try:
+        session_length = int(session_length) if session_length else None
+    except ValueError:
+        return Response({'error': 'session_length must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return prerender.respond(request, rendered_matching_report(subject, session_length))
+
+
+def rendered_matching_report(subject=None, session_length=None):
+    def build():
+        report = matching.report()
+        buckets = [
+            row for row in report['buckets']
+            if (not subject or row['subject'] == subject)
+            and (session_length is None or row['session_length'] == session_length)
+        ]
+        subjects = [row for row in report['subjects'] if not subject or row['subject'] == subject]
+        return {'generated_at': report['generated_at'], 'buckets': buckets, 'subjects': subjects}
+
+    params = urlencode({'subject': subject or '', 'session_length': session_length or ''})
+    key = prerender.cache_key('analytics:matching:json', params)
+    return prerender.cached(key, build, getattr(settings, 'MATCHING_REPORT_CACHE_SECONDS', 300))
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def start_matching_assignment(request):
+    """
+    Queue a student-to-teacher assignment run as a background job
+    Body: incremental (bool), gender ('same' or 'any'), tolerance (price slack, e.g. 0.1)
+    """
+    incremental = request.data.get('incremental', False)
+    if isinstance(incremental, str):
+        incremental = {'0': False, 'false': False, '1': True, 'true': True}.get(incremental.lower(), incremental)
+    if not isinstance(incremental, bool):
+        return Response({'error': 'incremental must be true or false.'}, status=status.HTTP_400_BAD_REQUEST)
+    gender_policy = request.data.get('gender', 'same')
+    if gender_policy not in assignment.GENDER_POLICIES:
+        return Response({'error': 'gender must be "same" or "any".'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        tolerance = float(request.data.get('tolerance', 0))
+    except (TypeError, ValueError):
+        return Response({'error': 'tolerance must be a number.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 <= tolerance <= 1:
+        return Response({'error': 'tolerance must be between 0 and 1.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    params = {
+        'incremental': incremental,
+        'gender_policy': gender_policy,
+        'tolerance': tolerance,
+    }
+    try:
+        job = jobs.enqueue('assign_matches', params, user=request.user)
+    except jobs.JobConflict:
+        return Response({'error': 'An assignment run is already queued or running.'}, status=status.HTTP_409_CONFLICT)
+    return Response(JobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,288 @@
+"""
+Approximate analytics for the dashboard's exploratory view (?approx=1).
+
+Distributions come from a fixed-size uniform reservoir sample of each survey
+table (Algorithm R, maintained on insert) and distinct IP / phone counts from
+HyperLogLog sketches, so a response reads a constant number of rows no matter
+how large the survey tables grow. Counts are scaled up to the population and
+reported with 95% Wilson score intervals.
+"""
+import json
+import math
+import random
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import sketches
+from .models import StudentSurvey, TeacherSurvey, AnalyticsSketch, ReservoirSample
+
+Z_95 = 1.96
+
+# Fields copied into each reservoir slot, per survey type
+SAMPLE_FIELDS = {
+    'student': {
+        'gender': 'gender',
+        'age_range': 'age_range',
+        'price': 'fair_price_etb',
+        'frequency': 'preferred_frequency',
+        'session_length': 'preferred_session_length',
+        'willing': 'willing_to_try',
+        'duplicate_cluster': 'duplicate_cluster',
+    },
+    'teacher': {
+        'gender': 'gender',
+        'age_range': 'age_range',
+        'price': 'fair_rate_etb',
+        'session_length': 'preferred_session_length',
+        'willing': 'would_join_platform',
+        'duplicate_cluster': 'duplicate_cluster',
+    },
+}
+
+SURVEY_MODELS = {
+    'student': StudentSurvey,
+    'teacher': TeacherSurvey,
+}
+
+DISTINCT_FIELDS = ('ip_address', 'phone_number')
+
+
+def reservoir_size():
+    return getattr(settings, 'ANALYTICS_RESERVOIR_SIZE', 2000)
+
+
+def _sample_values(survey_type, survey):
+    values = {}
+    for key, field in SAMPLE_FIELDS[survey_type].items():
+        value = getattr(survey, field)
+        values[key] = float(value) if key == 'price' and value is not None else value
+    return values
+
+
+def _hll_name(survey_type, field):
+    return f'hll:{survey_type}:{field}'
+
+
+def _reservoir_name(survey_type):
+    return f'reservoir:{survey_type}'
+
+
+def record_submission(survey_type, survey, rng=random):
+    """
+    Update the distinct-count sketches and the reservoir for one new survey.
+
+    The sketches and the reservoir's row count share one read and one
+    upsert; the slot is one more statement, and only for sampled rows, so
+    it becomes rare once the table outgrows the reservoir.
+    """
+    changes = {}
+    for field in DISTINCT_FIELDS:
+        value = getattr(survey, field)
+        if value:
+            changes[_hll_name(survey_type, field)] = lambda hll, value=value: hll.add(value)
+    _, seen = sketches.update(sketches.HyperLogLog, changes, counter=_reservoir_name(survey_type))
+
+    # Algorithm R: the n-th row replaces a random slot with probability size / n
+    size = reservoir_size()
+    slot = seen - 1 if seen <= size else rng.randrange(seen)
+    if slot < size:
+        _store_slot(survey_type, slot, survey.pk, _sample_values(survey_type, survey))
+
+
+def _store_slot(survey_type, slot, survey_id, values):
+    table = connection.ops.quote_name(ReservoirSample._meta.db_table)
+    column = connection.ops.quote_name('values')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (survey_type, slot, survey_id, {column}) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT (survey_type, slot) DO UPDATE SET survey_id = excluded.survey_id, {column} = excluded.{column}',
+            [survey_type, slot, survey_id, json.dumps(values)],
+        )
+
+
+def rebuild(survey_types=None, rng=random):
+    """Recompute sketches and reservoirs from the survey tables"""
+    size = reservoir_size()
+    for survey_type in survey_types or list(SURVEY_MODELS):
+        model = SURVEY_MODELS[survey_type]
+        fields = list(SAMPLE_FIELDS[survey_type].values())
+        hlls = {field: sketches.HyperLogLog() for field in DISTINCT_FIELDS}
+        reservoir = []
+        seen = 0
+
+        rows = model.objects.order_by().values_list('pk', *DISTINCT_FIELDS, *fields)
+        for row in rows.iterator(chunk_size=5000):
+            seen += 1
+            for field, value in zip(DISTINCT_FIELDS, row[1:1 + len(DISTINCT_FIELDS)]):
+                if value:
+                    hlls[field].add(value)
+            if seen <= size:
+                reservoir.append(row)
+            else:
+                slot = rng.randrange(seen)
+                if slot < size:
+                    reservoir[slot] = row
+
+        keys = list(SAMPLE_FIELDS[survey_type])
+        offset = 1 + len(DISTINCT_FIELDS)
+        with transaction.atomic():
+            for field, hll in hlls.items():
+                sketches.store(_hll_name(survey_type, field), hll, seen)
+            AnalyticsSketch.objects.update_or_create(name=_reservoir_name(survey_type), defaults={'count': seen})
+            ReservoirSample.objects.filter(survey_type=survey_type).delete()
+            samples = []
+            for slot, row in enumerate(reservoir):
+                values = dict(zip(keys, row[offset:]))
+                if values.get('price') is not None:
+                    values['price'] = float(values['price'])
+                samples.append(ReservoirSample(survey_type=survey_type, slot=slot, survey_id=row[0], values=values))
+            ReservoirSample.objects.bulk_create(samples, batch_size=2000)
+
+
+def wilson_interval(matches, sample, z=Z_95):
+    if sample == 0:
+        return 0.0, 0.0, 0.0
+    p = matches / sample
+    denominator = 1 + z * z / sample
+    centre = (p + z * z / (2 * sample)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / sample + z * z / (4 * sample * sample)) / denominator
+    return p, max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class SampleEstimator:
+    """Scale match counts in a uniform sample up to the sampled population"""
+
+    def __init__(self, sample_size, population):
+        self.sample_size = sample_size
+        self.population = population
+        self.exact = population <= sample_size
+
+    def estimate(self, matches):
+        if self.exact:
+            return {'count': matches, 'ci_low': matches, 'ci_high': matches}
+        p, low, high = wilson_interval(matches, self.sample_size)
+        return {
+            'count': round(p * self.population),
+            'ci_low': round(low * self.population),
+            'ci_high': round(high * self.population),
+        }
+
+
+def mean_estimate(values, z=Z_95):
+    if not values:
+        return {'mean': 0, 'ci_low': 0, 'ci_high': 0}
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return {'mean': round(mean, 2), 'ci_low': round(mean, 2), 'ci_high': round(mean, 2)}
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    margin = z * math.sqrt(variance / len(values))
+    return {'mean': round(mean, 2), 'ci_low': round(mean - margin, 2), 'ci_high': round(mean + margin, 2)}
+
+
+def load_sample(survey_type):
+    population = AnalyticsSketch.objects.filter(name=_reservoir_name(survey_type)).values_list('count', flat=True).first() or 0
+    rows = list(ReservoirSample.objects.filter(survey_type=survey_type).values_list('values', flat=True))
+    return rows, population
+
+
+def distinct_estimates(survey_types):
+    names = {(survey_type, field): _hll_name(survey_type, field) for survey_type in survey_types for field in DISTINCT_FIELDS}
+    loaded = sketches.load_many(list(names.values()), sketches.HyperLogLog)
+    estimates = {survey_type: {} for survey_type in survey_types}
+    for (survey_type, field), name in names.items():
+        estimates[survey_type][field] = loaded[name][0].estimate()
+    return estimates
+
+
+# Model field -> reservoir key, per survey type
+SAMPLE_KEYS = {
+    survey_type: {field: key for key, field in fields.items()} for survey_type, fields in SAMPLE_FIELDS.items()
+}
+
+
+def _getter(row, survey_type):
+    keys = SAMPLE_KEYS[survey_type]
+    return lambda field: row.get(keys.get(field))
+
+
+def filtered_analytics(plan):
+    """
+    Approximate counterpart of get_filtered_analytics for a FilterPlan.
+
+    Filtering a uniform sample leaves a uniform sample of the filtered rows,
+    so every count is estimated as a share of the whole sample.
+    """
+    student_sample, student_population = load_sample('student')
+    teacher_sample, teacher_population = load_sample('teacher')
+    student_estimator = SampleEstimator(len(student_sample), student_population)
+    teacher_estimator = SampleEstimator(len(teacher_sample), teacher_population)
+
+    distinct = distinct_estimates(['student', 'teacher'])
+
+    students = [row for row in student_sample if plan.matches('student', _getter(row, 'student'))]
+    teachers = [row for row in teacher_sample if plan.matches('teacher', _getter(row, 'teacher'))]
+
+    def count_where(rows, estimator, predicate=None):
+        return estimator.estimate(sum(1 for row in rows if predicate is None or predicate(row)))
+
+    def distribution(key, label):
+        counts = {}
+        for row in students:
+            counts[row.get(key)] = counts.get(row.get(key), 0) + 1
+        return [
+            dict({label: value}, **student_estimator.estimate(matches))
+            for value, matches in sorted(counts.items(), key=lambda item: str(item[0]))
+        ]
+
+    age_gender_matrix = []
+    for age in ['8-15', '15-24', '24-32', '32-40', '40+']:
+        for gen in ['male', 'female']:
+            estimate = count_where(
+                students, student_estimator, lambda row: row.get('age_range') == age and row.get('gender') == gen
+            )
+            if estimate['count'] > 0:
+                age_gender_matrix.append(dict({'age_range': age, 'gender': gen}, **estimate))
+
+    price_ranges = [(0, 100, '0-100'), (100, 200, '100-200'), (200, 300, '200-300'), (300, 999999, '300+')]
+    price_session_matrix = []
+    for low, high, label in price_ranges:
+        for session_len in [20, 30, 45, 60]:
+            estimate = count_where(students, student_estimator, lambda row: (
+                row.get('price') is not None and low <= row['price'] < high
+                and row.get('session_length') == session_len
+            ))
+            if estimate['count'] > 0:
+                price_session_matrix.append(dict({'price_range': label, 'session_length': session_len}, **estimate))
+
+    return {
+        'approximate': True,
+        'sample_size': {'students': len(student_sample), 'teachers': len(teacher_sample)},
+        'population': {'students': student_population, 'teachers': teacher_population},
+        'total_students': count_where(students, student_estimator),
+        'total_teachers': count_where(teachers, teacher_estimator),
+        'gender_distribution': distribution('gender', 'gender'),
+        'age_distribution': distribution('age_range', 'age_range'),
+        'session_distribution': distribution('session_length', 'preferred_session_length'),
+        'frequency_distribution': distribution('frequency', 'preferred_frequency'),
+        'platform_interest': {
+            'students': {
+                'willing': count_where(students, student_estimator, lambda row: row.get('willing') is True),
+                'not_willing': count_where(students, student_estimator, lambda row: row.get('willing') is False),
+            },
+            'teachers': {
+                'willing': count_where(teachers, teacher_estimator, lambda row: row.get('willing') is True),
+                'not_willing': count_where(teachers, teacher_estimator, lambda row: row.get('willing') is False),
+            },
+        },
+        'average_prices': {
+            'student_price': mean_estimate([row['price'] for row in students if row.get('price') is not None]),
+            'teacher_rate': mean_estimate([row['price'] for row in teachers if row.get('price') is not None]),
+        },
+        'age_gender_matrix': age_gender_matrix,
+        'price_session_matrix': price_session_matrix,
+        'distinct': {
+            'students': distinct['student'],
+            'teachers': distinct['teacher'],
+        },
+    }
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class SurveysConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "surveys"
+
+    def ready(self):
+        # Connect the signal receivers that maintain rollups on submission
+        from . import signals  # noqa: F401
+        # PRAGMAs for new SQLite connections
+        from . import sqlite  # noqa: F401
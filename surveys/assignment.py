@@ -0,0 +1,136 @@
+"""
+Capacity-constrained student-to-teacher assignment.
+
+Teachers are pushed onto one min-heap per (topic, session length, gender)
+keyed by rate; a teacher with several topics sits in several heaps and
+shares one remaining-capacity counter, so exhausted entries are dropped
+lazily when they reach the top. Students are taken in order of increasing
+budget and each one gets the cheapest affordable teacher across their
+subjects, which for a single bucket maximizes the number of matches.
+
+A full run replaces every assignment; an incremental run only places
+students without an assignment, against the capacity that is left.
+"""
+import heapq
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count
+
+from .matching import normalize_subjects
+from .models import StudentSurvey, TeacherSurvey, MatchAssignment
+
+GENDER_POLICIES = ('same', 'any')
+
+
+def assign(students, teachers, gender_policy='same', tolerance=0.0):
+    """
+    Match students to teachers in memory.
+
+    ``students`` are (id, price, session_length, gender, subjects) tuples and
+    ``teachers`` (id, rate, session_length, gender, topics, capacity) tuples.
+    A teacher is affordable when rate <= price * (1 + tolerance). Returns
+    (student_id, teacher_id, subject, price - rate) tuples.
+    """
+    remaining = {}
+    heaps = defaultdict(list)
+    for teacher_id, rate, session_length, gender, topics, capacity in teachers:
+        if capacity <= 0:
+            continue
+        remaining[teacher_id] = capacity
+        key_gender = gender if gender_policy == 'same' else ''
+        for topic in topics:
+            heaps[(topic, session_length, key_gender)].append((rate, teacher_id))
+    for heap in heaps.values():
+        heapq.heapify(heap)
+
+    matches = []
+    for student_id, price, session_length, gender, subjects in sorted(students, key=lambda student: student[1]):
+        budget = price * (1 + tolerance)
+        key_gender = gender if gender_policy == 'same' else ''
+        best = None
+        for subject in subjects:
+            heap = heaps.get((subject, session_length, key_gender))
+            if not heap:
+                continue
+            while heap and remaining[heap[0][1]] <= 0:
+                heapq.heappop(heap)
+            if heap and heap[0][0] <= budget and (best is None or heap[0][0] < best[0]):
+                best = (heap[0][0], heap[0][1], subject)
+        if best is not None:
+            rate, teacher_id, subject = best
+            remaining[teacher_id] -= 1
+            matches.append((student_id, teacher_id, subject, price - rate))
+    return matches
+
+
+def student_rows(queryset):
+    rows = queryset.order_by().values_list(
+        'id', 'fair_price_etb', 'preferred_session_length', 'gender', 'subjects_of_interest'
+    )
+    return [
+        (pk, float(price), session_length, gender, normalize_subjects(subjects))
+        for pk, price, session_length, gender, subjects in rows.iterator(chunk_size=5000)
+    ]
+
+
+def teacher_rows(queryset, used=None):
+    """Teacher tuples; ``used`` maps teacher ids to seats already taken"""
+    used = used or {}
+    rows = queryset.order_by().values_list(
+        'id', 'fair_rate_etb', 'preferred_session_length', 'gender', 'confident_topics', 'students_per_week'
+    )
+    return [
+        (pk, float(rate), session_length, gender, normalize_subjects(topics), (capacity or 0) - used.get(pk, 0))
+        for pk, rate, session_length, gender, topics, capacity in rows.iterator(chunk_size=5000)
+    ]
+
+
+def run(incremental=False, gender_policy='same', tolerance=0.0, batch_size=5000):
+    """Compute and store assignments; returns a summary dict"""
+    started = time.perf_counter()
+    if incremental:
+        used = dict(
+            MatchAssignment.objects.order_by().values_list('teacher_id').annotate(count=Count('id'))
+        )
+        students = student_rows(StudentSurvey.objects.filter(assignment__isnull=True))
+        teachers = teacher_rows(TeacherSurvey.objects.all(), used)
+    else:
+        students = student_rows(StudentSurvey.objects.all())
+        teachers = teacher_rows(TeacherSurvey.objects.all())
+    loaded = time.perf_counter()
+
+    matches = assign(students, teachers, gender_policy, tolerance)
+    matched = time.perf_counter()
+
+    with transaction.atomic():
+        if not incremental:
+            MatchAssignment.objects.all().delete()
+        MatchAssignment.objects.bulk_create(
+            [
+                MatchAssignment(
+                    student_id=student_id, teacher_id=teacher_id, subject=subject,
+                    price_margin=Decimal(str(round(margin, 2))),
+                )
+                for student_id, teacher_id, subject, margin in matches
+            ],
+            batch_size=batch_size,
+        )
+
+    by_subject = defaultdict(int)
+    for _, _, subject, _ in matches:
+        by_subject[subject] += 1
+    return {
+        'mode': 'incremental' if incremental else 'full',
+        'students_considered': len(students),
+        'teachers': len(teachers),
+        'assigned': len(matches),
+        'unassigned': len(students) - len(matches),
+        'by_subject': dict(sorted(by_subject.items())),
+        'load_ms': round((loaded - started) * 1000, 1),
+        'assign_ms': round((matched - loaded) * 1000, 1),
+        'total_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
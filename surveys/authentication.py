@@ -0,0 +1,111 @@
+"""
+JWT authentication that remembers validated tokens.
+
+simplejwt's JWTAuthentication verifies the signature and loads the User row
+on every request, and the dashboard fires several analytics requests in
+parallel with the same access token. CachedJWTAuthentication keeps
+validated tokens in a per-process LRU (JWT_CACHE_SIZE entries) together
+with the user they resolved to, until the token expires or
+JWT_CACHE_SECONDS pass, whichever is first.
+
+Every entry carries the user's version stamp from the Django cache;
+saving or deleting a User bumps it (see signals.py), so deactivated users,
+password and permission changes are picked up on the next request by
+every worker. That needs a cache all workers share (REDIS_URL): with the
+per-process LocMem cache a bump would only reach the worker that made it,
+so the LRU stays off and every request is verified as before, unless
+JWT_CACHE_SINGLE_PROCESS says there is only one worker.
+
+Each request gets its own copy of the cached User, so per-request state
+such as the permission caches never leaks between requests.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+USER_VERSION_KEY = 'surveys:auth-user-version:{}'
+
+_tokens = OrderedDict()
+_lock = threading.Lock()
+
+
+def user_version(user_id):
+    return cache.get(USER_VERSION_KEY.format(user_id), 0)
+
+
+def bump_user(user_id):
+    """Drop every cached token of this user, in all workers sharing the cache"""
+    key = USER_VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing (never bumped or evicted): any non-zero value invalidates
+        cache.set(key, int(time.time()), None)
+
+
+def shared_cache():
+    """Whether the default cache is seen by every worker rather than kept per process"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return not backend.endswith(('.LocMemCache', '.DummyCache'))
+
+
+def enabled():
+    if not getattr(settings, 'JWT_CACHE_SECONDS', 300) or not getattr(settings, 'JWT_CACHE_SIZE', 1024):
+        return False
+    return shared_cache() or getattr(settings, 'JWT_CACHE_SINGLE_PROCESS', False)
+
+
+def clear():
+    with _lock:
+        _tokens.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication backed by a bounded cache of validated tokens and their users"""
+
+    def authenticate(self, request):
+        if not enabled():
+            return super().authenticate(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        now = time.time()
+        with _lock:
+            entry = _tokens.get(raw_token)
+            if entry is not None:
+                _tokens.move_to_end(raw_token)
+        if entry is not None:
+            user, validated_token, expires_at, version = entry
+            if now < expires_at and version == user_version(validated_token.get(api_settings.USER_ID_CLAIM)):
+                return copy.copy(user), validated_token
+            with _lock:
+                _tokens.pop(raw_token, None)
+
+        validated_token = self.get_validated_token(raw_token)
+        # Read the stamp before the user row: a bump in between makes the entry stale on its next use
+        version = user_version(validated_token.get(api_settings.USER_ID_CLAIM))
+        user = self.get_user(validated_token)
+        self.remember(raw_token, user, validated_token, version, now)
+        return user, validated_token
+
+    def remember(self, raw_token, user, validated_token, version, now):
+        max_age = getattr(settings, 'JWT_CACHE_SECONDS', 300)
+        size = getattr(settings, 'JWT_CACHE_SIZE', 1024)
+        expires_at = min(validated_token.get('exp', now), now + max_age)
+        # A pristine copy: this request is about to use (and annotate) ``user``
+        entry = (copy.copy(user), validated_token, expires_at, version)
+        with _lock:
+            _tokens[raw_token] = entry
+            _tokens.move_to_end(raw_token)
+            while len(_tokens) > size:
+                _tokens.popitem(last=False)
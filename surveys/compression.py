@@ -0,0 +1,79 @@
+"""
+gzip/Brotli encoding for JSON responses.
+
+CompressionMiddleware (surveys/middleware.py) encodes JSON bodies of at
+least COMPRESSION_MIN_BYTES on the fly. Pre-rendered payloads (prerender.py)
+carry variants compressed once per data version at the highest level, so
+cached analytics are never compressed twice. Brotli is offered when the
+``brotli`` package is installed; gzip always is.
+"""
+import gzip
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Levels for payloads compressed once and served many times
+PRECOMPRESS_LEVELS = {'br': 11, 'gzip': 9}
+
+
+def encodings():
+    """Supported encodings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def min_bytes():
+    return getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+
+
+def negotiate(accept_encoding):
+    """The preferred supported encoding allowed by an Accept-Encoding header, or None"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        accepted[coding] = quality
+    for coding in encodings():
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(body, encoding, level=None):
+    if encoding == 'br':
+        quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5) if level is None else level
+        return brotli.compress(body, quality=quality)
+    level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6) if level is None else level
+    # mtime=0 keeps the output (and so its ETag) stable for the same body
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def precompress(body):
+    """{encoding: bytes} for every supported encoding that actually shrinks ``body``"""
+    if len(body) < min_bytes():
+        return {}
+    variants = {}
+    for encoding in encodings():
+        compressed = compress(body, encoding, PRECOMPRESS_LEVELS[encoding])
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def encoded_etag(etag, encoding):
+    """Distinct ETag for an encoded representation: '"abc"' -> '"abc-gzip"'"""
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
@@ -0,0 +1,42 @@
+"""
+Cache for derived analytics, invalidated by a data version stamp.
+
+Every key is prefixed with the current version, and the version is bumped
+whenever survey rows change (post_save receivers, rebuild commands), so
+stale entries are simply never read again and expire on their own. With the
+per-process LocMem cache each worker only sees its own bumps; entries are
+bounded by ANALYTICS_CACHE_SECONDS either way.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'surveys:data-version'
+
+
+def data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY) or 1
+    return version
+
+
+def bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key missing (first write or evicted): any new value invalidates
+        cache.add(VERSION_KEY, 2, None)
+
+
+def get_or_build(key, build, timeout=None):
+    """Return the cached value for ``key`` at the current data version, building it on a miss"""
+    timeout = getattr(settings, 'ANALYTICS_CACHE_SECONDS', 300) if timeout is None else timeout
+    if not timeout:
+        return build()
+    versioned = f'v{data_version()}:{key}'
+    value = cache.get(versioned)
+    if value is None:
+        value = build()
+        cache.set(versioned, value, timeout)
+    return value
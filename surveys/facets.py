@@ -0,0 +1,209 @@
+"""
+Admin sidebar filters with counts from a cached facet summary.
+
+The first filter a changelist renders builds one summary of the whole table:
+a single GROUP BY over every FacetListFilter/MonthListFilter column of the
+ModelAdmin, read from the replica when one is configured. It is kept for
+FACET_CACHE_SECONDS whatever is submitted meanwhile (every submission bumps
+the data version, so a versioned entry would rescan after each one); admin
+edits and deletes drop it with ``discard()``. Each filter then counts its values
+under the other selected facets in Python. With a search term or any other
+filter parameter the counts are left out, since the summary cannot answer
+them; the values are still listed.
+
+MonthListFilter replaces date_hierarchy, whose drill-down ran a SELECT
+DISTINCT over the dates on every render.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Count, F
+from django.db.models.functions import TruncMonth
+from django.utils import formats, timezone
+from django.utils.translation import gettext_lazy as _
+
+from .routers import use_replica
+
+
+class FacetListFilter(admin.FieldListFilter):
+    """Exact-match filter over a choices or boolean field, with per-value counts"""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = self.parameter(field_path)
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+    def parameter(self, field_path):
+        # Same parameter as Django's choices/boolean filters, so existing admin links keep working
+        return f'{field_path}__exact'
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def expression(self):
+        return F(self.field_path)
+
+    def summary_value(self, value):
+        return value
+
+    def selected(self):
+        """The selected value as it appears in the summary, or None"""
+        if self.lookup_val is None:
+            return None
+        try:
+            return self.field.to_python(self.lookup_val)
+        except ValidationError:
+            return None
+
+    def options(self):
+        """(parameter, summary value, label) per value"""
+        if isinstance(self.field, models.BooleanField):
+            return [('1', True, _('Yes')), ('0', False, _('No'))]
+        return [(str(value), value, label) for value, label in self.field.flatchoices if value is not None]
+
+    def choices(self, changelist):
+        _values, counts = facet_counts(changelist)[self.lookup_kwarg]
+        selected = self.selected()
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+        }
+        for param, value, label in self.options():
+            yield {
+                'selected': self.lookup_val is not None and selected == value,
+                'query_string': changelist.get_query_string({self.lookup_kwarg: param}),
+                'display': label if counts is None else f'{label} ({counts.get(value, 0)})',
+            }
+
+
+class MonthListFilter(FacetListFilter):
+    """Filter a date/datetime field by calendar month, listing the months that have rows"""
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.title = _('%(field)s month') % {'field': self.title}
+
+    def parameter(self, field_path):
+        return f'{field_path}__month_start'
+
+    def expression(self):
+        return TruncMonth(self.field_path)
+
+    def summary_value(self, value):
+        return value.strftime('%Y-%m') if value is not None else None
+
+    def month_range(self):
+        start = datetime.strptime(self.lookup_val, '%Y-%m')
+        end = (start + timedelta(days=32)).replace(day=1)
+        if settings.USE_TZ and isinstance(self.field, models.DateTimeField):
+            start, end = timezone.make_aware(start), timezone.make_aware(end)
+        return start, end
+
+    def selected(self):
+        if self.lookup_val is None:
+            return None
+        try:
+            self.month_range()
+        except ValueError:
+            return None
+        return self.lookup_val
+
+    def queryset(self, request, queryset):
+        if self.lookup_val is None:
+            return queryset
+        try:
+            start, end = self.month_range()
+        except ValueError as exc:
+            raise IncorrectLookupParameters(exc)
+        return queryset.filter(**{f'{self.field_path}__gte': start, f'{self.field_path}__lt': end})
+
+    def choices(self, changelist):
+        values, counts = facet_counts(changelist)[self.lookup_kwarg]
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': _('All'),
+        }
+        for month in sorted((value for value in values if value is not None), reverse=True):
+            label = formats.date_format(datetime.strptime(month, '%Y-%m'), 'YEAR_MONTH_FORMAT')
+            yield {
+                'selected': self.lookup_val == month,
+                'query_string': changelist.get_query_string({self.lookup_kwarg: month}),
+                'display': label if counts is None else f'{label} ({counts.get(month, 0)})',
+            }
+
+
+def _cache_key(model):
+    return f'facets:{model._meta.label_lower}'
+
+
+def discard(model):
+    """Drop the cached summary of ``model`` after edits the counts should show at once"""
+    cache.delete(_cache_key(model))
+
+
+def summary(model, specs):
+    """[(value per spec..., rows)] over the whole table, rebuilt at most every FACET_CACHE_SECONDS"""
+    def build():
+        columns = {f'facet_{index}': spec.expression() for index, spec in enumerate(specs)}
+        with use_replica():
+            grouped = model._default_manager.values(**columns).annotate(rows=Count('pk')).order_by()
+            return [
+                tuple(spec.summary_value(row[f'facet_{index}']) for index, spec in enumerate(specs)) + (row['rows'],)
+                for row in grouped
+            ]
+
+    timeout = getattr(settings, 'FACET_CACHE_SECONDS', 60)
+    if not timeout:
+        return build()
+    columns = [spec.lookup_kwarg for spec in specs]
+    cached = cache.get(_cache_key(model))
+    if cached is not None and cached[0] == columns:
+        return cached[1]
+    rows = build()
+    cache.set(_cache_key(model), (columns, rows), timeout)
+    return rows
+
+
+def facet_counts(changelist):
+    """
+    {lookup_kwarg: (values, counts)} for the changelist's facet filters.
+
+    ``values`` holds every value in the table; ``counts`` maps values to rows
+    matching the other selected facets, or is None when the changelist has
+    filters the summary cannot apply. Computed once per changelist.
+    """
+    cached = getattr(changelist, '_facet_counts', None)
+    if cached is not None:
+        return cached
+
+    specs = [spec for spec in changelist.filter_specs if isinstance(spec, FacetListFilter)]
+    rows = summary(changelist.model, specs)
+    facet_params = {spec.lookup_kwarg for spec in specs}
+    countable = not changelist.query and set(changelist.get_filters_params()) <= facet_params
+    selected = {index: spec.selected() for index, spec in enumerate(specs) if spec.selected() is not None}
+
+    values = [set() for _ in specs]
+    counts = [defaultdict(int) for _ in specs]
+    for row in rows:
+        for index in range(len(specs)):
+            values[index].add(row[index])
+        missed = [index for index, value in selected.items() if row[index] != value]
+        # Rows matching every selection count for all facets; rows missing one only for that facet
+        if len(missed) > 1:
+            continue
+        for index in missed or range(len(specs)):
+            counts[index][row[index]] += row[-1]
+
+    changelist._facet_counts = {
+        spec.lookup_kwarg: (values[index], dict(counts[index]) if countable else None)
+        for index, spec in enumerate(specs)
+    }
+    return changelist._facet_counts
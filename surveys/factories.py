@@ -0,0 +1,233 @@
+"""
+Synthetic survey data for benchmarks and load generation.
+
+The distributions are rough guesses at what real submissions look like;
+they only need to be plausible enough that analytics queries, indexes and
+pagination see realistic selectivity.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .defaults import DEFAULT_STUDENT_QUESTIONS, DEFAULT_TEACHER_QUESTIONS
+from .models import StudentSurvey, TeacherSurvey, SurveyQuestion
+
+SUBJECTS = list(DEFAULT_STUDENT_QUESTIONS.keys())
+
+# (value, weight) pairs over the model choice fields
+AGE_WEIGHTS = [('8-15', 15), ('15-24', 35), ('24-32', 25), ('32-40', 15), ('40+', 10)]
+TEACHER_AGE_WEIGHTS = [('15-24', 10), ('24-32', 35), ('32-40', 30), ('40+', 25)]
+GENDER_WEIGHTS = [('male', 55), ('female', 45)]
+EXPERIENCE_WEIGHTS = [('beginner', 45), ('intermediate', 35), ('advanced', 15), (None, 5)]
+SESSION_WEIGHTS = [(20, 10), (30, 40), (45, 30), (60, 20)]
+FREQUENCY_WEIGHTS = [('once_week', 40), ('twice_week', 40), ('more', 20)]
+TIME_WEIGHTS = [('mornings', 20), ('evenings', 40), ('weekends', 25), ('flexible', 15)]
+BACKGROUND_WEIGHTS = [('madrasa', 30), ('mosque', 30), ('private', 20), ('online', 10), ('mixed', 10)]
+
+PHRASES = [
+    'hard to find a qualified teacher nearby',
+    'schedules do not match my work hours',
+    'prices are too high for regular lessons',
+    'verified certificates and ratings from other students',
+    'recommendations from the community and the mosque',
+    'a trial lesson before paying',
+    'progress tracking and homework reminders',
+    'recorded sessions to review later',
+    'stable internet connection is a problem',
+    'need a female teacher for my daughter',
+    'payment through mobile money',
+    'lessons in Amharic and Arabic',
+]
+
+STUDENT_PHONE_OFFSET = 900000000
+TEACHER_PHONE_OFFSET = 700000000
+
+
+def _pick(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights=weights)[0]
+
+
+def _text(rng, sentences=2):
+    return '. '.join(rng.sample(PHRASES, sentences))
+
+
+def _dynamic_responses(rng, subjects, defaults):
+    responses = {}
+    for subject in subjects:
+        for question in defaults.get(subject, []):
+            options = question.get('options_en') or ['Yes', 'No']
+            responses[question['identifier']] = rng.choice(options)
+    return responses
+
+
+def _submitted_at(rng, now, days):
+    return now - timedelta(days=rng.random() * days, seconds=rng.randrange(86400))
+
+
+def build_student(rng, index, now=None, days=180):
+    """Return an unsaved StudentSurvey with plausible random answers"""
+    now = now or timezone.now()
+    subjects = rng.sample(SUBJECTS, rng.choices([1, 2, 3, 5], weights=[40, 35, 20, 5])[0])
+    return StudentSurvey(
+        full_name=f'Student {index}',
+        age_range=_pick(rng, AGE_WEIGHTS),
+        phone_number=f'+251{STUDENT_PHONE_OFFSET + index}',
+        gender=_pick(rng, GENDER_WEIGHTS),
+        quran_experience=_pick(rng, EXPERIENCE_WEIGHTS),
+        taken_online_lessons=rng.random() < 0.3,
+        online_lessons_reason=_text(rng, 1),
+        teacher_challenges=_text(rng),
+        time_preference=_pick(rng, TIME_WEIGHTS),
+        preferred_session_length=_pick(rng, SESSION_WEIGHTS),
+        preferred_frequency=_pick(rng, FREQUENCY_WEIGHTS),
+        fair_price_etb=Decimal(max(20, int(rng.lognormvariate(5.0, 0.5)))),
+        subjects_of_interest=subjects,
+        trust_factors=_text(rng),
+        willing_to_try=rng.random() < 0.8,
+        willing_to_try_reason=_text(rng, 1),
+        desired_features=_text(rng),
+        dynamic_responses=_dynamic_responses(rng, subjects, DEFAULT_STUDENT_QUESTIONS),
+        submitted_at=_submitted_at(rng, now, days),
+        ip_address=f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+    )
+
+
+def build_teacher(rng, index, now=None, days=180):
+    """Return an unsaved TeacherSurvey with plausible random answers"""
+    now = now or timezone.now()
+    topics = rng.sample(SUBJECTS, rng.choices([1, 2, 3, 5], weights=[25, 35, 30, 10])[0])
+    return TeacherSurvey(
+        full_name=f'Teacher {index}',
+        age_range=_pick(rng, TEACHER_AGE_WEIGHTS),
+        phone_number=f'+251{TEACHER_PHONE_OFFSET + index}',
+        gender=_pick(rng, GENDER_WEIGHTS),
+        teaching_background=_pick(rng, BACKGROUND_WEIGHTS),
+        teaching_background_details=_text(rng, 1),
+        tried_online_teaching=rng.random() < 0.35,
+        online_teaching_reason=_text(rng, 1),
+        teaching_challenges=_text(rng),
+        students_per_week=max(1, int(rng.gauss(8, 4))),
+        preferred_session_length=_pick(rng, SESSION_WEIGHTS),
+        fair_rate_etb=Decimal(max(30, int(rng.lognormvariate(5.1, 0.45)))),
+        confident_topics=topics,
+        would_join_platform=rng.random() < 0.75,
+        support_needed=_text(rng),
+        platform_concerns=_text(rng, 1),
+        feedback_preferences=_text(rng, 1),
+        wants_early_access=rng.random() < 0.4,
+        dynamic_responses=_dynamic_responses(rng, topics, DEFAULT_TEACHER_QUESTIONS),
+        submitted_at=_submitted_at(rng, now, days),
+        ip_address=f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+    )
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let bulk_create keep the generated submitted_at instead of now()"""
+    fields = [model._meta.get_field('submitted_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def seed_surveys(students=0, teachers=0, seed=0, batch_size=2000, days=180, start_index=0, progress=None):
+    """Bulk insert synthetic surveys; returns (students, teachers) created"""
+    rng = random.Random(seed)
+    now = timezone.now()
+    with manual_timestamps(StudentSurvey, TeacherSurvey):
+        for model, builder, total in (
+            (StudentSurvey, build_student, students),
+            (TeacherSurvey, build_teacher, teachers),
+        ):
+            created = 0
+            while created < total:
+                size = min(batch_size, total - created)
+                batch = [builder(rng, start_index + created + i, now, days) for i in range(size)]
+                model.objects.bulk_create(batch, batch_size=batch_size)
+                created += size
+                if progress:
+                    progress(model.__name__, created, total)
+    return students, teachers
+
+
+def seed_questions():
+    """Load the default question catalog for both survey types"""
+    SurveyQuestion.objects.all().delete()
+    questions = []
+    for survey_type, defaults in (('student', DEFAULT_STUDENT_QUESTIONS), ('teacher', DEFAULT_TEACHER_QUESTIONS)):
+        order = 0
+        for section, items in defaults.items():
+            for q_data in items:
+                questions.append(SurveyQuestion(
+                    survey_type=survey_type,
+                    section=section,
+                    identifier=q_data['identifier'],
+                    text_en=q_data['text_en'],
+                    text_ar=q_data['text_ar'],
+                    question_type=q_data.get('question_type', 'choice'),
+                    options_en=q_data.get('options_en', []),
+                    options_ar=q_data.get('options_ar', []),
+                    order=order,
+                ))
+                order += 1
+    SurveyQuestion.objects.bulk_create(questions)
+    return len(questions)
+
+
+def student_payload(rng, index):
+    """JSON body for POST /api/student-surveys/"""
+    survey = build_student(rng, index)
+    return {
+        'full_name': survey.full_name,
+        'age_range': survey.age_range,
+        'phone_number': survey.phone_number,
+        'gender': survey.gender,
+        'quran_experience': survey.quran_experience,
+        'taken_online_lessons': survey.taken_online_lessons,
+        'online_lessons_reason': survey.online_lessons_reason,
+        'teacher_challenges': survey.teacher_challenges,
+        'time_preference': survey.time_preference,
+        'preferred_session_length': survey.preferred_session_length,
+        'preferred_frequency': survey.preferred_frequency,
+        'fair_price_etb': str(survey.fair_price_etb),
+        'subjects_of_interest': survey.subjects_of_interest,
+        'trust_factors': survey.trust_factors,
+        'willing_to_try': survey.willing_to_try,
+        'willing_to_try_reason': survey.willing_to_try_reason,
+        'desired_features': survey.desired_features,
+        'dynamic_responses': survey.dynamic_responses,
+    }
+
+
+def teacher_payload(rng, index):
+    """JSON body for POST /api/teacher-surveys/"""
+    survey = build_teacher(rng, index)
+    return {
+        'full_name': survey.full_name,
+        'age_range': survey.age_range,
+        'phone_number': survey.phone_number,
+        'gender': survey.gender,
+        'teaching_background': survey.teaching_background,
+        'teaching_background_details': survey.teaching_background_details,
+        'tried_online_teaching': survey.tried_online_teaching,
+        'online_teaching_reason': survey.online_teaching_reason,
+        'teaching_challenges': survey.teaching_challenges,
+        'students_per_week': survey.students_per_week,
+        'preferred_session_length': survey.preferred_session_length,
+        'fair_rate_etb': str(survey.fair_rate_etb),
+        'confident_topics': survey.confident_topics,
+        'would_join_platform': survey.would_join_platform,
+        'support_needed': survey.support_needed,
+        'platform_concerns': survey.platform_concerns,
+        'feedback_preferences': survey.feedback_preferences,
+        'wants_early_access': survey.wants_early_access,
+        'dynamic_responses': survey.dynamic_responses,
+    }
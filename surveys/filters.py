@@ -0,0 +1,214 @@
+"""
+Declarative query-param filters shared by the analytics and user list views.
+
+Each Filter names a query param, how to parse and validate it, and which
+field and lookup it maps to on each survey model (student price and teacher
+rate are both ``min_price``/``max_price``). ``parse()`` turns request params
+into a FilterPlan once; the plan builds per-model Q objects, evaluates rows
+in Python for the sampled (approximate) path, and yields a canonical cache
+key, so equivalent requests share one cached result.
+
+    plan = filters.parse(request.query_params, filters.ANALYTICS_FILTERS)
+    students = StudentSurvey.objects.filter(plan.q('student'))
+"""
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from urllib.parse import urlencode
+
+from django.db.models import Q
+
+from .models import StudentSurvey, TeacherSurvey
+
+
+class FilterError(ValueError):
+    """A query param failed to parse or is not an allowed value"""
+
+
+def _decimal(value):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise FilterError('must be a number')
+    if not number.is_finite() or number < 0:
+        raise FilterError('must be a non-negative number')
+    return number
+
+
+def _int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise FilterError('must be an integer')
+
+
+def _choice_values(choices):
+    return [value for value, _ in choices]
+
+
+class Filter:
+    """One query param and the model fields it constrains"""
+
+    def __init__(self, name, fields, lookup='exact', parse=str, choices=None, value_map=None):
+        self.name = name
+        self.fields = fields
+        self.lookup = lookup
+        self.parse = parse
+        self.choices = choices
+        self.value_map = value_map
+        # Precompiled ORM lookups, e.g. {'student': 'fair_price_etb__gte'}
+        self.lookups = {
+            survey_type: field if lookup == 'exact' else f'{field}__{lookup}'
+            for survey_type, field in fields.items()
+        }
+
+    def clean(self, raw):
+        value = self.parse(raw.strip())
+        if self.choices is not None and value not in self.choices:
+            raise FilterError(f'must be one of: {", ".join(str(choice) for choice in self.choices)}')
+        return self.value_map[value] if self.value_map else value
+
+    def q(self, survey_type, value):
+        return Q(**{self.lookups[survey_type]: value})
+
+    def test(self, row_value, value):
+        if self.lookup == 'exact':
+            return row_value == value
+        if row_value is None:
+            return False
+        if self.lookup == 'gte':
+            return row_value >= value
+        if self.lookup == 'lte':
+            return row_value <= value
+        raise FilterError(f'{self.name} cannot be evaluated on sampled rows')
+
+
+class SearchFilter(Filter):
+    """Case-insensitive substring match over several text fields"""
+
+    def __init__(self, name, fields):
+        super().__init__(name, {survey_type: fields for survey_type in ('student', 'teacher')}, lookup='icontains')
+
+    def q(self, survey_type, value):
+        query = Q()
+        for field in self.fields[survey_type]:
+            query |= Q(**{f'{field}__icontains': value})
+        return query
+
+
+class ExcludeFlaggedFilter(Filter):
+    """``1``/``true`` keeps only rows whose field is null; ``0``/``false`` constrains nothing"""
+
+    def __init__(self, name, fields):
+        super().__init__(name, fields, choices=['0', '1', 'false', 'true'],
+                         value_map={'0': False, 'false': False, '1': True, 'true': True})
+
+    def clean(self, raw):
+        return super().clean(raw.lower())
+
+    def q(self, survey_type, value):
+        return Q(**{f'{self.fields[survey_type]}__isnull': True}) if value else Q()
+
+    def test(self, row_value, value):
+        return not value or row_value is None
+
+
+PRICE_FIELDS = {'student': 'fair_price_etb', 'teacher': 'fair_rate_etb'}
+INTEREST_FIELDS = {'student': 'willing_to_try', 'teacher': 'would_join_platform'}
+
+
+def _same(field):
+    return {'student': field, 'teacher': field}
+
+
+ANALYTICS_FILTERS = (
+    Filter('gender', _same('gender'), choices=_choice_values(StudentSurvey.GENDER_CHOICES)),
+    Filter('age_range', _same('age_range'),
+           choices=sorted(set(_choice_values(StudentSurvey.AGE_RANGE_CHOICES) + _choice_values(TeacherSurvey.AGE_RANGE_CHOICES)))),
+    Filter('min_price', PRICE_FIELDS, lookup='gte', parse=_decimal),
+    Filter('max_price', PRICE_FIELDS, lookup='lte', parse=_decimal),
+    Filter('frequency', {'student': 'preferred_frequency'}, choices=_choice_values(StudentSurvey.FREQUENCY_CHOICES)),
+    Filter('session_length', _same('preferred_session_length'), parse=_int,
+           choices=_choice_values(StudentSurvey.SESSION_LENGTH_CHOICES)),
+    Filter('platform_interest', INTEREST_FIELDS, choices=['willing', 'not_willing'],
+           value_map={'willing': True, 'not_willing': False}),
+    # Near-duplicate submissions flagged by surveys/minhash.py
+    ExcludeFlaggedFilter('exclude_duplicates', _same('duplicate_cluster')),
+)
+
+USER_LIST_FILTERS = ANALYTICS_FILTERS + (
+    SearchFilter('search', ['full_name', 'phone_number']),
+)
+
+
+class FilterPlan:
+    """Parsed, validated filter values plus everything derived from them"""
+
+    def __init__(self, spec, values, raw):
+        self.spec = spec
+        self.values = values
+        self.raw = raw
+
+    def active(self, survey_type):
+        for flt in self.spec:
+            if flt.name in self.values and survey_type in flt.fields:
+                yield flt, self.values[flt.name]
+
+    def q(self, survey_type):
+        query = Q()
+        for flt, value in self.active(survey_type):
+            query &= flt.q(survey_type, value)
+        return query
+
+    def matches(self, survey_type, get):
+        """Evaluate the plan on one in-memory row; ``get(field)`` returns the row's value for a model field"""
+        for flt, value in self.active(survey_type):
+            row_value = get(flt.fields[survey_type])
+            if isinstance(value, Decimal) and row_value is not None:
+                row_value = Decimal(str(row_value))
+            if not flt.test(row_value, value):
+                return False
+        return True
+
+    def cache_key(self, prefix):
+        """Same key for the same filters regardless of param order or formatting"""
+        parts = [(flt.name, _canonical(self.values[flt.name])) for flt in self.spec if flt.name in self.values]
+        return f'{prefix}:{urlencode(parts)}'
+
+    def applied(self):
+        """Raw values per param (None when absent), as echoed back to clients"""
+        return {flt.name: self.raw.get(flt.name) for flt in self.spec}
+
+
+def _canonical(value):
+    if isinstance(value, Decimal):
+        # 100, 100.0 and 1E+2 all become '100'
+        return format(value.normalize(), 'f')
+    return str(value)
+
+
+@lru_cache(maxsize=1024)
+def _compile(spec, items):
+    values = {}
+    raw = dict(items)
+    for flt in spec:
+        if flt.name not in raw:
+            continue
+        try:
+            values[flt.name] = flt.clean(raw[flt.name])
+        except FilterError as exc:
+            raise FilterError(f'{flt.name} {exc}')
+    return FilterPlan(spec, values, raw)
+
+
+def parse(query_params, spec=ANALYTICS_FILTERS):
+    """
+    Build the FilterPlan for ``query_params``; raises FilterError on bad input.
+
+    Blank params are ignored. Plans are memoized on the relevant params, so
+    repeated dashboard queries skip parsing entirely.
+    """
+    names = {flt.name for flt in spec}
+    items = tuple(sorted(
+        (name, query_params.get(name)) for name in names if (query_params.get(name) or '').strip()
+    ))
+    return _compile(spec, items)
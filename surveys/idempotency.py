@@ -0,0 +1,156 @@
+"""
+Idempotency-Key support for survey submissions.
+
+Mobile clients on flaky networks retry POSTs whose response they never saw.
+With an ``Idempotency-Key`` header (any client-chosen string of up to 255
+printable characters, typically a UUID per submission) the first response is
+kept in the default cache for IDEMPOTENCY_TTL_SECONDS: status, headers and
+the zlib-compressed body. Retries with the same key and body get it back
+byte for byte, marked with ``Idempotent-Replayed: true``, before throttling,
+validation or any query runs.
+
+While the first request is still running, retries get 409 with Retry-After;
+its claim expires after IDEMPOTENCY_LOCK_SECONDS in case the worker dies.
+Reusing a key with a different body is a client bug and gets 422. Server
+errors (5xx) and throttled responses (429) are not stored, so a retry runs
+again. Keys are scoped per endpoint. With the per-process LocMem cache only
+retries reaching the same worker are replayed; with REDIS_URL every worker
+sees every key. When the cache is unreachable requests go through
+unprotected rather than failing.
+"""
+import hashlib
+import logging
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .prerender import dumps
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+class Answer(Exception):
+    """Raised to answer a request from the idempotency store instead of running it"""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class Claim:
+    """An in-flight first request: where its response goes and what it must match"""
+
+    def __init__(self, key, fingerprint):
+        self.key = key
+        self.fingerprint = fingerprint
+
+
+def ttl():
+    return getattr(settings, 'IDEMPOTENCY_TTL_SECONDS', 86400)
+
+
+def lock_seconds():
+    return getattr(settings, 'IDEMPOTENCY_LOCK_SECONDS', 60)
+
+
+def _error(message, status):
+    return HttpResponse(dumps({'error': message}), status=status, content_type='application/json')
+
+
+def _replay(record):
+    _, status, headers, body = record
+    response = HttpResponse(zlib.decompress(body), status=status)
+    for name, value in headers:
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _fingerprint(request):
+    digest = hashlib.blake2b(request.content_type.encode(), digest_size=16)
+    digest.update(b'\0')
+    digest.update(request.body)
+    return digest.digest()
+
+
+def begin(request, scope):
+    """
+    Claim for the request's Idempotency-Key, or None when it has none.
+
+    Raises Answer with the stored response for a retry, 409 while the first
+    request is running, 422 for a reused key and 400 for a malformed one.
+    """
+    key = request.headers.get(HEADER)
+    if key is None:
+        return None
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable() or not key.isascii():
+        raise Answer(_error(f'{HEADER} must be 1 to {MAX_KEY_LENGTH} printable ASCII characters.', 400))
+
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    stored_key = f'idempotency:{scope}:{digest}'
+    fingerprint = _fingerprint(request)
+    try:
+        # The claim first: a response stored between the two calls is still seen below
+        claimed = cache.add(f'{stored_key}:lock', 1, lock_seconds())
+        record = cache.get(stored_key)
+        if record is not None and claimed:
+            cache.delete(f'{stored_key}:lock')
+    except Exception:
+        logger.warning("Idempotency cache unavailable, handling %s without it", request.path, exc_info=True)
+        return None
+
+    if record is not None:
+        if record[0] != fingerprint:
+            raise Answer(_error(f'{HEADER} was already used with a different request.', 422))
+        raise Answer(_replay(record))
+    if not claimed:
+        response = _error(f'A request with this {HEADER} is still being processed.', 409)
+        response['Retry-After'] = '1'
+        raise Answer(response)
+    return Claim(stored_key, fingerprint)
+
+
+def finish(claim, response):
+    """Store the first request's response (unless it should be retried) and release the claim"""
+    try:
+        if response is not None and response.status_code < 500 and response.status_code != 429:
+            if hasattr(response, 'render'):
+                response.render()
+            record = (claim.fingerprint, response.status_code, list(response.items()), zlib.compress(response.content))
+            cache.set(claim.key, record, ttl())
+        cache.delete(f'{claim.key}:lock')
+    except Exception:
+        logger.warning("Idempotency cache unavailable, response not stored", exc_info=True)
+
+
+class IdempotentCreateMixin:
+    """ViewSet mixin: honour Idempotency-Key on ``create``"""
+
+    idempotency = None
+
+    def initial(self, request, *args, **kwargs):
+        # Before throttling, so retries do not spend the client's tokens
+        if self.action == 'create':
+            self.idempotency = begin(request, self.basename)
+        super().initial(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Answer):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def dispatch(self, request, *args, **kwargs):
+        self.idempotency = None
+        response = None
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            return response
+        finally:
+            # Also runs for unhandled errors, so the claim never outlives the request
+            if self.idempotency is not None:
+                finish(self.idempotency, response)
@@ -0,0 +1,65 @@
+import os
+
+from django.http import FileResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework import status
+
+from . import jobs
+from .models import Job
+from .serializers import JobSerializer
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def job_list(request):
+    """
+    GET: recent jobs (query params: status, kind, limit)
+    POST: queue a job -- body: kind, params
+    """
+    if request.method == 'POST':
+        kind = request.data.get('kind')
+        params = request.data.get('params') or {}
+        if kind not in jobs.HANDLERS:
+            return Response({'error': f'kind must be one of: {", ".join(sorted(jobs.HANDLERS))}.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(params, dict):
+            return Response({'error': 'params must be an object.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            job = jobs.enqueue(kind, params, user=request.user)
+        except jobs.InvalidParams as exc:
+            return Response({'error': f'Invalid params for {kind}: {exc}.'}, status=status.HTTP_400_BAD_REQUEST)
+        except jobs.JobConflict:
+            return Response({'error': f'A {kind} job is already queued or running.'}, status=status.HTTP_409_CONFLICT)
+        return Response(JobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
+
+    queryset = Job.objects.all()
+    if request.query_params.get('status'):
+        queryset = queryset.filter(status=request.query_params['status'])
+    if request.query_params.get('kind'):
+        queryset = queryset.filter(kind=request.query_params['kind'])
+    try:
+        limit = min(int(request.query_params.get('limit', 50)), 200)
+    except ValueError:
+        return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(JobSerializer(queryset[:limit], many=True, context={'request': request}).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_detail(request, job_id):
+    """Status, progress and result of one job"""
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(JobSerializer(job, context={'request': request}).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_result(request, job_id):
+    """Download the file a finished job produced"""
+    job = Job.objects.filter(pk=job_id, status=Job.DONE).first()
+    if job is None or not job.result_path or not os.path.exists(job.result_path):
+        return Response({'error': 'No result file for this job.'}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(open(job.result_path, 'rb'), as_attachment=True, filename=os.path.basename(job.result_path))
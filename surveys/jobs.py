@@ -0,0 +1,228 @@
+"""
+Database-backed background jobs.
+
+Endpoints call ``enqueue()`` and return the job id straight away;
+``manage.py run_worker`` claims queued jobs and runs them in a process pool,
+so no broker is needed. Handlers are plain functions registered by kind:
+
+    @register('rebuild_timeseries', exclusive=True)
+    def rebuild_timeseries_job(job, survey_type=None):
+        ...
+
+They receive the Job and its params as keyword arguments, may call
+``report_progress()``, and return a JSON-serializable result. Handlers that
+write a file return {'path': ...}; the path is stored in Job.result_path.
+"""
+import csv
+import inspect
+import json
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import approx, assignment, datacache, minhash, pricestats, snapshot, textindex, timeseries
+from .models import Job, StudentSurvey, TeacherSurvey
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+class JobConflict(Exception):
+    """An exclusive job of the same kind is already queued or running"""
+
+
+class InvalidParams(Exception):
+    """Params the kind's handler does not accept"""
+
+
+def register(kind, exclusive=False):
+    def decorator(func):
+        HANDLERS[kind] = (func, exclusive)
+        return func
+    return decorator
+
+
+def check_params(kind, params):
+    """Raise InvalidParams unless the handler of ``kind`` can be called with ``params``"""
+    func, _ = HANDLERS[kind]
+    try:
+        inspect.signature(func).bind(None, **params)
+    except TypeError as exc:
+        raise InvalidParams(str(exc)) from None
+
+
+def enqueue(kind, params=None, user=None):
+    """
+    Queue a job and return it.
+
+    Exclusive kinds rely on a partial unique index over queued and running
+    jobs, so of two concurrent requests only one insert succeeds; the other
+    raises JobConflict.
+    """
+    if kind not in HANDLERS:
+        raise KeyError(kind)
+    params = params or {}
+    check_params(kind, params)
+    _, exclusive = HANDLERS[kind]
+    try:
+        if not connection.in_atomic_block:
+            return Job.objects.create(kind=kind, params=params, exclusive=exclusive, created_by=user)
+        # Savepoint: a conflict must not break the surrounding transaction
+        with transaction.atomic():
+            return Job.objects.create(kind=kind, params=params, exclusive=exclusive, created_by=user)
+    except IntegrityError:
+        if exclusive:
+            raise JobConflict(kind) from None
+        raise
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker=None):
+    """
+    Atomically move the oldest queued job to running and return it.
+
+    The conditional UPDATE only succeeds for one worker per job, which works
+    the same on SQLite and PostgreSQL without SELECT ... SKIP LOCKED.
+    """
+    for pk in Job.objects.filter(status=Job.QUEUED).order_by('created_at').values_list('pk', flat=True)[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=now, updated_at=now, worker=worker or worker_name(),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def report_progress(job, fraction, message=''):
+    job.progress = max(0.0, min(1.0, fraction))
+    job.message = message[:255]
+    Job.objects.filter(pk=job.pk).update(progress=job.progress, message=job.message, updated_at=timezone.now())
+
+
+def execute(job_id):
+    """Run one claimed job to completion; called inside a worker process"""
+    job = Job.objects.get(pk=job_id)
+    func, _ = HANDLERS[job.kind]
+    try:
+        result = func(job, **job.params)
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, error=f'{type(exc).__name__}: {exc}', finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        return Job.FAILED
+
+    result_path = result.pop('path', '') if isinstance(result, dict) else ''
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, progress=1.0, result=result, result_path=result_path, finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    return Job.DONE
+
+
+def _requeue(running, error, max_attempts):
+    failed = running.filter(attempts__gte=max_attempts).update(
+        status=Job.FAILED, error=error, finished_at=timezone.now(),
+    )
+    requeued = running.update(status=Job.QUEUED, worker='')
+    return requeued, failed
+
+
+def requeue_stale(max_age_seconds, max_attempts=3):
+    """Put running jobs whose worker stopped reporting back in the queue (or fail them)"""
+    cutoff = timezone.now() - timedelta(seconds=max_age_seconds)
+    stale = Job.objects.filter(status=Job.RUNNING, updated_at__lt=cutoff)
+    return _requeue(stale, 'Worker stopped responding', max_attempts)
+
+
+def requeue_lost(job_ids, max_attempts=3):
+    """Put jobs whose worker process died back in the queue (or fail them); finished ones are left alone"""
+    lost = Job.objects.filter(pk__in=job_ids, status=Job.RUNNING)
+    return _requeue(lost, 'Worker process died', max_attempts)
+
+
+def results_dir():
+    path = getattr(settings, 'JOB_RESULTS_DIR', os.path.join(settings.BASE_DIR, 'job_results'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@register('rebuild_timeseries', exclusive=True)
+def rebuild_timeseries_job(job, survey_type=None):
+    created = timeseries.rebuild([survey_type] if survey_type else None)
+    datacache.bump()
+    return {'buckets': created}
+
+
+@register('rebuild_sketches', exclusive=True)
+def rebuild_sketches_job(job, survey_type=None):
+    survey_types = [survey_type] if survey_type else None
+    approx.rebuild(survey_types)
+    report_progress(job, 0.5, 'Reservoirs and distinct counts rebuilt')
+    pricestats.rebuild(survey_types)
+    datacache.bump()
+    return {'survey_types': survey_types or ['student', 'teacher']}
+
+
+@register('rebuild_snapshot', exclusive=True)
+def rebuild_snapshot_job(job):
+    tables = snapshot.write()
+    return {survey_type: meta['rows'] for survey_type, meta in tables.items()}
+
+
+@register('rebuild_text_index', exclusive=True)
+def rebuild_text_index_job(job, survey_type=None):
+    written = textindex.rebuild([survey_type] if survey_type else None)
+    datacache.bump()
+    return {'postings': written}
+
+
+@register('rebuild_minhash', exclusive=True)
+def rebuild_minhash_job(job, survey_type=None):
+    flagged = minhash.rebuild([survey_type] if survey_type else None)
+    datacache.bump()
+    return {'duplicates': flagged}
+
+
+@register('assign_matches', exclusive=True)
+def assign_matches_job(job, incremental=False, gender_policy='same', tolerance=0.0):
+    return assignment.run(incremental=incremental, gender_policy=gender_policy, tolerance=tolerance)
+
+
+EXPORT_MODELS = {
+    'student': StudentSurvey,
+    'teacher': TeacherSurvey,
+}
+
+
+@register('export_surveys')
+def export_surveys_job(job, survey_type='student'):
+    model = EXPORT_MODELS[survey_type]
+    # Signatures are internal and not meaningful as CSV
+    fields = [field.name for field in model._meta.concrete_fields if field.get_internal_type() != 'BinaryField']
+    total = model.objects.count()
+    path = os.path.join(results_dir(), f'job-{job.pk}-{survey_type}-surveys.csv')
+
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(fields)
+        for row in model.objects.order_by('pk').values_list(*fields).iterator(chunk_size=5000):
+            writer.writerow([json.dumps(value) if isinstance(value, (list, dict)) else value for value in row])
+            written += 1
+            if written % 20000 == 0:
+                report_progress(job, written / max(total, 1), f'{written}/{total} rows')
+    return {'rows': written, 'path': path}
@@ -0,0 +1,121 @@
+"""
+Logging helpers wired up from settings.LOGGING.
+
+- JSONFormatter: one JSON object per line, including ``extra={...}`` fields
+- DebugSampleFilter: keeps only a fraction of DEBUG records
+- QueueListenerHandler: hands records to a background thread so formatting
+  and stream I/O happen off the request thread
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Render records as single-line JSON objects"""
+
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class DebugSampleFilter(logging.Filter):
+    """Let through every INFO+ record but only ``rate`` of DEBUG records"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+def _get_handler(name):
+    getter = getattr(logging, 'getHandlerByName', None)  # Python 3.12+
+    if getter is not None:
+        return getter(name)
+    return logging._handlers.get(name)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler that feeds the named ``targets`` handlers from a QueueListener thread.
+
+    Configure it with the ``'()'`` factory key: on Python 3.12+ dictConfig
+    special-cases ``'class'`` entries that subclass QueueHandler.
+    Target handlers are held strongly here; dictConfig keeps no reference to
+    handlers that no logger uses directly.
+
+    The listener is started lazily in the process that first logs, so it
+    survives gunicorn forking workers after the settings were loaded.
+    When the queue is full records are dropped rather than blocking requests.
+    """
+
+    def __init__(self, targets, queue_size=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.targets = []
+        for name in targets:
+            handler = _get_handler(name)
+            if handler is None:
+                # dictConfig builds handlers in sorted name order, so targets
+                # must sort before the queue handler itself
+                raise ValueError(f'Log handler {name!r} must be configured before the queue handler')
+            self.targets.append(handler)
+        self.respect_handler_level = respect_handler_level
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._listener = QueueListener(
+                self.queue, *self.targets, respect_handler_level=self.respect_handler_level
+            )
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self._listener.stop)
+
+    def prepare(self, record):
+        # Merge args now (they may be mutated after the call returns) but leave
+        # timestamps, JSON encoding and tracebacks to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
@@ -0,0 +1,66 @@
+"""
+Run the student-to-teacher assignment engine.
+
+    python manage.py assign_matches                   # replace all assignments
+    python manage.py assign_matches --incremental     # place new students only
+    python manage.py assign_matches --benchmark 100000  # in-memory timing, no database writes
+"""
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from surveys import assignment
+from surveys.factories import build_student, build_teacher
+from surveys.matching import normalize_subjects
+
+
+class Command(BaseCommand):
+    help = 'Assign students to teachers respecting capacity, topic, session length, gender and price'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only assign students without an assignment, using remaining capacity')
+        parser.add_argument('--gender', choices=assignment.GENDER_POLICIES, default='same',
+                            help='Require the same gender (default) or allow any')
+        parser.add_argument('--tolerance', type=float, default=0.0,
+                            help='Accept teacher rates up to price * (1 + tolerance)')
+        parser.add_argument('--benchmark', type=int, metavar='STUDENTS',
+                            help='Time the engine on synthetic in-memory rows (one teacher per ten students)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options)
+        summary = assignment.run(
+            incremental=options['incremental'], gender_policy=options['gender'], tolerance=options['tolerance'],
+        )
+        self.stdout.write(json.dumps(summary, indent=2))
+
+    def benchmark(self, options):
+        rng = random.Random(options['seed'])
+        count = options['benchmark']
+        self.stdout.write(f'Building {count} students and {max(1, count // 10)} teachers...')
+        students = []
+        for index in range(count):
+            survey = build_student(rng, index)
+            students.append((
+                index, float(survey.fair_price_etb), survey.preferred_session_length,
+                survey.gender, normalize_subjects(survey.subjects_of_interest),
+            ))
+        teachers = []
+        for index in range(max(1, count // 10)):
+            survey = build_teacher(rng, index)
+            teachers.append((
+                index, float(survey.fair_rate_etb), survey.preferred_session_length,
+                survey.gender, normalize_subjects(survey.confident_topics), survey.students_per_week,
+            ))
+
+        started = time.perf_counter()
+        matches = assignment.assign(students, teachers, options['gender'], options['tolerance'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned {len(matches)}/{count} students to {len(teachers)} teachers in {elapsed:.2f}s '
+            f'({count / elapsed:,.0f} students/s)'
+        ))
@@ -0,0 +1,123 @@
+"""
+Compare response bytes and time-to-last-byte with and without compression.
+
+Seeds a throwaway test database, requests the large analytics and list
+payloads once per Accept-Encoding and reports body size, server time and
+the estimated time-to-last-byte over a slow link (server time + one round
+trip + body size / bandwidth):
+
+    python manage.py benchmark_compression --students 20000 --bandwidth-kbps 1600 --rtt-ms 150
+
+Server time for pre-rendered endpoints is measured on cache hits, i.e. with
+the variants compressed once per data version.
+"""
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.utils import setup_databases, teardown_databases, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from surveys import approx, compression, datacache, pricestats, timeseries
+from surveys.factories import seed_surveys, seed_questions
+
+PATHS = [
+    '/api/analytics/students/',
+    '/api/analytics/teachers/',
+    '/api/analytics/filtered/?gender=female',
+    '/api/analytics/matching/',
+    '/api/users/list/?user_type=all&page_size=1000',
+    '/api/student-surveys/',
+    '/api/questions/',
+]
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+class Command(BaseCommand):
+    help = 'Report bytes and estimated time-to-last-byte per Accept-Encoding for large JSON payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--teacher-ratio', type=float, default=0.1)
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per path and encoding')
+        parser.add_argument('--bandwidth-kbps', type=float, default=1600,
+                            help='Simulated downlink in kbit/s (default 1600, a fast 3G connection)')
+        parser.add_argument('--rtt-ms', type=float, default=150, help='Simulated round trip time')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(SURVEY_THROTTLE_RATES={}):
+                report = self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def run(self, options):
+        admin = User.objects.create_superuser('bench-admin', 'bench@example.com', 'bench-password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+
+        self.stdout.write(f"Seeding {options['students']} students...")
+        seed_surveys(
+            students=options['students'], teachers=max(1, int(options['students'] * options['teacher_ratio'])),
+            seed=options['seed'],
+        )
+        seed_questions()
+        timeseries.rebuild()
+        approx.rebuild()
+        pricestats.rebuild()
+        datacache.bump()
+
+        bytes_per_ms = options['bandwidth_kbps'] * 1000 / 8 / 1000
+        report = {
+            'students': options['students'],
+            'bandwidth_kbps': options['bandwidth_kbps'],
+            'rtt_ms': options['rtt_ms'],
+            'min_bytes': compression.min_bytes(),
+            'paths': {},
+        }
+        for path in PATHS:
+            results = {}
+            for encoding in ('identity',) + compression.encodings():
+                durations = []
+                for _ in range(options['repeat'] + 1):
+                    start = time.perf_counter()
+                    response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                    durations.append((time.perf_counter() - start) * 1000)
+                # The first request warms the pre-rendered cache
+                server_ms = median(durations[1:])
+                size = len(response.content)
+                results[encoding] = {
+                    'status': response.status_code,
+                    'content_encoding': response.get('Content-Encoding', 'identity'),
+                    'bytes': size,
+                    'server_ms': round(server_ms, 2),
+                    'ttlb_ms': round(server_ms + options['rtt_ms'] + size / bytes_per_ms, 1),
+                }
+            report['paths'][path] = results
+
+            identity = results['identity']
+            self.stdout.write(path)
+            for encoding, result in results.items():
+                ratio = result['bytes'] / identity['bytes'] if identity['bytes'] else 1
+                self.stdout.write(
+                    f"  {encoding:<9} {result['content_encoding']:<9} {result['bytes']:>10,} B ({ratio:6.1%}) "
+                    f"server={result['server_ms']:.1f}ms ttlb={result['ttlb_ms']:.0f}ms"
+                )
+        return report
@@ -0,0 +1,293 @@
+"""
+Query-count and latency regression harness for every route in surveys/urls.py.
+
+Runs against a throwaway test database, seeds synthetic data at each scale,
+hits every endpoint through the Django test client and writes a JSON report
+(sorted keys, stable layout) that can be diffed between commits:
+
+    python manage.py benchmark_endpoints --scales 1000,10000 --output bench.json
+
+Exits with an error when an endpoint exceeds its query budget or a route in
+surveys/urls.py has no benchmark case.
+"""
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from contextlib import ExitStack
+from urllib.parse import quote
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases, setup_test_environment, teardown_test_environment
+from django.urls import get_resolver, URLPattern, URLResolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from surveys.factories import seed_surveys, seed_questions, student_payload, teacher_payload
+from surveys.metrics import percentile
+from surveys.models import Job, StudentSurvey, TeacherSurvey, SurveyQuestion
+from surveys import approx, datacache, jobs, minhash, pricestats, snapshot, textindex, timeseries
+
+# Maximum number of queries per request, independent of table size.
+# Lower these when an endpoint gets cheaper; never raise them to make a run pass.
+QUERY_BUDGETS = {
+    'api-root': 0,
+    'student-survey-list': 2,
+    'student-survey-create': 13,
+    'student-survey-create-replay': 0,
+    'student-survey-detail': 1,
+    'student-survey-check-phone': 1,
+    'teacher-survey-list': 2,
+    'teacher-survey-create': 13,
+    'teacher-survey-detail': 1,
+    'teacher-survey-check-phone': 1,
+    'survey-questions-list': 2,
+    'survey-questions-detail': 1,
+    'survey-questions-reset': 17,
+    'student-analytics': 13,
+    'teacher-analytics': 12,
+    'analytics-summary': 4,
+    'filtered-analytics': 2,
+    'filtered-analytics-approx': 5,
+    'user-list': 2,
+    'submission-timeseries': 1,
+    'price-statistics': 1,
+    'text-keywords': 1,
+    'text-search': 3,
+    'matching-report': 2,
+    'matching-assign': 1,
+    'job-list': 1,
+    'job-create': 1,
+    'job-detail': 1,
+    'job-result': 1,
+    'request-metrics': 0,
+    'readiness': 0,
+}
+
+
+class Case:
+    def __init__(self, name, method, path, route=None, auth=False, payload=None, budget_key=None, headers=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.route = route or name
+        self.auth = auth
+        self.payload = payload
+        self.budget_key = budget_key or name
+        self.headers = headers
+
+
+def build_cases(rng):
+    student = StudentSurvey.objects.order_by('id').first()
+    teacher = TeacherSurvey.objects.order_by('id').first()
+    question = SurveyQuestion.objects.order_by('id').first()
+    job = jobs.enqueue('rebuild_timeseries')
+    counter = iter(range(10 ** 7))
+    # Submitted once here, so every measured request is a retry answered from the idempotency store
+    retried = student_payload(rng, 50_000_000 + next(counter))
+    retry_headers = {'Idempotency-Key': f"benchmark-{retried['phone_number']}"}
+    APIClient().post('/api/student-surveys/', retried, format='json', headers=retry_headers)
+
+    return [
+        Case('api-root', 'get', '/api/'),
+        Case('student-survey-list', 'get', '/api/student-surveys/'),
+        Case('student-survey-create', 'post', '/api/student-surveys/', route='student-survey-list',
+             payload=lambda: student_payload(rng, 50_000_000 + next(counter))),
+        Case('student-survey-create-replay', 'post', '/api/student-surveys/', route='student-survey-list',
+             payload=lambda: retried, headers=retry_headers),
+        Case('student-survey-detail', 'get', f'/api/student-surveys/{student.pk}/'),
+        Case('student-survey-check-phone', 'get', f'/api/student-surveys/check-phone/?phone={quote(student.phone_number)}'),
+        Case('teacher-survey-list', 'get', '/api/teacher-surveys/'),
+        Case('teacher-survey-create', 'post', '/api/teacher-surveys/', route='teacher-survey-list',
+             payload=lambda: teacher_payload(rng, 50_000_000 + next(counter))),
+        Case('teacher-survey-detail', 'get', f'/api/teacher-surveys/{teacher.pk}/'),
+        Case('teacher-survey-check-phone', 'get', f'/api/teacher-surveys/check-phone/?phone={quote(teacher.phone_number)}'),
+        Case('survey-questions-list', 'get', '/api/questions/'),
+        Case('survey-questions-detail', 'get', f'/api/questions/{question.pk}/'),
+        Case('survey-questions-reset', 'post', '/api/questions/reset/', payload=lambda: {'survey_type': 'student'}),
+        Case('student-analytics', 'get', '/api/analytics/students/', auth=True),
+        Case('teacher-analytics', 'get', '/api/analytics/teachers/', auth=True),
+        Case('analytics-summary', 'get', '/api/analytics/summary/', auth=True),
+        Case('filtered-analytics', 'get', '/api/analytics/filtered/?gender=female&min_price=100', auth=True),
+        Case('filtered-analytics-approx', 'get', '/api/analytics/filtered/?gender=female&min_price=100&approx=1',
+             route='filtered-analytics', auth=True),
+        Case('submission-timeseries', 'get', '/api/analytics/timeseries/?dimension=gender&granularity=week&window=4', auth=True),
+        Case('price-statistics', 'get', '/api/analytics/prices/?dimension=gender', auth=True),
+        Case('text-keywords', 'get', '/api/analytics/keywords/?survey_type=all', auth=True),
+        Case('text-search', 'get', '/api/analytics/search/?q=teacher+internet', auth=True),
+        Case('matching-report', 'get', '/api/analytics/matching/?subject=Tajweed', auth=True),
+        Case('matching-assign', 'post', '/api/analytics/matching/assign/', auth=True,
+             payload=lambda: {'incremental': True}),
+        Case('job-list', 'get', '/api/jobs/?status=queued', auth=True),
+        Case('job-create', 'post', '/api/jobs/', route='job-list', auth=True,
+             payload=lambda: {'kind': 'export_surveys', 'params': {'survey_type': 'teacher'}}),
+        Case('job-detail', 'get', f'/api/jobs/{job.pk}/', auth=True),
+        Case('job-result', 'get', f'/api/jobs/{job.pk}/result/', auth=True),
+        Case('user-list', 'get', '/api/users/list/?user_type=all&page=2&page_size=50', auth=True),
+        Case('request-metrics', 'get', '/api/metrics/', auth=True),
+        Case('readiness', 'get', '/api/health/ready/'),
+    ]
+
+
+def surveys_route_names():
+    """Names of all routes defined under the /api/ prefix by surveys.urls"""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.add(pattern.name)
+
+    walk(get_resolver('surveys.urls').url_patterns)
+    return names
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Assert query budgets and record p50/p95 latency for every API route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000',
+                            help='Comma separated student row counts to seed (e.g. 1000,10000,100000)')
+        parser.add_argument('--teacher-ratio', type=float, default=0.1,
+                            help='Teachers seeded per student (default 0.1)')
+        parser.add_argument('--repeat', type=int, default=10, help='Requests per endpoint per scale')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--no-fail', action='store_true', help='Report budget violations without failing')
+
+    def handle(self, *args, **options):
+        scales = [int(value) for value in options['scales'].split(',') if value]
+        rng = random.Random(options['seed'])
+
+        with tempfile.TemporaryDirectory(prefix='bench-') as directory:
+            database = connections['default']
+            if database.vendor == 'sqlite':
+                # A file, not the in-memory test default, so submissions take the
+                # production path: WAL and one locked transaction (surveys/sqlite.py)
+                database.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench.sqlite3')
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                # Repeated requests from one client would otherwise hit the rate limits,
+                # a cached matching report would hide its real cost, and the per-process
+                # cache stands in for the shared one production validates JWTs against
+                with override_settings(
+                    SURVEY_THROTTLE_RATES={}, MATCHING_REPORT_CACHE_SECONDS=0, JWT_CACHE_SINGLE_PROCESS=True,
+                    SNAPSHOT_PATH=os.path.join(directory, 'analytics.snapshot'),
+                ):
+                    report = self.run(scales, options, rng)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stdout.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        problems = report['violations'] + [f'no benchmark case for route {name}' for name in report['uncovered_routes']]
+        if problems and not options['no_fail']:
+            raise CommandError('\n'.join(problems))
+
+    def run(self, scales, options, rng):
+        admin = User.objects.create_superuser('bench-admin', 'bench@example.com', 'bench-password')
+        token = str(RefreshToken.for_user(admin).access_token)
+        # Dashboards send one token with every request; validate it once, as their first request would
+        primer = APIClient()
+        primer.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        primer.get('/api/metrics/')
+
+        report = {
+            'revision': git_revision(),
+            'generated_at': timezone.now().isoformat(),
+            'repeat': options['repeat'],
+            'scales': {},
+            'violations': [],
+        }
+        covered = set()
+
+        for scale in scales:
+            StudentSurvey.objects.all().delete()
+            TeacherSurvey.objects.all().delete()
+            # Exclusive jobs queued by the previous scale would conflict with this one's
+            Job.objects.all().delete()
+            self.stdout.write(f'Seeding {scale} students...')
+            seed_surveys(students=scale, teachers=max(1, int(scale * options['teacher_ratio'])), seed=options['seed'])
+            seed_questions()
+            timeseries.rebuild()
+            approx.rebuild()
+            pricestats.rebuild()
+            textindex.rebuild()
+            minhash.rebuild()
+            snapshot.write()
+            datacache.bump()
+
+            results = {}
+            for case in build_cases(rng):
+                covered.add(case.route)
+                result = self.measure(case, token, options['repeat'])
+                budget = QUERY_BUDGETS.get(case.budget_key)
+                result['budget'] = budget
+                if budget is not None and result['queries'] > budget:
+                    report['violations'].append(
+                        f"{case.name} @ {scale}: {result['queries']} queries > budget {budget}"
+                    )
+                if result['status'] >= 500:
+                    report['violations'].append(f"{case.name} @ {scale}: HTTP {result['status']}")
+                results[case.name] = result
+                self.stdout.write(
+                    f"  {case.name:<32} {result['status']} queries={result['queries']:<3} "
+                    f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms"
+                )
+            report['scales'][str(scale)] = results
+
+        report['uncovered_routes'] = sorted(surveys_route_names() - covered)
+        return report
+
+    def measure(self, case, token, repeat):
+        client = APIClient()
+        if case.auth:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        durations = []
+        queries = 0
+        status_code = None
+        for _ in range(repeat):
+            kwargs = {'format': 'json', 'headers': case.headers}
+            if case.payload:
+                kwargs['data'] = case.payload()
+            # Count every alias, so reads routed to a replica stay within budget too
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+                start = time.perf_counter()
+                response = getattr(client, case.method)(case.path, **kwargs)
+                durations.append((time.perf_counter() - start) * 1000)
+            queries = max(queries, sum(len(capture) for capture in captured))
+            status_code = response.status_code
+
+        return {
+            'status': status_code,
+            'queries': queries,
+            'p50_ms': round(percentile(durations, 0.50), 2),
+            'p95_ms': round(percentile(durations, 0.95), 2),
+        }
@@ -0,0 +1,134 @@
+"""
+Concurrent submission throughput on SQLite, stock profile vs tuned profile.
+
+For each SQLite profile (see surveys/sqlite.py) a fresh database file is
+migrated, then ``--workers`` spawned processes, standing in for gunicorn
+workers, each post ``--submissions`` student surveys through the full
+Django stack at the same time:
+
+    python manage.py benchmark_sqlite_writes --workers 8 --submissions 200
+
+Reports throughput, latency percentiles and how many requests failed with
+"database is locked".
+"""
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand
+
+from surveys.metrics import percentile
+
+PROFILES = ('default', 'concurrent')
+
+
+def init_process(env):
+    # Settings are read at import time, so the profile has to be in the environment first
+    os.environ.update(env)
+    import django
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+
+def migrate():
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def submit(worker_index, count, seed):
+    from django.db import connections
+    from django.test import Client, override_settings
+    from surveys.factories import student_payload
+
+    rng = random.Random(seed + worker_index)
+    client = Client()
+    latencies = []
+    ok = locked = failed = 0
+    with override_settings(SURVEY_THROTTLE_RATES={}):
+        for offset in range(count):
+            payload = student_payload(rng, 60_000_000 + worker_index * 1_000_000 + offset)
+            start = time.perf_counter()
+            try:
+                response = client.post(
+                    '/api/student-surveys/', json.dumps(payload), content_type='application/json', secure=True,
+                )
+            except Exception as exc:
+                if 'locked' in str(exc):
+                    locked += 1
+                else:
+                    failed += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code == 201:
+                ok += 1
+            else:
+                failed += 1
+    connections.close_all()
+    return ok, locked, failed, latencies
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent survey submission throughput on SQLite before/after the concurrency profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent submitting processes')
+        parser.add_argument('--submissions', type=int, default=100, help='Submissions per worker')
+        parser.add_argument('--directory', help='Where to create the database files (default: system temp dir); '
+                                                 'use the production disk, tmpfs hides fsync costs')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        report = {'workers': options['workers'], 'submissions_per_worker': options['submissions'], 'profiles': {}}
+        for profile in PROFILES:
+            report['profiles'][profile] = result = self.run(profile, options)
+            self.stdout.write(
+                f"{profile:<11} {result['ok']:>6} ok  {result['locked']:>5} locked  {result['failed']:>4} failed  "
+                f"{result['throughput']:8.1f} submissions/s  p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Report written to {options['output']}")
+
+    def run(self, profile, options):
+        directory = tempfile.mkdtemp(prefix='sqlite-bench-', dir=options['directory'])
+        env = {
+            'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'bench.sqlite3')}",
+            'SQLITE_PROFILE': profile,
+            'ALLOWED_HOSTS': 'testserver',
+            'REPLICA_DATABASE_URL': '',
+        }
+        context = get_context('spawn')
+        try:
+            with context.Pool(1, initializer=init_process, initargs=(env,)) as pool:
+                pool.apply(migrate)
+
+            workers = options['workers']
+            with context.Pool(workers, initializer=init_process, initargs=(env,)) as pool:
+                # Let every worker finish django.setup() before the clock starts
+                pool.map(time.sleep, [0.2] * workers)
+                started = time.perf_counter()
+                results = pool.starmap(
+                    submit, [(index, options['submissions'], options['seed']) for index in range(workers)],
+                )
+                elapsed = time.perf_counter() - started
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        latencies = [latency for *_, worker_latencies in results for latency in worker_latencies]
+        ok = sum(result[0] for result in results)
+        return {
+            'ok': ok,
+            'locked': sum(result[1] for result in results),
+            'failed': sum(result[2] for result in results),
+            'seconds': round(elapsed, 2),
+            'throughput': round(ok / elapsed, 1) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50), 1),
+            'p95_ms': round(percentile(latencies, 0.95), 1),
+        }
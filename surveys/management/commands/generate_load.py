@@ -0,0 +1,224 @@
+"""
+Seed realistic survey rows and/or drive HTTP load against a running server.
+
+    # bulk-seed two million students and 200k teachers
+    python manage.py generate_load --students 2000000 --teachers 200000
+
+    # 20k requests from 8 processes against a local server
+    python manage.py generate_load --drive --url http://127.0.0.1:8000 \\
+        --requests 20000 --workers 8 --mix submit:2,check_phone:5,analytics:2,user_list:1 \\
+        --username admin --password secret
+"""
+import json
+import random
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+from urllib import request as urlrequest
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys.factories import (
+    seed_surveys, student_payload, teacher_payload, STUDENT_PHONE_OFFSET, TEACHER_PHONE_OFFSET,
+)
+from surveys.metrics import percentile
+from surveys.models import StudentSurvey, TeacherSurvey
+
+DEFAULT_MIX = 'submit:2,check_phone:5,analytics:2,user_list:1'
+AUTHENTICATED_KINDS = {'analytics', 'user_list'}
+ANALYTICS_PATHS = [
+    '/api/analytics/students/',
+    '/api/analytics/teachers/',
+    '/api/analytics/summary/',
+    '/api/analytics/filtered/?gender=female',
+    '/api/analytics/filtered/?age_range=15-24&min_price=100',
+    '/api/analytics/timeseries/?dimension=gender&granularity=week',
+    '/api/analytics/filtered/?gender=female&approx=1',
+    '/api/analytics/prices/?dimension=age_range',
+    '/api/analytics/matching/',
+]
+
+# Set once per worker process by _init_worker
+_worker = {}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition(':')
+        kind = kind.strip()
+        if kind not in ('submit', 'check_phone', 'analytics', 'user_list'):
+            raise CommandError(f'Unknown request kind in --mix: {kind}')
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def _init_worker(base_url, token, known_students, known_teachers, run_base):
+    _worker.update(
+        base_url=base_url.rstrip('/'),
+        token=token,
+        known_students=known_students,
+        known_teachers=known_teachers,
+        run_base=run_base,
+        rng=random.Random(),
+    )
+
+
+def _build_request(kind, number):
+    rng = _worker['rng']
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    data = None
+
+    if kind == 'submit':
+        index = _worker['run_base'] + number
+        if rng.random() < 0.8:
+            path, body = '/api/student-surveys/', student_payload(rng, index)
+        else:
+            path, body = '/api/teacher-surveys/', teacher_payload(rng, index)
+        data = json.dumps(body).encode()
+    elif kind == 'check_phone':
+        # Roughly half of the lookups hit an existing phone number
+        if rng.random() < 0.5:
+            prefix, offset, known = 'student-surveys', STUDENT_PHONE_OFFSET, _worker['known_students']
+        else:
+            prefix, offset, known = 'teacher-surveys', TEACHER_PHONE_OFFSET, _worker['known_teachers']
+        index = rng.randrange(max(1, known * 2))
+        path = f"/api/{prefix}/check-phone/?phone={quote(f'+251{offset + index}')}"
+    elif kind == 'analytics':
+        path = rng.choice(ANALYTICS_PATHS)
+    else:
+        user_type = rng.choice(['all', 'student', 'teacher'])
+        path = f'/api/users/list/?user_type={user_type}&page={rng.randint(1, 5)}&page_size=50'
+
+    if kind in AUTHENTICATED_KINDS and _worker['token']:
+        headers['Authorization'] = f"Bearer {_worker['token']}"
+    return urlrequest.Request(_worker['base_url'] + path, data=data, headers=headers)
+
+
+def _run_one(task):
+    kind, number = task
+    req = _build_request(kind, number)
+    start = time.perf_counter()
+    try:
+        with urlrequest.urlopen(req, timeout=60) as response:
+            response.read()
+            status = response.status
+    except HTTPError as exc:
+        exc.read()
+        status = exc.code
+    except (URLError, OSError):
+        status = 0
+    return kind, status, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = 'Bulk-seed synthetic surveys and/or drive a request mix against a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=0, help='Student rows to bulk insert')
+        parser.add_argument('--teachers', type=int, default=0, help='Teacher rows to bulk insert')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=180, help='Spread submitted_at over this many days')
+        parser.add_argument('--seed', type=int, default=0)
+
+        parser.add_argument('--drive', action='store_true', help='Send HTTP traffic after seeding')
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=4, help='Client processes')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted request kinds (default {DEFAULT_MIX})')
+        parser.add_argument('--token', help='JWT access token for analytics and user list requests')
+        parser.add_argument('--username', help='Obtain a JWT from /api/token/ with these credentials')
+        parser.add_argument('--password')
+
+    def handle(self, *args, **options):
+        if options['students'] or options['teachers']:
+            self.seed(options)
+        if options['drive']:
+            self.drive(options)
+        elif not (options['students'] or options['teachers']):
+            raise CommandError('Nothing to do: pass --students/--teachers and/or --drive')
+
+    def seed(self, options):
+        start_index = max(StudentSurvey.objects.count(), TeacherSurvey.objects.count())
+        started = time.perf_counter()
+
+        def progress(model_name, done, total):
+            if done == total or done % (options['batch_size'] * 20) == 0:
+                rate = done / max(time.perf_counter() - started, 1e-9)
+                self.stdout.write(f'  {model_name}: {done}/{total} ({rate:,.0f} rows/s)')
+
+        seed_surveys(
+            students=options['students'],
+            teachers=options['teachers'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+            start_index=start_index,
+            progress=progress,
+        )
+        # bulk_create bypasses the pre_save and post_save hooks; flags first, the sketch samples carry them
+        call_command('rebuild_minhash', stdout=self.stdout)
+        call_command('rebuild_timeseries', stdout=self.stdout)
+        call_command('rebuild_sketches', stdout=self.stdout)
+        call_command('rebuild_text_index', stdout=self.stdout)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['students']} students and {options['teachers']} teachers in {elapsed:.1f}s"
+        ))
+
+    def obtain_token(self, options):
+        if options['token']:
+            return options['token']
+        if not options['username']:
+            return None
+        body = json.dumps({'username': options['username'], 'password': options['password']}).encode()
+        req = urlrequest.Request(
+            options['url'].rstrip('/') + '/api/token/', data=body, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urlrequest.urlopen(req, timeout=30) as response:
+                return json.loads(response.read())['access']
+        except (HTTPError, URLError) as exc:
+            raise CommandError(f'Could not obtain a JWT: {exc}')
+
+    def drive(self, options):
+        mix = parse_mix(options['mix'])
+        token = self.obtain_token(options)
+        if not token and AUTHENTICATED_KINDS & set(mix):
+            self.stderr.write('No credentials given: analytics and user list requests will return 401')
+
+        rng = random.Random(options['seed'])
+        kinds, weights = zip(*mix.items())
+        tasks = [(kind, number) for number, kind in enumerate(rng.choices(kinds, weights=weights, k=options['requests']))]
+
+        # Fresh phone range per run so submissions don't collide with earlier runs
+        run_base = 10_000_000 + (int(time.time()) % 800) * 100_000
+        initargs = (
+            options['url'], token, StudentSurvey.objects.count(), TeacherSurvey.objects.count(), run_base,
+        )
+
+        latencies = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        started = time.perf_counter()
+        with Pool(options['workers'], initializer=_init_worker, initargs=initargs) as pool:
+            for kind, status, seconds in pool.imap_unordered(_run_one, tasks, chunksize=16):
+                latencies[kind].append(seconds * 1000)
+                statuses[kind][status] += 1
+        elapsed = time.perf_counter() - started
+
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(f'{total} requests in {elapsed:.1f}s = {total / elapsed:,.1f} req/s '
+                          f"with {options['workers']} workers")
+        self.stdout.write(f"{'kind':<12} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+        for kind in kinds:
+            values = latencies.get(kind)
+            if not values:
+                continue
+            codes = ', '.join(f'{code}x{count}' for code, count in sorted(statuses[kind].items()))
+            self.stdout.write(
+                f'{kind:<12} {len(values):>7} {percentile(values, 0.50):>9.1f} '
+                f'{percentile(values, 0.95):>9.1f} {percentile(values, 0.99):>9.1f}  {codes}'
+            )
@@ -0,0 +1,174 @@
+"""
+Measure cold start: per-module import cost and time to first request.
+
+Each run starts a fresh interpreter that imports the WSGI or ASGI entry
+point and serves one request in-process, the way a scaled-to-zero instance
+does on its first hit:
+
+    python manage.py profile_startup --entry wsgi,asgi --runs 5 --target-ms 1200
+
+Time to first request is measured from process launch (interpreter start
+included) to the end of the first response; the time until the background
+warm-up (surveys/warmup.py) reports ready is listed next to it. One extra
+run per entry point uses ``python -X importtime`` to attribute import time
+to packages and modules. Fails when the median time to first request exceeds --target-ms.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROJECT_PACKAGES = ('my_survey', 'surveys')
+
+# Runs in the child interpreter; prints one STARTUP line with its timings
+CHILD = r'''
+import json, os, sys, time
+entry, path = sys.argv[1], sys.argv[2]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'my_survey.settings')
+started = time.perf_counter()
+if entry == 'wsgi':
+    from wsgiref.util import setup_testing_defaults
+    from my_survey.wsgi import application
+    loaded = time.perf_counter()
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'https', 'HTTPS': 'on'}
+    setup_testing_defaults(environ)
+    statuses = []
+    b''.join(application(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    status = int(statuses[0].split()[0])
+else:
+    import asyncio
+    from my_survey.asgi import application
+    loaded = time.perf_counter()
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'https',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 0), 'server': ('localhost', 443),
+    }
+    asyncio.run(application(scope, receive, send))
+    status = messages[0]['status']
+finished = time.perf_counter()
+finished_at = time.time()
+from surveys import warmup
+while not warmup.state.snapshot()['ready']:
+    time.sleep(0.005)
+print('STARTUP ' + json.dumps({
+    'status': status,
+    'finished_at': finished_at,
+    'ready_at': time.time(),
+    'load_ms': (loaded - started) * 1000,
+    'request_ms': (finished - loaded) * 1000,
+}), flush=True)
+'''
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us) for every ``-X importtime`` line"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report per-module import cost and time to first request for the WSGI/ASGI entry points'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entry', default='wsgi,asgi', help='Comma separated entry points: wsgi, asgi')
+        parser.add_argument('--path', default='/api/', help='Path of the first request')
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts per entry point')
+        parser.add_argument('--top', type=int, default=20, help='Modules to list by cumulative import time')
+        parser.add_argument('--target-ms', type=float, default=getattr(settings, 'STARTUP_TARGET_MS', 0),
+                            help='Fail when the median time to first request is above this (0 disables)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        report = {'path': options['path'], 'target_ms': options['target_ms'], 'entries': {}}
+        failures = []
+        for entry in [value.strip() for value in options['entry'].split(',') if value.strip()]:
+            if entry not in ('wsgi', 'asgi'):
+                raise CommandError(f'Unknown entry point: {entry}')
+            result = report['entries'][entry] = self.profile(entry, options)
+            if options['target_ms'] and result['median_ms'] > options['target_ms']:
+                failures.append(f"{entry}: median time to first request {result['median_ms']:.0f}ms "
+                                f"> target {options['target_ms']:.0f}ms")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Report written to {options['output']}")
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+    def launch(self, entry, path, importtime=False):
+        command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD, entry, path]
+        launched = time.time()
+        completed = subprocess.run(
+            command, capture_output=True, text=True, cwd=settings.BASE_DIR, env=dict(os.environ),
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('STARTUP ')]
+        if completed.returncode or not lines:
+            raise CommandError(f'{entry} cold start failed:\n{completed.stderr[-2000:]}')
+        timings = json.loads(lines[-1][len('STARTUP '):])
+        timings['first_request_ms'] = (timings.pop('finished_at') - launched) * 1000
+        timings['ready_ms'] = (timings.pop('ready_at') - launched) * 1000
+        return timings, completed.stderr
+
+    def profile(self, entry, options):
+        runs = [self.launch(entry, options['path'])[0] for _ in range(options['runs'])]
+        first_request = [run['first_request_ms'] for run in runs]
+        _, stderr = self.launch(entry, options['path'], importtime=True)
+        modules = parse_importtime(stderr)
+
+        by_package = defaultdict(int)
+        for name, self_us, _ in modules:
+            by_package[name.split('.')[0]] += self_us
+        packages = sorted(by_package.items(), key=lambda item: -item[1])
+        slowest = sorted(modules, key=lambda row: -row[2])[:options['top']]
+        project = sorted(
+            (row for row in modules if row[0].split('.')[0] in PROJECT_PACKAGES), key=lambda row: -row[1],
+        )[:options['top']]
+
+        result = {
+            'status': runs[-1]['status'],
+            'median_ms': round(statistics.median(first_request), 1),
+            'max_ms': round(max(first_request), 1),
+            'ready_ms': round(statistics.median(run['ready_ms'] for run in runs), 1),
+            'load_ms': round(statistics.median(run['load_ms'] for run in runs), 1),
+            'request_ms': round(statistics.median(run['request_ms'] for run in runs), 1),
+            'import_ms_by_package': {name: round(us / 1000, 1) for name, us in packages},
+            'slowest_modules_ms': [[name, round(cumulative / 1000, 1)] for name, _, cumulative in slowest],
+            'project_modules_ms': [[name, round(self_us / 1000, 1)] for name, self_us, _ in project],
+        }
+
+        self.stdout.write(
+            f"{entry}: time to first request median={result['median_ms']:.0f}ms max={result['max_ms']:.0f}ms "
+            f"(entry point load {result['load_ms']:.0f}ms, first request {result['request_ms']:.0f}ms, "
+            f"HTTP {result['status']}); warm-up ready after {result['ready_ms']:.0f}ms"
+        )
+        self.stdout.write('  import time by package (self):')
+        for name, us in packages[:10]:
+            self.stdout.write(f'    {name:<28} {us / 1000:8.1f}ms')
+        self.stdout.write('  slowest modules (cumulative):')
+        for name, _, cumulative in slowest:
+            self.stdout.write(f'    {name:<50} {cumulative / 1000:8.1f}ms')
+        self.stdout.write('  project modules loaded at startup (self):')
+        for name, self_us, _ in project:
+            self.stdout.write(f'    {name:<50} {self_us / 1000:8.1f}ms')
+        return result
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from surveys import datacache, minhash, textindex
+
+
+class Command(BaseCommand):
+    help = 'Recompute near-duplicate signatures, the LSH bucket index and the duplicate flags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey-type', choices=sorted(textindex.SURVEY_MODELS),
+                            help='Only rebuild one survey type')
+
+    def handle(self, *args, **options):
+        flagged = minhash.rebuild([options['survey_type']] if options['survey_type'] else None)
+        datacache.bump()
+        duplicates = ', '.join(f'{count} {survey_type}' for survey_type, count in flagged.items())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the near-duplicate index; duplicates flagged: {duplicates}'))
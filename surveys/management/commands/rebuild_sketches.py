@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from surveys import approx, datacache, pricestats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the reservoir samples, HyperLogLog sketches and price statistics used by analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey-type', choices=sorted(approx.SURVEY_MODELS),
+                            help='Only rebuild one survey type')
+
+    def handle(self, *args, **options):
+        survey_types = [options['survey_type']] if options['survey_type'] else None
+        approx.rebuild(survey_types)
+        pricestats.rebuild(survey_types)
+        datacache.bump()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sketches with a reservoir of {approx.reservoir_size()} rows'))
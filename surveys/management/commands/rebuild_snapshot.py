@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from surveys import datacache, snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the memory-mapped analytics snapshot shared by the web workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Write here instead of SNAPSHOT_PATH')
+
+    def handle(self, *args, **options):
+        tables = snapshot.write(options['path'])
+        datacache.bump()
+        rows = ', '.join(f"{meta['rows']} {survey_type} rows in {meta['groups']} groups" for survey_type, meta in tables.items())
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["path"] or snapshot.snapshot_path()}: {rows}'))
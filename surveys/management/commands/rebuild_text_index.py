@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from surveys import datacache, textindex
+
+
+class Command(BaseCommand):
+    help = 'Recompute the inverted index and term frequencies over the open-text answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey-type', choices=sorted(textindex.SURVEY_MODELS),
+                            help='Only rebuild one survey type')
+
+    def handle(self, *args, **options):
+        written = textindex.rebuild([options['survey_type']] if options['survey_type'] else None)
+        datacache.bump()
+        postings = ', '.join(f'{count} {survey_type} postings' for survey_type, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the text index: {postings}'))
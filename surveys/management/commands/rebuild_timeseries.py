@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from surveys import datacache, timeseries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily submission buckets used by /api/analytics/timeseries/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--survey-type', choices=sorted(timeseries.SURVEY_MODELS),
+                            help='Only rebuild one survey type')
+
+    def handle(self, *args, **options):
+        survey_types = [options['survey_type']] if options['survey_type'] else None
+        created = timeseries.rebuild(survey_types)
+        datacache.bump()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} daily buckets'))
@@ -0,0 +1,123 @@
+"""
+Run queued background jobs (see surveys/jobs.py).
+
+    python manage.py run_worker --processes 2
+    python manage.py run_worker --burst      # exit once the queue is empty
+
+Jobs are claimed in this process and executed in a pool of spawned child
+processes, so a crashing or memory-hungry job cannot take the web workers
+down. A child that dies (segfault, OOM kill) breaks the pool: the jobs it
+was running are requeued (or failed after their last attempt) and a fresh
+pool takes over. SIGTERM/SIGINT stop claiming new jobs and wait for running
+ones.
+
+Every minute (or a quarter of --stale-after, if shorter) the worker touches
+the jobs it is running and requeues jobs whose worker stopped reporting, so
+a crashed worker's jobs come back without restarting the others.
+"""
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from surveys import jobs, worker
+from surveys.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Claim queued jobs and run them in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=getattr(settings, 'JOB_WORKER_PROCESSES', 2))
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between queue polls when idle')
+        parser.add_argument('--burst', action='store_true', help='Exit when no job is queued or running')
+        parser.add_argument('--stale-after', type=int, default=getattr(settings, 'JOB_STALE_SECONDS', 3600),
+                            help='Requeue running jobs not updated for this many seconds')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        name = jobs.worker_name()
+        running = {}
+        sweep_every = min(60, options['stale_after'] / 4)
+        next_sweep = 0
+        self.stdout.write(f"Worker {name} running up to {options['processes']} jobs at a time")
+        pool = self.start_pool(options['processes'])
+        try:
+            while True:
+                if time.monotonic() >= next_sweep:
+                    self.sweep(running, options['stale_after'])
+                    next_sweep = time.monotonic() + sweep_every
+
+                while not self.stopping and len(running) < options['processes']:
+                    job = jobs.claim(name)
+                    if job is None:
+                        break
+                    self.stdout.write(f'Job {job.pk} ({job.kind}) started')
+                    try:
+                        running[pool.submit(worker.execute, job.pk)] = job
+                    except BrokenProcessPool:
+                        pool = self.replace_pool(pool, [job, *running.values()], options['processes'])
+                        running.clear()
+
+                if not running:
+                    if self.stopping or options['burst']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                lost = []
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool:
+                        lost.append(job)
+                        continue
+                    except Exception as exc:
+                        # The child could not run the job or report its outcome
+                        outcome = Job.FAILED
+                        Job.objects.filter(pk=job.pk).update(
+                            status=Job.FAILED, error=f'Worker process failed: {exc}', finished_at=timezone.now(),
+                        )
+                    self.stdout.write(f'Job {job.pk} ({job.kind}) {outcome}')
+                if lost:
+                    # Every job still in flight went down with the pool
+                    pool = self.replace_pool(pool, [*lost, *running.values()], options['processes'])
+                    running.clear()
+        finally:
+            pool.shutdown()
+
+        self.stdout.write('Worker stopped')
+
+    def start_pool(self, processes):
+        return ProcessPoolExecutor(processes, mp_context=get_context('spawn'), initializer=worker.init_process)
+
+    def replace_pool(self, pool, lost, processes):
+        """A child process died: requeue the jobs the pool was running and start a new pool"""
+        pool.shutdown(wait=False, cancel_futures=True)
+        requeued, failed = jobs.requeue_lost([job.pk for job in lost])
+        self.stderr.write(
+            f"Worker process died running job(s) {', '.join(str(job.pk) for job in lost)}; "
+            f'requeued {requeued}, failed {failed}'
+        )
+        return self.start_pool(processes)
+
+    def sweep(self, running, stale_after):
+        # Jobs running here are alive even when their handler never reports progress
+        if running:
+            Job.objects.filter(pk__in=[job.pk for job in running.values()]).update(updated_at=timezone.now())
+        requeued, failed = jobs.requeue_stale(stale_after)
+        if requeued or failed:
+            self.stdout.write(f'Requeued {requeued} and failed {failed} stale jobs')
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,152 @@
+"""
+Supply/demand report for the student-teacher matching platform.
+
+Rows are bucketed by (subject, session length) in one streaming pass over
+each survey table: students add demand, teachers add capacity
+(students_per_week). Price overlap inside a bucket is computed from the
+sorted price and rate arrays with a merge walk and bisection, so the join is
+O(n log n) rather than a loop over every student-teacher pair.
+
+The pass reads both tables, so the report is kept for
+MATCHING_REPORT_CACHE_SECONDS and not invalidated by new submissions (which
+bump the data version on every insert). ``generated_at`` tells clients how
+old it is.
+"""
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import StudentSurvey, TeacherSurvey
+
+CACHE_KEY = 'matching:report'
+BIN_WIDTH = 25
+
+
+class Bucket:
+    __slots__ = ('prices', 'rates', 'capacity', 'time_preference')
+
+    def __init__(self):
+        self.prices = []
+        self.rates = []
+        self.capacity = 0
+        self.time_preference = {}
+
+
+def normalize_subjects(value):
+    if not isinstance(value, list):
+        return []
+    return {str(subject).strip() for subject in value if str(subject).strip()}
+
+
+def affordable_pairs(prices, rates):
+    """Number of (student, teacher) pairs with rate <= price; both lists sorted"""
+    pairs = 0
+    cheaper = 0
+    for price in prices:
+        while cheaper < len(rates) and rates[cheaper] <= price:
+            cheaper += 1
+        pairs += cheaper
+    return pairs
+
+
+def _bins(values):
+    counts = {}
+    for value in values:
+        index = int(value // BIN_WIDTH)
+        counts[index] = counts.get(index, 0) + 1
+    return counts
+
+
+def overlap_coefficient(prices, rates):
+    """Shared area of the two normalized BIN_WIDTH histograms (0 = disjoint, 1 = identical)"""
+    if not prices or not rates:
+        return 0.0
+    student_bins = _bins(prices)
+    teacher_bins = _bins(rates)
+    return sum(
+        min(count / len(prices), teacher_bins.get(index, 0) / len(rates))
+        for index, count in student_bins.items()
+    )
+
+
+def _median(values):
+    return values[len(values) // 2] if values else None
+
+
+def collect():
+    """Stream both survey tables into (subject, session_length) buckets"""
+    buckets = {}
+
+    students = StudentSurvey.objects.order_by().values_list(
+        'subjects_of_interest', 'preferred_session_length', 'fair_price_etb', 'time_preference'
+    )
+    for subjects, session_length, price, time_preference in students.iterator(chunk_size=5000):
+        for subject in normalize_subjects(subjects):
+            bucket = buckets.get((subject, session_length))
+            if bucket is None:
+                bucket = buckets[(subject, session_length)] = Bucket()
+            bucket.prices.append(float(price))
+            bucket.time_preference[time_preference] = bucket.time_preference.get(time_preference, 0) + 1
+
+    teachers = TeacherSurvey.objects.order_by().values_list(
+        'confident_topics', 'preferred_session_length', 'fair_rate_etb', 'students_per_week'
+    )
+    for topics, session_length, rate, capacity in teachers.iterator(chunk_size=5000):
+        for subject in normalize_subjects(topics):
+            bucket = buckets.get((subject, session_length))
+            if bucket is None:
+                bucket = buckets[(subject, session_length)] = Bucket()
+            bucket.rates.append(float(rate))
+            bucket.capacity += capacity or 0
+
+    return buckets
+
+
+def build_report():
+    rows = []
+    totals = {}
+    for (subject, session_length), bucket in sorted(collect().items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+        prices = sorted(bucket.prices)
+        rates = sorted(bucket.rates)
+        demand = len(prices)
+        pairs = len(prices) * len(rates)
+        median_rate = _median(rates)
+        rows.append({
+            'subject': subject,
+            'session_length': session_length,
+            'demand': demand,
+            'teachers': len(rates),
+            'capacity': bucket.capacity,
+            'capacity_ratio': round(bucket.capacity / demand, 3) if demand else None,
+            'gap': demand - bucket.capacity,
+            'median_price': _median(prices),
+            'median_rate': median_rate,
+            'price_overlap': round(overlap_coefficient(prices, rates), 3),
+            # Chance that a random student's price covers a random teacher's rate
+            'affordability': round(affordable_pairs(prices, rates) / pairs, 3) if pairs else None,
+            'students_above_median_rate': (
+                len(prices) - bisect_left(prices, median_rate) if median_rate is not None else 0
+            ),
+            'time_preference': bucket.time_preference,
+        })
+        total = totals.setdefault(subject, {'subject': subject, 'demand': 0, 'capacity': 0})
+        total['demand'] += demand
+        total['capacity'] += bucket.capacity
+
+    for total in totals.values():
+        total['gap'] = total['demand'] - total['capacity']
+    return {'generated_at': timezone.now().isoformat(), 'buckets': rows, 'subjects': list(totals.values())}
+
+
+def report():
+    """The full report, rebuilt at most every MATCHING_REPORT_CACHE_SECONDS whatever was submitted since"""
+    timeout = getattr(settings, 'MATCHING_REPORT_CACHE_SECONDS', 300)
+    if not timeout:
+        return build_report()
+    value = cache.get(CACHE_KEY)
+    if value is None:
+        value = build_report()
+        cache.set(CACHE_KEY, value, timeout)
+    return value
@@ -0,0 +1,160 @@
+"""
+Per-request instrumentation: query counts, DB time, render time and
+response size, aggregated into per-endpoint histograms.
+
+Histograms live in process memory, so each gunicorn worker reports its own
+numbers through /api/metrics/.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets; the last bucket is open ended
+DURATION_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+QUERY_COUNT_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+RESPONSE_SIZE_BUCKETS = [1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+
+_current = ContextVar('surveys_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters collected while a single request is being handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.timings = {}
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.db_time += time.perf_counter() - start
+
+
+def current():
+    """Return the metrics object of the request being handled, if any"""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the current request under ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add(name, time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of raw samples, 0.0 when there are none (benchmark and load commands)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def as_dict(self):
+        labels = [f'le_{bound}' for bound in self.bounds] + ['inf']
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'sum': round(self.total, 3),
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.db_ms = Histogram(DURATION_BUCKETS_MS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.response_bytes = Histogram(RESPONSE_SIZE_BUCKETS)
+        self.max_queries = 0
+
+    def observe(self, status_code, duration_ms, db_ms, queries, size):
+        self.requests += 1
+        if status_code >= 500:
+            self.errors += 1
+        self.duration_ms.observe(duration_ms)
+        self.db_ms.observe(db_ms)
+        self.queries.observe(queries)
+        self.response_bytes.observe(size)
+        self.max_queries = max(self.max_queries, queries)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'max_queries': self.max_queries,
+            'duration_ms': self.duration_ms.as_dict(),
+            'db_ms': self.db_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'response_bytes': self.response_bytes.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of EndpointStats keyed by 'METHOD endpoint'"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.started_at = time.time()
+
+    def observe(self, endpoint, status_code, duration_ms, db_ms, queries, size):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.observe(status_code, duration_ms, db_ms, queries, size)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: stats.as_dict() for name, stats in sorted(self._endpoints.items())}
+        return {
+            'collecting_since': self.started_at,
+            'endpoints': endpoints,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,112 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from . import compression, metrics
+
+logger = logging.getLogger('surveys.metrics')
+
+
+class QueryMetricsMiddleware:
+    """
+    Count queries and DB time for every request, add a Server-Timing header,
+    log one structured line and feed the per-endpoint histograms.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+
+        self.record(request, response, request_metrics)
+        return response
+
+    def record(self, request, response, request_metrics):
+        total_ms = request_metrics.elapsed * 1000
+        db_ms = request_metrics.db_time * 1000
+        size = 0 if response.streaming else len(response.content)
+
+        timings = [
+            f'db;dur={db_ms:.1f};desc="{request_metrics.query_count} queries"',
+        ]
+        for name, seconds in request_metrics.timings.items():
+            timings.append(f'{name};dur={seconds * 1000:.1f}')
+        timings.append(f'total;dur={total_ms:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        match = request.resolver_match
+        endpoint = f"{request.method} {match.view_name if match else 'unresolved'}"
+        metrics.registry.observe(
+            endpoint, response.status_code, total_ms, db_ms, request_metrics.query_count, size
+        )
+
+        logger.info(
+            'request endpoint="%s" path=%s status=%s queries=%d db_ms=%.1f total_ms=%.1f bytes=%d',
+            endpoint, request.path, response.status_code, request_metrics.query_count,
+            db_ms, total_ms, size,
+            extra={
+                'endpoint': endpoint,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': request_metrics.query_count,
+                'db_ms': round(db_ms, 1),
+                'total_ms': round(total_ms, 1),
+                'timings_ms': {k: round(v * 1000, 1) for k, v in request_metrics.timings.items()},
+                'bytes': size,
+            },
+        )
+
+
+class CompressionMiddleware:
+    """
+    gzip/Brotli-encode JSON responses of at least COMPRESSION_MIN_BYTES for
+    clients that accept it. Responses that already carry a Content-Encoding
+    (pre-rendered variants) pass through untouched.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith('application/json')
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < compression.min_bytes():
+            return response
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        with metrics.timed('compress'):
+            compressed = compression.compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = compression.encoded_etag(response['ETag'], encoding)
+        return response
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0011_surveyquestion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailySubmissionCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "survey_type",
+                    models.CharField(
+                        choices=[("student", "Student"), ("teacher", "Teacher")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("all", "All submissions"),
+                            ("gender", "Gender"),
+                            ("age_range", "Age range"),
+                        ],
+                        default="all",
+                        max_length=20,
+                    ),
+                ),
+                ("value", models.CharField(blank=True, default="", max_length=20)),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["survey_type", "dimension", "date"],
+                        name="surveys_dai_survey__e05f39_idx",
+                    )
+                ],
+                "unique_together": {("date", "survey_type", "dimension", "value")},
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0012_dailysubmissioncount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsSketch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("data", models.BinaryField(default=b"")),
+                (
+                    "count",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Rows summarized, for sketches that track it",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ReservoirSample",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "survey_type",
+                    models.CharField(
+                        choices=[("student", "Student"), ("teacher", "Teacher")],
+                        max_length=10,
+                    ),
+                ),
+                ("slot", models.PositiveIntegerField()),
+                ("survey_id", models.BigIntegerField()),
+                (
+                    "values",
+                    models.JSONField(
+                        default=dict, help_text="Dimension values of the sampled row"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["survey_type", "slot"],
+                "unique_together": {("survey_type", "slot")},
+            },
+        ),
+    ]
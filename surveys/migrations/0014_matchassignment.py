@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0013_analyticssketch_reservoirsample"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MatchAssignment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=100)),
+                (
+                    "price_margin",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="Student fair price minus teacher fair rate",
+                        max_digits=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "student",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="assignment",
+                        to="surveys.studentsurvey",
+                    ),
+                ),
+                (
+                    "teacher",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="assignments",
+                        to="surveys.teachersurvey",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0015_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TermPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64)),
+                (
+                    "survey_type",
+                    models.CharField(
+                        choices=[("student", "Student"), ("teacher", "Teacher")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "field",
+                    models.CharField(
+                        help_text="Open-text field the term occurs in", max_length=50
+                    ),
+                ),
+                ("survey_id", models.BigIntegerField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["survey_type", "survey_id"],
+                        name="surveys_ter_survey__c30f0e_idx",
+                    )
+                ],
+                "unique_together": {("term", "survey_type", "field", "survey_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="TermFrequency",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "survey_type",
+                    models.CharField(
+                        choices=[("student", "Student"), ("teacher", "Teacher")],
+                        max_length=10,
+                    ),
+                ),
+                ("field", models.CharField(max_length=50)),
+                ("term", models.CharField(max_length=64)),
+                (
+                    "documents",
+                    models.IntegerField(
+                        default=0, help_text="Answers containing the term"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["survey_type", "field", "-documents"],
+                        name="surveys_ter_survey__383161_idx",
+                    )
+                ],
+                "unique_together": {("survey_type", "field", "term")},
+            },
+        ),
+    ]
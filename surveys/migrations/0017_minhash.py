@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0016_termposting_termfrequency"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="studentsurvey",
+            name="duplicate_cluster",
+            field=models.BigIntegerField(
+                blank=True,
+                editable=False,
+                help_text="Near-duplicate bucket shared with an earlier submission (surveys/minhash.py)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="studentsurvey",
+            name="minhash",
+            field=models.BinaryField(
+                default=b"",
+                help_text="MinHash signature of the open-text answers and IP",
+            ),
+        ),
+        migrations.AddField(
+            model_name="teachersurvey",
+            name="duplicate_cluster",
+            field=models.BigIntegerField(
+                blank=True,
+                editable=False,
+                help_text="Near-duplicate bucket shared with an earlier submission (surveys/minhash.py)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="teachersurvey",
+            name="minhash",
+            field=models.BinaryField(
+                default=b"",
+                help_text="MinHash signature of the open-text answers and IP",
+            ),
+        ),
+        migrations.CreateModel(
+            name="MinHashBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "survey_type",
+                    models.CharField(
+                        choices=[("student", "Student"), ("teacher", "Teacher")],
+                        max_length=10,
+                    ),
+                ),
+                ("band", models.PositiveSmallIntegerField()),
+                (
+                    "bucket",
+                    models.BigIntegerField(
+                        help_text="Hash of the band and its signature slots"
+                    ),
+                ),
+                (
+                    "signature",
+                    models.BinaryField(
+                        help_text="First submission in the bucket, compared against later ones"
+                    ),
+                ),
+                (
+                    "members",
+                    models.IntegerField(
+                        default=1, help_text="Submissions that landed in the bucket"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("survey_type", "band", "bucket")},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0017_minhash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="exclusive",
+            field=models.BooleanField(
+                default=False,
+                help_text="At most one job of this kind may be queued or running",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="job",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("exclusive", True), ("status__in", ["queued", "running"])
+                ),
+                fields=("kind",),
+                name="unique_active_exclusive_job",
+            ),
+        ),
+    ]
@@ -0,0 +1,194 @@
+"""
+Near-duplicate detection for public submissions.
+
+Bulk junk tends to repeat the same open-text answers from the same address
+and vary only the phone number, which the unique constraint does not catch.
+Every new survey gets a MinHash signature over the shingles of its answers
+(the terms ``textindex.tokenize()`` finds, single and in adjacent pairs,
+tagged with the question they answer) plus its IP address: 64 minimums of
+32 bits, stored in 256 bytes on the row. The share of equal slots in two
+signatures estimates the Jaccard similarity of their shingle sets.
+
+Locality-sensitive hashing finds candidates without scanning: the signature
+is cut into 16 bands of 4 slots, and each band hashes to one MinHashBucket
+row. The first survey to land in a bucket becomes its representative; later
+ones compare against the representatives of their 16 buckets (one upsert,
+which also counts the members) and are flagged with ``duplicate_cluster``
+set to the bucket of the most similar representative when the full
+signatures agree on at least MINHASH_THRESHOLD of their slots. The bucket
+names the cluster: copies of one submission share it, and its representative
+is the survey whose ``minhash`` equals the bucket's signature. Pairs at 0.8
+similarity share a band with more than 99.9% probability, pairs at 0.7 with
+~99%.
+
+Answers too short to say much (fewer than MINHASH_MIN_SHINGLES text
+shingles) are compared exactly instead: every slot of their signature is
+one hash of the shingles and the IP address, so only identical short
+answers from the same address share a bucket, and they always match.
+Surveys without any open-text answer get no signature and are never
+flagged. ``exclude_duplicates=1``
+on the analytics and user list endpoints leaves flagged surveys out; the
+representatives stay in. The check runs in a pre_save receiver
+(signals.py), so the flag is inserted with the row; admin edits keep the
+flags they had. Run ``manage.py rebuild_minhash`` after bulk imports, edits,
+deletes or a threshold change.
+"""
+import random
+import struct
+from hashlib import blake2b
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from . import textindex
+from .models import MinHashBucket
+from .sketches import hash64
+
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+SIGNATURE = struct.Struct(f'<{PERMUTATIONS}I')
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod p
+PRIME = (1 << 61) - 1
+# Fixed seed: signatures must stay comparable across processes and restarts
+_rng = random.Random(20240601)
+HASHES = [(_rng.randrange(1, PRIME), _rng.randrange(PRIME)) for _ in range(PERMUTATIONS)]
+MASK = (1 << 32) - 1
+
+
+def threshold():
+    return getattr(settings, 'MINHASH_THRESHOLD', 0.8)
+
+
+def min_shingles():
+    return getattr(settings, 'MINHASH_MIN_SHINGLES', 8)
+
+
+def shingles(survey_type, answers):
+    """Shingles of the open-text answers in ``answers`` (a dict or model instance) without the IP"""
+    get = answers.get if isinstance(answers, dict) else lambda name: getattr(answers, name, '')
+    result = set()
+    for position, field in enumerate(textindex.TEXT_FIELDS[survey_type]):
+        terms = textindex.tokenize(get(field))
+        # Per question: the same words answering different questions are different answers
+        result.update(f'{position}:{term}' for term in terms)
+        result.update(f'{position}:{first} {second}' for first, second in zip(terms, terms[1:]))
+    return result
+
+
+def signature(survey_type, answers, ip_address):
+    """Packed MinHash signature, exact for short answers, or b'' without any open-text answer"""
+    found = shingles(survey_type, answers)
+    if not found:
+        return b''
+    if ip_address:
+        found.add(f'ip:{ip_address}')
+    if len(found) - bool(ip_address) < min_shingles():
+        # Too few shingles for a useful estimate: the same value in every slot matches identical sets only
+        return SIGNATURE.pack(*[hash64('\n'.join(sorted(found))) & MASK] * PERMUTATIONS)
+    values = [hash64(shingle) for shingle in found]
+    return SIGNATURE.pack(*(min(((a * x + b) % PRIME) & MASK for x in values) for a, b in HASHES))
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two packed signatures"""
+    equal = sum(a == b for a, b in zip(SIGNATURE.unpack(first), SIGNATURE.unpack(second)))
+    return equal / PERMUTATIONS
+
+
+def buckets(packed):
+    """[(band, bucket)] for a packed signature; buckets are signed 64-bit hashes of the band and its slots"""
+    size = ROWS * 4
+    return [
+        (band, int.from_bytes(
+            blake2b(bytes([band]) + packed[band * size:(band + 1) * size], digest_size=8).digest(), 'big', signed=True))
+        for band in range(BANDS)
+    ]
+
+
+def _closest(packed, representatives):
+    """Bucket of the most similar representative at or above the threshold, or None"""
+    best, best_score = None, threshold()
+    # Representatives come in band order; the first of equally similar ones wins
+    for bucket, other in representatives:
+        score = similarity(packed, bytes(other))
+        if score > best_score or (best is None and score == best_score):
+            best, best_score = bucket, score
+    return best
+
+
+def check(survey_type, survey):
+    """
+    Sign a survey about to be inserted and flag it if it nearly duplicates an earlier one.
+
+    One upsert registers the signature in its buckets, claiming the empty
+    ones and returning the representatives of the others, so the flag is
+    written with the row itself. Unless SQLite's write lock is in use,
+    submissions run in autocommit (sqlite.serialized_write), so an insert
+    failing afterwards leaves its claims behind until the next
+    ``rebuild_minhash``.
+    """
+    if not survey.minhash:
+        survey.minhash = signature(survey_type, survey, survey.ip_address)
+    packed = bytes(survey.minhash)
+    if not packed:
+        return
+    table = connection.ops.quote_name(MinHashBucket._meta.db_table)
+    members = connection.ops.quote_name('members')
+    params = []
+    for band, bucket in buckets(packed):
+        params.extend([survey_type, band, bucket, packed])
+    # INSERT ... ON CONFLICT ... RETURNING needs PostgreSQL or SQLite 3.35+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (survey_type, band, bucket, signature, {members}) '
+            f'VALUES {", ".join(["(%s, %s, %s, %s, 1)"] * BANDS)} '
+            f'ON CONFLICT (survey_type, band, bucket) DO UPDATE SET {members} = {table}.{members} + 1 '
+            f'RETURNING band, bucket, signature, {members}',
+            params,
+        )
+        # Buckets this survey just claimed come back with one member
+        representatives = [(bucket, other) for _, bucket, other, count in sorted(cursor.fetchall()) if count > 1]
+    survey.duplicate_cluster = _closest(packed, representatives)
+
+
+def rebuild(survey_types=None, batch_size=2000):
+    """Recompute signatures, buckets and flags in submission order; returns flagged surveys per type"""
+    flagged = {}
+    for survey_type in survey_types or list(textindex.SURVEY_MODELS):
+        model = textindex.SURVEY_MODELS[survey_type]
+        fields = textindex.TEXT_FIELDS[survey_type]
+        index = {}
+        changed = []
+        flagged[survey_type] = 0
+        with transaction.atomic():
+            rows = model.objects.order_by('pk').only('pk', 'ip_address', 'minhash', 'duplicate_cluster', *fields)
+            for survey in rows.iterator(chunk_size=batch_size):
+                packed = signature(survey_type, survey, survey.ip_address)
+                cluster = None
+                if packed:
+                    representatives = []
+                    for key in buckets(packed):
+                        entry = index.get(key)
+                        if entry is None:
+                            index[key] = [packed, 1]
+                        else:
+                            entry[1] += 1
+                            representatives.append((key[1], entry[0]))
+                    cluster = _closest(packed, representatives)
+                flagged[survey_type] += cluster is not None
+                if bytes(survey.minhash) != packed or survey.duplicate_cluster != cluster:
+                    survey.minhash, survey.duplicate_cluster = packed, cluster
+                    changed.append(survey)
+                if len(changed) >= batch_size:
+                    model.objects.bulk_update(changed, ['minhash', 'duplicate_cluster'])
+                    changed = []
+            model.objects.bulk_update(changed, ['minhash', 'duplicate_cluster'])
+            MinHashBucket.objects.filter(survey_type=survey_type).delete()
+            MinHashBucket.objects.bulk_create(
+                [MinHashBucket(survey_type=survey_type, band=band, bucket=bucket, signature=packed, members=members)
+                 for (band, bucket), (packed, members) in index.items()],
+                batch_size=batch_size,
+            )
+    return flagged
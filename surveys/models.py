@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.conf import settings
 
 
 class StudentSurvey(models.Model):
@@ -158,6 +159,13 @@ class StudentSurvey(models.Model):
 
     submitted_at = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    minhash = models.BinaryField(default=b'', editable=False, help_text="MinHash signature of the open-text answers and IP")
+    duplicate_cluster = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Near-duplicate bucket shared with an earlier submission (surveys/minhash.py)"
+    )
 
     def __str__(self):
         return f"Student Survey - {self.submitted_at.strftime('%Y-%m-%d %H:%M')}"
@@ -305,6 +313,13 @@ class TeacherSurvey(models.Model):
 
     submitted_at = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    minhash = models.BinaryField(default=b'', editable=False, help_text="MinHash signature of the open-text answers and IP")
+    duplicate_cluster = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Near-duplicate bucket shared with an earlier submission (surveys/minhash.py)"
+    )
 
     def __str__(self):
         return f"Teacher Survey - {self.submitted_at.strftime('%Y-%m-%d %H:%M')}"
@@ -343,3 +358,180 @@ class SurveyQuestion(models.Model):
 
     def __str__(self):
         return f"{self.survey_type} - {self.identifier}"
+
+
+class DailySubmissionCount(models.Model):
+    """Submissions per day, survey type and demographic, kept up to date on insert"""
+
+    SURVEY_TYPE_CHOICES = SurveyQuestion.SURVEY_TYPE_CHOICES
+
+    DIMENSION_CHOICES = [
+        ('all', 'All submissions'),
+        ('gender', 'Gender'),
+        ('age_range', 'Age range'),
+    ]
+
+    date = models.DateField()
+    survey_type = models.CharField(max_length=10, choices=SURVEY_TYPE_CHOICES)
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES, default='all')
+    value = models.CharField(max_length=20, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['date', 'survey_type', 'dimension', 'value']
+        indexes = [
+            models.Index(fields=['survey_type', 'dimension', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.survey_type} {self.dimension}={self.value}: {self.count}"
+
+
+class AnalyticsSketch(models.Model):
+    """Serialized probabilistic summary (HyperLogLog, quantile sketch, ...) maintained on insert"""
+
+    name = models.CharField(max_length=100, unique=True)
+    data = models.BinaryField(default=b'')
+    count = models.BigIntegerField(default=0, help_text="Rows summarized, for sketches that track it")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.count} rows)"
+
+
+class ReservoirSample(models.Model):
+    """Fixed-size uniform sample of survey rows used by approximate analytics"""
+
+    survey_type = models.CharField(max_length=10, choices=SurveyQuestion.SURVEY_TYPE_CHOICES)
+    slot = models.PositiveIntegerField()
+    survey_id = models.BigIntegerField()
+    values = models.JSONField(default=dict, help_text="Dimension values of the sampled row")
+
+    class Meta:
+        ordering = ['survey_type', 'slot']
+        unique_together = ['survey_type', 'slot']
+
+    def __str__(self):
+        return f"{self.survey_type} sample slot {self.slot}"
+
+
+class MatchAssignment(models.Model):
+    """Simulated student-to-teacher match produced by surveys/assignment.py"""
+
+    student = models.OneToOneField(StudentSurvey, on_delete=models.CASCADE, related_name='assignment')
+    teacher = models.ForeignKey(TeacherSurvey, on_delete=models.CASCADE, related_name='assignments')
+    subject = models.CharField(max_length=100)
+    price_margin = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Student fair price minus teacher fair rate"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Student {self.student_id} -> Teacher {self.teacher_id} ({self.subject})"
+
+
+class Job(models.Model):
+    """Unit of background work queued in the database and run by `manage.py run_worker`"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, help_text="Handler name registered in surveys/jobs.py")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.FloatField(default=0, help_text="Fraction complete, 0 to 1")
+    message = models.CharField(max_length=255, blank=True, default='')
+    result = models.JSONField(null=True, blank=True)
+    result_path = models.CharField(max_length=500, blank=True, default='', help_text="File produced by the job, if any")
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    exclusive = models.BooleanField(default=False, help_text="At most one job of this kind may be queued or running")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind'], condition=models.Q(exclusive=True, status__in=['queued', 'running']),
+                name='unique_active_exclusive_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} {self.kind} ({self.status})"
+
+
+class TermPosting(models.Model):
+    """One open-text answer containing a term; the inverted index behind surveys/textindex.py"""
+
+    term = models.CharField(max_length=64)
+    survey_type = models.CharField(max_length=10, choices=SurveyQuestion.SURVEY_TYPE_CHOICES)
+    field = models.CharField(max_length=50, help_text="Open-text field the term occurs in")
+    survey_id = models.BigIntegerField()
+
+    class Meta:
+        # The unique index also serves term lookups
+        unique_together = ['term', 'survey_type', 'field', 'survey_id']
+        indexes = [
+            models.Index(fields=['survey_type', 'survey_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} in {self.survey_type} {self.survey_id}.{self.field}"
+
+
+class TermFrequency(models.Model):
+    """Number of answers per survey type and open-text field that contain a term, kept up to date on insert"""
+
+    survey_type = models.CharField(max_length=10, choices=SurveyQuestion.SURVEY_TYPE_CHOICES)
+    field = models.CharField(max_length=50)
+    term = models.CharField(max_length=64)
+    documents = models.IntegerField(default=0, help_text="Answers containing the term")
+
+    class Meta:
+        unique_together = ['survey_type', 'field', 'term']
+        indexes = [
+            models.Index(fields=['survey_type', 'field', '-documents']),
+        ]
+
+    def __str__(self):
+        return f"{self.survey_type}.{self.field} {self.term}: {self.documents}"
+
+
+class MinHashBucket(models.Model):
+    """One LSH band bucket of survey signatures; the near-duplicate index behind surveys/minhash.py"""
+
+    survey_type = models.CharField(max_length=10, choices=SurveyQuestion.SURVEY_TYPE_CHOICES)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField(help_text="Hash of the band and its signature slots")
+    signature = models.BinaryField(help_text="First submission in the bucket, compared against later ones")
+    members = models.IntegerField(default=1, help_text="Submissions that landed in the bucket")
+
+    class Meta:
+        unique_together = ['survey_type', 'band', 'bucket']
+
+    def __str__(self):
+        return f"{self.survey_type} band {self.band} bucket {self.bucket}: {self.members}"
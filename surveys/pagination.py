@@ -0,0 +1,126 @@
+"""
+Pagination that does not COUNT(*) large unfiltered tables.
+
+``estimated_count()`` answers for querysets without filters over tables of
+at least ESTIMATED_COUNT_THRESHOLD rows: survey tables use the row count of
+the analytics snapshot (surveys/snapshot.py, no query), other tables on
+PostgreSQL the planner's ``pg_class.reltuples`` (cached for
+ESTIMATED_COUNT_CACHE_SECONDS). Filtered querysets, small tables and
+tables without an estimate are counted exactly.
+
+EstimatedCountPaginator (admin changelists) and EstimatedCountPagination
+(DRF list views) use it. With an estimated total each page is fetched one
+row long, so "next" links stay right when the estimate is off.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.pagination import PageNumberPagination
+
+from . import snapshot
+
+SNAPSHOT_TABLES = {model: survey_type for survey_type, model in snapshot.SURVEY_MODELS.items()}
+
+
+def threshold():
+    return getattr(settings, 'ESTIMATED_COUNT_THRESHOLD', 100000)
+
+
+def _reltuples(model, using):
+    connection = connections[using]
+    key = f'surveys:reltuples:{using}:{model._meta.db_table}'
+    estimate = cache.get(key)
+    if estimate is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+                [connection.ops.quote_name(model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # -1: never vacuumed or analyzed
+        estimate = row[0] if row and row[0] is not None else -1
+        cache.set(key, estimate, getattr(settings, 'ESTIMATED_COUNT_CACHE_SECONDS', 60))
+    return estimate if estimate >= 0 else None
+
+
+def estimate_rows(model, using='default'):
+    """Approximate number of rows in ``model``'s table without scanning it, or None"""
+    survey_type = SNAPSHOT_TABLES.get(model)
+    if survey_type is not None:
+        current = snapshot.current()
+        if current is not None and survey_type in current.tables:
+            return current.tables[survey_type].rows
+    if connections[using].vendor == 'postgresql':
+        return _reltuples(model, using)
+    return None
+
+
+def estimated_count(queryset):
+    """Estimated total for an unfiltered queryset over a large table; None means count exactly"""
+    query = queryset.query
+    if query.where or query.is_sliced or query.distinct or query.combinator or query.group_by is not None:
+        return None
+    estimate = estimate_rows(queryset.model, queryset.db)
+    if estimate is None or estimate < threshold():
+        return None
+    return estimate
+
+
+class EstimatedPage(Page):
+    # Set when the page was fetched one row long: whether that extra row exists
+    has_more = None
+
+    def has_next(self):
+        return super().has_next() if self.has_more is None else self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose ``count`` is estimated for large unfiltered querysets (``estimated`` is then True)"""
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is None:
+            return super().count
+        self.estimated = True
+        return estimate
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Past the estimated last page; page() finds out whether rows are left
+            if not self.estimated or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedPage(*args, **kwargs)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """PageNumberPagination on EstimatedCountPaginator; responses flag estimated counts"""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_estimated'] = self.page.paginator.estimated
+        return response
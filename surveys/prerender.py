@@ -0,0 +1,93 @@
+"""
+Pre-rendered JSON responses for hot read endpoints.
+
+Payloads that only change with the data version (see datacache.py) are
+encoded once, stored in the cache together with their ETag, and served as a
+plain HttpResponse, so repeat requests skip DRF content negotiation and the
+renderer entirely. Clients sending the ETag back in If-None-Match get an
+empty 304. Large payloads also keep gzip/Brotli variants (compression.py),
+so each is compressed once per data version rather than once per request.
+
+    rendered = prerender.cached('analytics:summary', build_summary)
+    return prerender.respond(request, rendered)
+
+orjson is used when installed; otherwise the stdlib encoder with DRF's
+JSONEncoder produces the same bytes TimedJSONRenderer would.
+"""
+import hashlib
+import json
+from collections import namedtuple
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import compression, datacache
+from .metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Rendered = namedtuple('Rendered', ['body', 'etag', 'encoded'])
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """Encode ``data`` to compact UTF-8 JSON bytes"""
+    with timed('serialize'):
+        if orjson is not None:
+            # Decimals, lazy strings, querysets etc. go through DRF's encoder
+            return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'),
+        ).encode('utf-8')
+
+
+def render(data):
+    body = dumps(data)
+    with timed('compress'):
+        encoded = compression.precompress(body)
+    return Rendered(body, '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(), encoded)
+
+
+def cached(key, build, timeout=None):
+    """Rendered payload for ``key`` at the current data version; ``build()`` returns the data on a miss"""
+    return datacache.get_or_build(key, lambda: render(build()), timeout)
+
+
+def cache_key(prefix, value):
+    """Short cache key for arbitrary request-derived text (full URLs, raw query strings)"""
+    return f'{prefix}:{hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()}'
+
+
+def respond(request, rendered):
+    """Serve ``rendered`` as-is (or a compressed variant), or a 304 when the client already has it"""
+    encoding = None
+    if rendered.encoded:
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+        encoding = encoding if encoding in rendered.encoded else None
+    etag = compression.encoded_etag(rendered.etag, encoding) if encoding else rendered.etag
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = [value.removeprefix('W/') for value in parse_etags(if_none_match)]
+        if '*' in etags or etag in etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            if rendered.encoded:
+                patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+
+    body = rendered.encoded[encoding] if encoding else rendered.body
+    response = HttpResponse(body, content_type='application/json')
+    response['Content-Length'] = str(len(body))
+    response['ETag'] = etag
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if rendered.encoded:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,170 @@
+"""
+Price statistics (student fair price, teacher fair rate) maintained on insert.
+
+Each slice -- all rows, or one gender / age range -- keeps a PriceStats
+blob in AnalyticsSketch: count, sum, min, max, a fixed-bin histogram and a
+KLL quantile sketch. Medians, percentiles and histograms are then answered
+from a handful of small rows instead of sorting the survey tables.
+"""
+import struct
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import sketches
+from .models import StudentSurvey, TeacherSurvey, AnalyticsSketch
+
+PRICE_FIELDS = {
+    'student': 'fair_price_etb',
+    'teacher': 'fair_rate_etb',
+}
+
+SURVEY_MODELS = {
+    'student': StudentSurvey,
+    'teacher': TeacherSurvey,
+}
+
+DIMENSIONS = ('gender', 'age_range')
+
+BIN_WIDTH = 25
+BINS = 41  # 0-1000 ETB in 25 ETB steps, then 1000+
+KLL_K = 200
+
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+_HEADER = struct.Struct('<Qddd')
+
+
+class PriceStats:
+    """Count, sum, min, max, histogram and quantile sketch for one slice"""
+
+    def __init__(self, count=0, total=0.0, low=None, high=None, histogram=None, kll=None):
+        self.count = count
+        self.total = total
+        self.low = low
+        self.high = high
+        self.histogram = histogram or sketches.FixedHistogram(BIN_WIDTH, BINS)
+        self.kll = kll or sketches.KLLSketch(KLL_K)
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        self.total += value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+        self.histogram.add(value)
+        self.kll.add(value)
+        return True
+
+    def merge(self, other):
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.low = other.low if self.low is None else min(self.low, other.low)
+        self.high = other.high if self.high is None else max(self.high, other.high)
+        self.histogram.merge(other.histogram)
+        self.kll.merge(other.kll)
+
+    def summary(self, fractions):
+        values = self.kll.quantiles(fractions)
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2) if self.count else None,
+            'min': self.low,
+            'max': self.high,
+            'quantiles': {quantile_label(fraction): value for fraction, value in zip(fractions, values)},
+            'histogram': self.histogram.buckets(),
+        }
+
+    def to_bytes(self):
+        histogram = self.histogram.to_bytes()
+        low = self.low if self.low is not None else float('nan')
+        high = self.high if self.high is not None else float('nan')
+        return (
+            _HEADER.pack(self.count, self.total, low, high)
+            + struct.pack('<I', len(histogram)) + histogram
+            + self.kll.to_bytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        if not data:
+            return cls()
+        count, total, low, high = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        (length,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        histogram = sketches.FixedHistogram.from_bytes(data[offset:offset + length])
+        kll = sketches.KLLSketch.from_bytes(data[offset + length:])
+        return cls(
+            count=count, total=total,
+            low=None if low != low else low, high=None if high != high else high,
+            histogram=histogram, kll=kll,
+        )
+
+
+def quantile_label(fraction):
+    return f'p{fraction * 100:g}'
+
+
+def _name(survey_type, dimension='all', value=''):
+    return f'prices:{survey_type}:{dimension}:{value}'
+
+
+def slice_names(survey_type, survey):
+    names = [_name(survey_type)]
+    for dimension in DIMENSIONS:
+        names.append(_name(survey_type, dimension, getattr(survey, dimension) or ''))
+    return names
+
+
+def record_submission(survey_type, survey):
+    """Add one new survey's price to every slice it belongs to"""
+    price = getattr(survey, PRICE_FIELDS[survey_type])
+    if price is None:
+        return
+    sketches.modify(PriceStats, {name: lambda stats: stats.add(price) for name in slice_names(survey_type, survey)}, count=1)
+
+
+def rebuild(survey_types=None):
+    """Recompute every slice for the given survey types from the survey tables"""
+    for survey_type in survey_types or list(SURVEY_MODELS):
+        model = SURVEY_MODELS[survey_type]
+        slices = {}
+        rows = model.objects.order_by().values_list(PRICE_FIELDS[survey_type], *DIMENSIONS)
+        for price, *values in rows.iterator(chunk_size=5000):
+            if price is None:
+                continue
+            names = [_name(survey_type)] + [
+                _name(survey_type, dimension, value or '') for dimension, value in zip(DIMENSIONS, values)
+            ]
+            for name in names:
+                slices.setdefault(name, PriceStats()).add(price)
+
+        with transaction.atomic():
+            AnalyticsSketch.objects.filter(name__startswith=f'prices:{survey_type}:').delete()
+            AnalyticsSketch.objects.bulk_create(
+                [AnalyticsSketch(name=name, data=stats.to_bytes(), count=stats.count) for name, stats in slices.items()],
+                batch_size=500,
+            )
+
+
+def query(survey_types, dimension=None, fractions=DEFAULT_QUANTILES):
+    """Summaries per survey type for the whole population, or per value of ``dimension``"""
+    if dimension:
+        match = Q()
+        for survey_type in survey_types:
+            match |= Q(name__startswith=_name(survey_type, dimension, ''))
+    else:
+        match = Q(name__in=[_name(survey_type) for survey_type in survey_types])
+
+    result = []
+    for name, data in AnalyticsSketch.objects.filter(match).order_by('name').values_list('name', 'data'):
+        _, survey_type, _, value = name.split(':', 3)
+        result.append(dict(
+            {'survey_type': survey_type, 'value': value if dimension else None},
+            **PriceStats.from_bytes(data).summary(fractions),
+        ))
+    return result
@@ -0,0 +1,68 @@
+"""
+Read-replica routing for the analytics views.
+
+When REPLICA_DATABASE_URL is set, views wrapped in ``replica_reads`` send
+their reads to the 'replica' alias; every other read, and every write, goes
+to 'default'. The choice is held in a ContextVar, so it is scoped to the
+request in both threaded and async workers:
+
+    @api_view(['GET'])
+    @permission_classes([IsAuthenticated])
+    @replica_reads
+    def student_analytics(request):
+        ...
+
+Authentication runs before the wrapped function, so user lookups stay on the
+primary. Replica-backed views may trail the primary by the replication lag,
+which is fine for aggregates; once a view writes, the rest of its reads go
+to the primary so it sees its own writes.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA = 'replica'
+
+_read_alias = ContextVar('surveys_read_alias', default=None)
+
+
+@contextmanager
+def use_replica():
+    """Route reads in this block to the replica, when one is configured"""
+    token = _read_alias.set(REPLICA if REPLICA in settings.DATABASES else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_reads(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Rows loaded from the replica are still saved to the primary, and the
+        # scope's later reads follow them there (use_replica() restores it on exit)
+        if _read_alias.get() is not None:
+            _read_alias.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same rows
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -1,5 +1,19 @@
 from rest_framework import serializers
-from .models import StudentSurvey, TeacherSurvey, SurveyQuestion
+from rest_framework.reverse import reverse
+from .models import StudentSurvey, TeacherSurvey, SurveyQuestion, Job
+
+
+def normalize_phone_number(value: str) -> str:
+    """Bring an Ethiopian phone number to +251XXXXXXXXX form without validating it"""
+    value = value.strip()
+
+    if value.startswith('0'):
+        value = value[1:]
+
+    if not value.startswith('+251'):
+        value = '+251' + value
+
+    return value
 
 
 class StudentSurveySerializer(serializers.ModelSerializer):
@@ -43,13 +57,7 @@ class StudentSurveySerializer(serializers.ModelSerializer):
 
     def validate_phone_number(self, value: str) -> str:
         """Normalize and validate Ethiopian phone numbers"""
-        value = value.strip()
-
-        if value.startswith('0'):
-            value = value[1:]
-
-        if not value.startswith('+251'):
-            value = '+251' + value
+        value = normalize_phone_number(value)
 
         if len(value) != 13:
             raise serializers.ValidationError("Invalid phone number length. Must be 9 digits (e.g., 911223344).")
@@ -114,13 +122,7 @@ class TeacherSurveySerializer(serializers.ModelSerializer):
         return value
 
     def validate_phone_number(self, value: str) -> str:
-        value = value.strip()
-
-        if value.startswith('0'):
-            value = value[1:]
-
-        if not value.startswith('+251'):
-            value = '+251' + value
+        value = normalize_phone_number(value)
 
         if len(value) != 13:
             raise serializers.ValidationError("Invalid phone number length. Must be 9 digits (e.g., 911223344).")
@@ -153,3 +155,36 @@ class SurveyQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = SurveyQuestion
         fields = '__all__'
+
+
+class JobSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'kind',
+            'params',
+            'status',
+            'progress',
+            'message',
+            'result',
+            'result_url',
+            'error',
+            'attempts',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'url',
+        ]
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        return reverse('job-detail', args=[obj.pk], request=self.context.get('request'))
+
+    def get_result_url(self, obj):
+        if not obj.result_path:
+            return None
+        return reverse('job-result', args=[obj.pk], request=self.context.get('request'))
@@ -0,0 +1,59 @@
+"""
+Receivers that keep derived analytics structures in step with the survey
+tables. bulk_create() and deletes do not update them (a post_delete receiver
+would turn every queryset delete into a per-row loop), so bulk imports and
+clean-ups must be followed by the matching rebuild command, which also
+invalidates cached analytics.
+
+Question edits invalidate the pre-rendered catalog responses; deletes go
+through SurveyQuestionViewSet, which bumps the version itself. User edits
+and deletes invalidate that user's cached JWTs (see authentication.py).
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import approx, authentication, datacache, minhash, pricestats, textindex, timeseries
+from .models import StudentSurvey, TeacherSurvey, SurveyQuestion
+
+SURVEY_TYPES = {
+    StudentSurvey: 'student',
+    TeacherSurvey: 'teacher',
+}
+
+
+@receiver(pre_save, sender=StudentSurvey)
+@receiver(pre_save, sender=TeacherSurvey)
+def survey_saving(sender, instance, **kwargs):
+    if instance._state.adding:
+        minhash.check(SURVEY_TYPES[sender], instance)
+
+
+@receiver(post_save, sender=StudentSurvey)
+@receiver(post_save, sender=TeacherSurvey)
+def survey_saved(sender, instance, created, **kwargs):
+    if not created:
+        return
+    timeseries.record_submission(SURVEY_TYPES[sender], instance)
+    approx.record_submission(SURVEY_TYPES[sender], instance)
+    pricestats.record_submission(SURVEY_TYPES[sender], instance)
+    textindex.record_submission(SURVEY_TYPES[sender], instance)
+    datacache.bump()
+
+
+@receiver(post_save, sender=SurveyQuestion)
+def question_saved(sender, instance, **kwargs):
+    datacache.bump()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logging in only updates last_login; the user's tokens stay as valid as they were
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    authentication.bump_user(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    authentication.bump_user(instance.pk)
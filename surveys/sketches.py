@@ -0,0 +1,388 @@
+"""
+Probabilistic sketches persisted in AnalyticsSketch rows.
+
+HyperLogLog estimates distinct counts (IP addresses, phone numbers) in a
+fixed 4 KB per sketch with ~1.6% standard error, independent of table size.
+KLLSketch estimates quantiles with a rank error of roughly 1.7 / k using
+O(k) stored values, and FixedHistogram counts values into equal-width bins.
+All of them merge, so slices can be combined without rescanning rows.
+"""
+import math
+import random
+import struct
+from hashlib import blake2b
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AnalyticsSketch
+
+
+def hash64(value):
+    return int.from_bytes(blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """HyperLogLog with 2**p one-byte registers and a 64-bit hash"""
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    @property
+    def standard_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value):
+        """Add a value; returns True if the sketch changed"""
+        x = hash64(value)
+        index = x >> (64 - self.p)
+        remainder = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precision')
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def estimate(self, z=1.96):
+        """Estimate with a ~95% confidence interval"""
+        value = self.count()
+        margin = z * self.standard_error * value
+        return {
+            'estimate': round(value),
+            'ci_low': max(0, round(value - margin)),
+            'ci_high': round(value + margin),
+        }
+
+    def to_bytes(self):
+        return bytes([self.p]) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        if not data:
+            return cls()
+        return cls(p=data[0], registers=data[1:])
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Level h holds values of weight 2**h. A full level is sorted and every
+    other value (random offset) is promoted to the level above, so memory
+    stays O(k) while rank error stays around 1.7 / k.
+    """
+
+    def __init__(self, k=200, levels=None, n=0, rng=random):
+        self.k = k
+        self.levels = levels if levels is not None else [[]]
+        self.n = n
+        self.rng = rng
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self):
+        while self._size() > self._max_size():
+            for level, items in enumerate(self.levels):
+                if len(items) < self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # An odd item out stays behind so total weight is preserved
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self.rng.getrandbits(1)::2])
+                self.levels[level] = keep
+                break
+
+    def add(self, value):
+        self.levels[0].append(float(value))
+        self.n += 1
+        self._compress()
+        return True
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self._compress()
+
+    def _weighted(self):
+        return sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+
+    def quantiles(self, fractions):
+        """Values at each rank fraction in ``fractions`` (None when empty)"""
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        result = []
+        for fraction in fractions:
+            if not weighted:
+                result.append(None)
+                continue
+            target = fraction * total
+            running = 0
+            value = weighted[-1][0]
+            for candidate, weight in weighted:
+                running += weight
+                if running >= target:
+                    value = candidate
+                    break
+            result.append(value)
+        return result
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+    def rank(self, value):
+        """Estimated fraction of values <= ``value``"""
+        weighted = self._weighted()
+        total = sum(weight for _, weight in weighted)
+        if not total:
+            return 0.0
+        return sum(weight for candidate, weight in weighted if candidate <= value) / total
+
+    def to_bytes(self):
+        parts = [struct.pack('<HQH', self.k, self.n, len(self.levels))]
+        for items in self.levels:
+            parts.append(struct.pack(f'<I{len(items)}d', len(items), *items))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        if not data:
+            return cls()
+        k, n, depth = struct.unpack_from('<HQH', data)
+        offset = struct.calcsize('<HQH')
+        levels = []
+        for _ in range(depth):
+            (length,) = struct.unpack_from('<I', data, offset)
+            offset += 4
+            levels.append(list(struct.unpack_from(f'<{length}d', data, offset)))
+            offset += 8 * length
+        return cls(k=k, levels=levels, n=n)
+
+
+class FixedHistogram:
+    """Counts in ``bins`` equal-width bins from 0; the last bin is open-ended"""
+
+    def __init__(self, width, bins, counts=None):
+        self.width = width
+        self.bins = bins
+        self.counts = list(counts) if counts is not None else [0] * bins
+
+    def add(self, value):
+        index = min(self.bins - 1, max(0, int(float(value) // self.width)))
+        self.counts[index] += 1
+        return True
+
+    def merge(self, other):
+        if (other.width, other.bins) != (self.width, self.bins):
+            raise ValueError('Cannot merge histograms with different bins')
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def buckets(self):
+        result = []
+        for index, count in enumerate(self.counts):
+            low = index * self.width
+            high = None if index == self.bins - 1 else low + self.width
+            result.append({'low': low, 'high': high, 'count': count})
+        return result
+
+    def to_bytes(self):
+        return struct.pack(f'<dI{self.bins}Q', self.width, self.bins, *self.counts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        width, bins = struct.unpack_from('<dI', data)
+        counts = struct.unpack_from(f'<{bins}Q', data, struct.calcsize('<dI'))
+        return cls(width, bins, counts)
+
+
+def load(name, factory):
+    """Return (sketch, rows seen) for ``name``; a fresh sketch if none is stored"""
+    return load_many([name], factory)[name]
+
+
+def load_many(names, factory):
+    """Like load() for several sketches, in one query"""
+    rows = dict(
+        (name, (data, count))
+        for name, data, count in AnalyticsSketch.objects.filter(name__in=names).values_list('name', 'data', 'count')
+    )
+    result = {}
+    for name in names:
+        data, count = rows.get(name, (b'', 0))
+        result[name] = (factory.from_bytes(data) if data else factory(), count)
+    return result
+
+
+def _in_sqlite_transaction():
+    """SQLite inside a transaction: the snapshot read is current (a stale one cannot write) and there are no row locks"""
+    return connection.in_atomic_block and not connection.features.has_select_for_update
+
+
+def update(factory, changes, counter=None):
+    """
+    Apply idempotent changes to stored sketches.
+
+    ``changes`` maps sketch names to ``apply(sketch)`` callables that mutate
+    the sketch and return whether it changed. Most HyperLogLog adds leave
+    every register alone, so the common path is a single unlocked read; only
+    sketches that really change are re-read under a row lock and written back.
+    Inside a SQLite transaction they are written back without the re-read.
+
+    ``counter`` names a row whose count goes up by one, such as the rows a
+    reservoir has seen. Returns the changed names and the counter's new
+    count (None without one). Inside a SQLite transaction the counter is
+    read and written along with the sketches: one read and one upsert.
+    """
+    if not _in_sqlite_transaction():
+        loaded = load_many(list(changes), factory)
+        changed = [name for name, apply in changes.items() if apply(loaded[name][0])]
+        if changed:
+            modify(factory, {name: changes[name] for name in changed})
+        return changed, increment(counter) if counter else None
+
+    rows = dict(
+        (name, (data, count))
+        for name, data, count in AnalyticsSketch.objects.filter(
+            name__in=[*changes, *([counter] if counter else [])]).values_list('name', 'data', 'count')
+    )
+    writes = []
+    changed = []
+    for name, apply in changes.items():
+        data = rows.get(name, (b'', 0))[0]
+        sketch = factory.from_bytes(data) if data else factory()
+        if apply(sketch):
+            changed.append(name)
+            writes.append((name, sketch.to_bytes(), 0))
+    seen = None
+    if counter:
+        data, count = rows.get(counter, (b'', 0))
+        seen = count + 1
+        writes.append((counter, data, 1))
+    if writes:
+        _write(writes)
+    return changed, seen
+
+
+def _write(rows):
+    """Store ``rows`` ([(name, data, count)]) with one upsert; ``count`` is added to the stored count"""
+    table = connection.ops.quote_name(AnalyticsSketch._meta.db_table)
+    column = connection.ops.quote_name('count')
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    for name, data, count in rows:
+        params.extend([name, data, count, now])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (name, data, {column}, updated_at) '
+            f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(rows))} '
+            f'ON CONFLICT (name) DO UPDATE SET data = excluded.data, '
+            f'{column} = {table}.{column} + excluded.{column}, updated_at = excluded.updated_at',
+            params,
+        )
+
+
+def _claim(names):
+    """Insert empty rows for ``names`` unless they exist, so they can be locked"""
+    table = connection.ops.quote_name(AnalyticsSketch._meta.db_table)
+    column = connection.ops.quote_name('count')
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = []
+    for name in names:
+        params.extend([name, b'', now])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (name, data, {column}, updated_at) '
+            f'VALUES {", ".join(["(%s, %s, 0, %s)"] * len(names))} '
+            f'ON CONFLICT (name) DO NOTHING',
+            params,
+        )
+
+
+def modify(factory, changes, count=0):
+    """
+    Read-modify-write sketches under row locks.
+
+    Use this for changes that are not idempotent (quantile sketch adds,
+    histogram counts). ``count`` is added to each row's count. Rows that do
+    not exist yet are inserted empty with ON CONFLICT DO NOTHING and locked
+    like the others, so concurrent first writers queue instead of colliding
+    on the unique name. Inside a SQLite transaction the result is written
+    back with one upsert, as in update().
+    """
+    names = list(changes)
+    if _in_sqlite_transaction():
+        loaded = load_many(names, factory)
+        for name, apply in changes.items():
+            apply(loaded[name][0])
+        _write([(name, loaded[name][0].to_bytes(), count) for name in names])
+        return
+    # No savepoint when nested in a transaction: a failure here aborts it anyway
+    with transaction.atomic(savepoint=False):
+        rows = {row.name: row for row in AnalyticsSketch.objects.select_for_update().filter(name__in=names)}
+        missing = [name for name in names if name not in rows]
+        if missing:
+            _claim(missing)
+            rows.update(
+                (row.name, row) for row in AnalyticsSketch.objects.select_for_update().filter(name__in=missing))
+        now = timezone.now()
+        for name, apply in changes.items():
+            row = rows[name]
+            sketch = factory.from_bytes(row.data) if row.data else factory()
+            apply(sketch)
+            row.data = sketch.to_bytes()
+            row.count += count
+            row.updated_at = now
+        # One UPDATE for all rows instead of one per sketch
+        AnalyticsSketch.objects.bulk_update(list(rows.values()), ['data', 'count', 'updated_at'])
+
+
+def increment(name):
+    """Atomically add one to the row count of ``name`` and return the new value"""
+    table = connection.ops.quote_name(AnalyticsSketch._meta.db_table)
+    count = connection.ops.quote_name('count')
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    # INSERT ... ON CONFLICT ... RETURNING needs PostgreSQL or SQLite 3.35+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (name, data, {count}, updated_at) VALUES (%s, %s, 1, %s) '
+            f'ON CONFLICT (name) DO UPDATE SET {count} = {table}.{count} + 1, updated_at = excluded.updated_at '
+            f'RETURNING {count}',
+            [name, b'', now],
+        )
+        return cursor.fetchone()[0]
+
+
+def store(name, sketch, count):
+    AnalyticsSketch.objects.update_or_create(name=name, defaults={'data': sketch.to_bytes(), 'count': count})
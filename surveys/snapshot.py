@@ -0,0 +1,396 @@
+"""
+Memory-mapped analytics snapshot shared by the workers on a host.
+
+``write()`` stores the survey rows grouped by every filterable dimension
+and price in one file at SNAPSHOT_PATH. It writes a temporary file and renames it over the old one,
+so readers see either the old or the new snapshot, never a partial one.
+Workers map the file read-only and read its columns through memoryviews,
+so N gunicorn workers share one page-cache copy instead of building N
+in-process copies.
+
+File layout: an 8 byte magic, the header length (uint32), a JSON header
+with per-type row counts, ``max_pk``, value dictionaries and column offsets,
+then 8-byte aligned native-endian ``groups.*`` columns (ordered by price,
+so a price range is a bisect).
+
+A snapshot covers rows up to its ``max_pk``; ``grouped()`` adds newer rows
+from the database (one narrow query per survey type), so results stay
+exact between rebuilds. When newer rows exist and the snapshot is older
+than SNAPSHOT_MAX_AGE_SECONDS, or more than SNAPSHOT_MAX_DELTA_ROWS of them
+pile up, one process per host rebuilds the file in a background thread.
+A snapshot written from another database (a test run, a different
+DATABASE_URL) is treated as missing.
+
+Edits and deletes are not tracked: the admin discards the snapshot after
+both, anything else that changes or deletes rows must be followed by
+``manage.py rebuild_snapshot``. On PostgreSQL a submission that commits
+after a rebuild read the table with a lower id than rows it already saw is
+only counted from the next rebuild.
+"""
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .filters import PRICE_FIELDS
+from .models import StudentSurvey, TeacherSurvey
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SVYSNAP1'
+PREFIX = struct.Struct('<8sI')
+ALIGN = 8
+CODE_TYPE = 'H'
+
+SURVEY_MODELS = {
+    'student': StudentSurvey,
+    'teacher': TeacherSurvey,
+}
+
+# Dictionary-encoded dimensions per survey type: snapshot key -> model field
+DIMENSIONS = {
+    'student': {
+        'gender': 'gender',
+        'age_range': 'age_range',
+        'frequency': 'preferred_frequency',
+        'session_length': 'preferred_session_length',
+        'willing': 'willing_to_try',
+    },
+    'teacher': {
+        'gender': 'gender',
+        'age_range': 'age_range',
+        'session_length': 'preferred_session_length',
+        'willing': 'would_join_platform',
+    },
+}
+
+
+def enabled():
+    return getattr(settings, 'SNAPSHOT_ENABLED', True)
+
+
+def snapshot_path():
+    return os.fspath(getattr(settings, 'SNAPSHOT_PATH', os.path.join(settings.BASE_DIR, 'analytics.snapshot')))
+
+
+def database_identity():
+    config = connections[DEFAULT_DB_ALIAS].settings_dict
+    return f"{connections[DEFAULT_DB_ALIAS].vendor}:{config.get('HOST', '')}:{config.get('PORT', '')}:{config['NAME']}"
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _cents(price):
+    return int(price * 100)
+
+
+def build(survey_type):
+    """Header entry and column arrays for one survey type, read from the database"""
+    model = SURVEY_MODELS[survey_type]
+    keys = list(DIMENSIONS[survey_type])
+    codes = {key: {} for key in keys}
+    groups = Counter()
+    count = max_pk = 0
+
+    fields = [DIMENSIONS[survey_type][key] for key in keys]
+    rows = model.objects.order_by('pk').values_list('pk', PRICE_FIELDS[survey_type], *fields)
+    for pk, price, *values in rows.iterator(chunk_size=10000):
+        group = [_cents(price)]
+        for key, value in zip(keys, values):
+            group.append(codes[key].setdefault(value, len(codes[key])))
+        groups[tuple(group)] += 1
+        count, max_pk = count + 1, pk
+
+    ordered = sorted(groups.items())
+    columns = {}
+    columns['groups.price'] = array('q', (group[0] for group, _ in ordered))
+    columns['groups.count'] = array('q', (count for _, count in ordered))
+    for index, key in enumerate(keys, 1):
+        columns[f'groups.{key}'] = array(CODE_TYPE, (group[index] for group, _ in ordered))
+
+    meta = {
+        'rows': count,
+        'max_pk': max_pk,
+        'groups': len(ordered),
+        'dictionaries': {key: list(values) for key, values in codes.items()},
+    }
+    return meta, columns
+
+
+def write(path=None):
+    """Rebuild the snapshot from the database and atomically replace the file"""
+    path = path or snapshot_path()
+    tables = {}
+    blobs = []
+    offset = 0
+    for survey_type in SURVEY_MODELS:
+        meta, columns = build(survey_type)
+        meta['columns'] = {}
+        for name, values in columns.items():
+            offset = _align(offset)
+            meta['columns'][name] = [offset, values.typecode, len(values)]
+            blobs.append((offset, values.tobytes()))
+            offset += len(values) * values.itemsize
+        tables[survey_type] = meta
+
+    header = json.dumps({
+        'generated_at': time.time(),
+        'byteorder': sys.byteorder,
+        'database': database_identity(),
+        'tables': tables,
+    }).encode()
+    data_start = _align(PREFIX.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(PREFIX.pack(MAGIC, len(header)))
+            fh.write(header)
+            for blob_offset, blob in blobs:
+                fh.seek(data_start + blob_offset)
+                fh.write(blob)
+            # An empty snapshot still needs one byte to be mappable
+            fh.truncate(max(data_start + offset, PREFIX.size + len(header), 1))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    logger.info("Analytics snapshot written: %s", {
+        survey_type: meta['rows'] for survey_type, meta in tables.items()
+    })
+    return tables
+
+
+class Table:
+    """One survey type's columns; ``codes`` maps dimension values back to their codes"""
+
+    def __init__(self, meta, columns):
+        self.rows = meta['rows']
+        self.max_pk = meta['max_pk']
+        self.dictionaries = meta['dictionaries']
+        self.codes = {
+            key: {value: code for code, value in enumerate(values)} for key, values in self.dictionaries.items()
+        }
+        self.columns = columns
+
+
+class Snapshot:
+    """A mapped snapshot file; columns are zero-copy views into the shared mapping"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as fh:
+            stat = os.fstat(fh.fileno())
+            self.mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        magic, length = PREFIX.unpack_from(self.mapping)
+        if magic != MAGIC:
+            raise ValueError('not an analytics snapshot')
+        self.header = json.loads(self.mapping[PREFIX.size:PREFIX.size + length])
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError('snapshot was written on a host with a different byte order')
+        self.generated_at = self.header['generated_at']
+        self.database = self.header.get('database')
+
+        data_start = _align(PREFIX.size + length)
+        view = memoryview(self.mapping)
+        self.tables = {}
+        for survey_type, meta in self.header['tables'].items():
+            columns = {}
+            for name, (offset, typecode, count) in meta['columns'].items():
+                start = data_start + offset
+                columns[name] = view[start:start + count * array(typecode).itemsize].cast(typecode)
+            self.tables[survey_type] = Table(meta, columns)
+
+
+_lock = threading.Lock()
+_current = None
+_rebuild_thread = None
+
+
+def current():
+    """The mapped snapshot, remapped after the file is replaced; None when there is none"""
+    global _current
+    if not enabled():
+        return None
+    path = snapshot_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    snapshot = _current
+    if snapshot is None or snapshot.path != path or snapshot.identity != (stat.st_ino, stat.st_mtime_ns):
+        with _lock:
+            try:
+                # The old mapping stays valid for requests still reading it
+                snapshot = _current = Snapshot(path)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning("Ignoring unreadable analytics snapshot %s: %s", path, exc)
+                return None
+    return snapshot if snapshot.database == database_identity() else None
+
+
+def discard():
+    """Remove the snapshot (after deletes); workers fall back to SQL until it is rebuilt"""
+    try:
+        os.unlink(snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def _rebuild_lock():
+    """Yield True when this process may rebuild, False when another one already is"""
+    if fcntl is None:
+        yield True
+        return
+    with open(f'{snapshot_path()}.lock', 'a') as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _rebuild(stale):
+    try:
+        with _rebuild_lock() as acquired:
+            fresh = current()
+            # Skip when another process replaced the file while this one waited
+            if acquired and (fresh is None or fresh.identity == stale):
+                write()
+    except Exception:
+        logger.exception("Analytics snapshot rebuild failed")
+    finally:
+        connections.close_all()
+
+
+def request_rebuild(snapshot=None):
+    """Rebuild the snapshot in a background thread, unless one is already running"""
+    global _rebuild_thread
+    with _lock:
+        if _rebuild_thread is not None and _rebuild_thread.is_alive():
+            return
+        stale = snapshot.identity if snapshot is not None else None
+        _rebuild_thread = threading.Thread(target=_rebuild, args=(stale,), name='surveys-snapshot', daemon=True)
+        _rebuild_thread.start()
+
+
+def key_index(survey_type):
+    """Position of 'price' and each dimension in the keys returned by ``grouped()``"""
+    return {key: position for position, key in enumerate(('price',) + tuple(DIMENSIONS[survey_type]))}
+
+
+def _terms(table, survey_type, plan):
+    """Allowed code per dimension and the price bounds in cents, or None if a filter is not covered"""
+    keys = {field: key for key, field in DIMENSIONS[survey_type].items()}
+    equal, low, high = {}, None, None
+    for flt, value in plan.active(survey_type):
+        field = flt.fields[survey_type]
+        if not flt.q(survey_type, value):
+            # Constrains nothing, e.g. exclude_duplicates=0
+            continue
+        if field == PRICE_FIELDS[survey_type] and flt.lookup == 'gte':
+            low = max(low or 0, math.ceil(value * 100))
+        elif field == PRICE_FIELDS[survey_type] and flt.lookup == 'lte':
+            high = min(high, math.floor(value * 100)) if high is not None else math.floor(value * 100)
+        elif field in keys and flt.lookup == 'exact':
+            equal[keys[field]] = table.codes[keys[field]].get(value)
+        else:
+            return None
+    return equal, low, high
+
+
+def _snapshot_groups(table, survey_type, equal, low, high):
+    groups = Counter()
+    if any(code is None for code in equal.values()):
+        # A value the snapshot has never seen matches none of its rows
+        return groups
+    columns = table.columns
+    prices = columns['groups.price']
+    start = bisect_left(prices, low) if low is not None else 0
+    stop = bisect_right(prices, high) if high is not None else len(prices)
+    keys = list(DIMENSIONS[survey_type])
+    checks = [(keys.index(key), code) for key, code in equal.items()]
+    dictionaries = [table.dictionaries[key] for key in keys]
+    selected = [columns['groups.price'][start:stop], columns['groups.count'][start:stop]]
+    selected += [columns[f'groups.{key}'][start:stop] for key in keys]
+    for price, count, *codes in zip(*selected):
+        if checks and any(codes[position] != code for position, code in checks):
+            continue
+        # Groups are unique per code combination, so no summing is needed here
+        groups[(price, *[dictionary[code] for dictionary, code in zip(dictionaries, codes)])] = count
+    return groups
+
+
+def grouped(plan):
+    """
+    Matching rows of each survey type, counted per (price in cents, *dimension values).
+
+    Dimension values are in DIMENSIONS order; ``key_index()`` gives positions by name. Returns None when there is no
+    usable snapshot or the plan filters on something it does not cover; the
+    caller then answers from SQL.
+    """
+    snapshot = current()
+    if snapshot is None:
+        if enabled():
+            request_rebuild()
+        return None
+
+    limit = getattr(settings, 'SNAPSHOT_MAX_DELTA_ROWS', 5000)
+    max_age = getattr(settings, 'SNAPSHOT_MAX_AGE_SECONDS', 300)
+    result = {}
+    stale = False
+    for survey_type, model in SURVEY_MODELS.items():
+        table = snapshot.tables.get(survey_type)
+        terms = _terms(table, survey_type, plan) if table is not None else None
+        if terms is None:
+            return None
+        groups = _snapshot_groups(table, survey_type, *terms)
+
+        fields = [PRICE_FIELDS[survey_type]] + list(DIMENSIONS[survey_type].values())
+        newer = list(model.objects.filter(pk__gt=table.max_pk).order_by().values_list(*fields)[:limit + 1])
+        if len(newer) > limit:
+            request_rebuild(snapshot)
+            return None
+        for row in newer:
+            values = dict(zip(fields, row))
+            if plan.matches(survey_type, values.get):
+                groups[(_cents(row[0]),) + tuple(row[1:])] += 1
+        stale = stale or bool(newer)
+        result[survey_type] = groups
+
+    if stale and time.time() - snapshot.generated_at >= max_age:
+        request_rebuild(snapshot)
+    return result
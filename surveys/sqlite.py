@@ -0,0 +1,89 @@
+"""
+SQLite profile for deployments without DATABASE_URL.
+
+With SQLITE_PROFILE='concurrent' (the default) every new SQLite connection
+switches the database to WAL, so readers never block the writer, and applies
+the synchronous/mmap/cache/busy-timeout PRAGMAs below. Submissions then go
+through ``serialized_write()``, which takes an exclusive lock on a file next
+to the database before opening the transaction: concurrent gunicorn workers
+queue on the lock instead of racing for SQLite's write lock and failing with
+"database is locked", and the row plus its rollup updates commit together.
+On PostgreSQL submissions stay in autocommit, as before.
+
+SQLITE_PROFILE='default' keeps Django's stock behaviour (rollback journal,
+no write lock), which ``benchmark_sqlite_writes`` uses as its baseline.
+"""
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def concurrent_profile():
+    return getattr(settings, 'SQLITE_PROFILE', 'concurrent') == 'concurrent'
+
+
+def pragmas():
+    return {
+        'journal_mode': 'WAL',
+        # Durable across application crashes; a power loss can drop the last commits
+        'synchronous': 'NORMAL',
+        'busy_timeout': getattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'cache_size': -getattr(settings, 'SQLITE_CACHE_SIZE_KB', 65536),
+        'mmap_size': getattr(settings, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'temp_store': 'MEMORY',
+    }
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not concurrent_profile():
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def _lock_path():
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' or fcntl is None or not concurrent_profile():
+        return None
+    if connection.is_in_memory_db():
+        return None
+    return f"{os.fspath(connection.settings_dict['NAME'])}.write-lock"
+
+
+@contextmanager
+def serialized_write():
+    """
+    One atomic write transaction, serialized across processes on SQLite.
+
+    Other databases keep autocommit: one request-long transaction would hold
+    the row locks of the shared rollup rows (sketches, daily counts, term
+    frequencies) until commit and so run every submission one at a time.
+    So does SQLite without the lock file (SQLITE_PROFILE='default', in-memory
+    databases, no fcntl), as stock Django would. Do not nest: the file lock
+    is not re-entrant.
+    """
+    if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+        yield
+        return
+    path = _lock_path()
+    if path is None:
+        yield
+        return
+    with open(path, 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            with transaction.atomic():
+                yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from surveys import approx, filters, sketches
+from surveys.models import AnalyticsSketch
+from surveys.tests.utils import student
+
+
+class ApproximateAnalyticsTests(TestCase):
+    def test_small_tables_are_sampled_completely(self):
+        cache.clear()
+        client = APIClient()
+        for index, gender in enumerate(['male', 'male', 'female']):
+            response = client.post('/api/student-surveys/', student(index, gender=gender), format='json',
+                                   REMOTE_ADDR=f'10.0.0.{index % 2}')
+            self.assertEqual(response.status_code, 201)
+
+        result = approx.filtered_analytics(filters.parse({'gender': 'male'}, filters.ANALYTICS_FILTERS))
+        self.assertEqual(result['sample_size']['students'], 3)
+        # Every row is in the reservoir, so the estimate is exact
+        self.assertEqual(result['total_students'], {'count': 2, 'ci_low': 2, 'ci_high': 2})
+
+    def test_update_counts_the_counter_row(self):
+        changed, seen = sketches.update(sketches.HyperLogLog, {'hll:x': lambda hll: hll.add('a')}, counter='seen:x')
+        self.assertEqual((changed, seen), (['hll:x'], 1))
+        changed, seen = sketches.update(sketches.HyperLogLog, {'hll:x': lambda hll: hll.add('a')}, counter='seen:x')
+        self.assertEqual((changed, seen), ([], 2))
+        self.assertEqual(AnalyticsSketch.objects.get(name='seen:x').count, 2)
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_merge_estimates_the_union(self):
+        first, second = sketches.HyperLogLog(), sketches.HyperLogLog()
+        for value in range(6000):
+            first.add(f'ip-{value}')
+        for value in range(4000, 10000):
+            second.add(f'ip-{value}')
+        first.merge(second)
+        self.assertAlmostEqual(first.count(), 10000, delta=10000 * 4 * first.standard_error)
+        restored = sketches.HyperLogLog.from_bytes(first.to_bytes())
+        self.assertEqual(restored.count(), first.count())
@@ -0,0 +1,43 @@
+from collections import Counter
+
+from django.test import SimpleTestCase, TestCase
+
+from surveys import assignment
+from surveys.models import MatchAssignment
+from surveys.tests.utils import add_student, add_teacher
+
+
+class GreedyAssignmentTests(SimpleTestCase):
+    def test_capacity_is_respected(self):
+        students = [(pk, 100 + pk, 30, 'male', {'Tajweed'}) for pk in range(5)]
+        teachers = [(1, 90, 30, 'male', {'Tajweed'}, 2), (2, 50, 30, 'male', {'Tajweed', 'Hifz'}, 1)]
+        matches = assignment.assign(students, teachers)
+        self.assertEqual(Counter(teacher for _, teacher, _, _ in matches), {1: 2, 2: 1})
+        # Cheapest budgets first, each to the cheapest teacher with a seat left
+        self.assertEqual([(student, teacher) for student, teacher, _, _ in matches], [(0, 2), (1, 1), (2, 1)])
+
+    def test_budget_gender_and_session_length(self):
+        teachers = [(1, 150, 30, 'female', {'Tajweed'}, 10)]
+        self.assertEqual(assignment.assign([(1, 140, 30, 'female', {'Tajweed'})], teachers), [])
+        self.assertEqual(len(assignment.assign([(1, 140, 30, 'female', {'Tajweed'})], teachers, tolerance=0.1)), 1)
+        self.assertEqual(assignment.assign([(1, 200, 30, 'male', {'Tajweed'})], teachers), [])
+        self.assertEqual(len(assignment.assign([(1, 200, 30, 'male', {'Tajweed'})], teachers, gender_policy='any')), 1)
+        self.assertEqual(assignment.assign([(1, 200, 45, 'female', {'Tajweed'})], teachers), [])
+
+
+class AssignmentRunTests(TestCase):
+    def test_incremental_run_uses_the_capacity_left(self):
+        teacher = add_teacher(0, ['Tajweed'], 30, 100, 2, gender='male')
+        for index in range(2):
+            add_student(index, ['Tajweed'], 30, 150, gender='male')
+        self.assertEqual(assignment.run()['assigned'], 2)
+
+        late = add_student(2, ['Tajweed'], 30, 150, gender='male')
+        summary = assignment.run(incremental=True)
+        self.assertEqual((summary['students_considered'], summary['assigned']), (1, 0))
+        self.assertFalse(MatchAssignment.objects.filter(student=late).exists())
+
+        teacher.students_per_week = 3
+        teacher.save()
+        self.assertEqual(assignment.run(incremental=True)['assigned'], 1)
+        self.assertEqual(MatchAssignment.objects.filter(teacher=teacher).count(), 3)
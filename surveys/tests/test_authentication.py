@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from surveys import authentication
+from surveys.authentication import CachedJWTAuthentication
+
+
+@override_settings(JWT_CACHE_SINGLE_PROCESS=True)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        authentication.clear()
+        self.addCleanup(authentication.clear)
+        self.user = User.objects.create_user('analyst', password='pw')
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def authenticate(self):
+        return CachedJWTAuthentication().authenticate(self.request)[0]
+
+    def test_cached_user_is_a_copy(self):
+        first = self.authenticate()
+        first._perm_cache = {'surveys.add_job'}
+        with self.assertNumQueries(0):
+            second = self.authenticate()
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertIsNot(second, first)
+        self.assertFalse(hasattr(second, '_perm_cache'))
+        self.assertIsNot(self.authenticate(), second)
+
+    def test_saving_the_user_invalidates_its_tokens(self):
+        self.authenticate()
+        self.user.is_staff = True
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.authenticate().is_staff)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @override_settings(JWT_CACHE_SINGLE_PROCESS=False,
+                       CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_off_without_a_shared_cache(self):
+        # A per-process cache would miss another worker's bump
+        self.assertFalse(authentication.enabled())
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
@@ -0,0 +1,70 @@
+import gzip
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from surveys import compression
+from surveys.factories import seed_surveys
+
+
+class NegotiationTests(SimpleTestCase):
+    def test_preference_and_quality_values(self):
+        with mock.patch.object(compression, 'encodings', return_value=('br', 'gzip')):
+            self.assertEqual(compression.negotiate('gzip, deflate, br'), 'br')
+            self.assertEqual(compression.negotiate('gzip, br;q=0'), 'gzip')
+            self.assertEqual(compression.negotiate('*'), 'br')
+            self.assertEqual(compression.negotiate('*, br;q=0'), 'gzip')
+            self.assertIsNone(compression.negotiate('identity'))
+            self.assertIsNone(compression.negotiate(''))
+
+    def test_gzip_only_without_brotli(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(compression.negotiate('br, gzip'), 'gzip')
+            self.assertIsNone(compression.negotiate('br'))
+
+
+class CompressedResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_surveys(students=200, teachers=20, seed=3)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('analyst', password='pw'))
+
+    def assertEncoded(self, path, encoding, decompress):
+        plain = self.client.get(path)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(path, HTTP_ACCEPT_ENCODING=f'{encoding}, identity;q=0.5')
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(decompress(response.content), plain.content)
+        return plain, response
+
+    def test_middleware_compresses_large_json(self):
+        self.assertEncoded('/api/users/list/?page_size=100', 'gzip', gzip.decompress)
+
+    def test_small_json_is_left_alone(self):
+        response = self.client.get('/api/users/list/?page_size=1', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_precompressed_variant_has_its_own_etag(self):
+        plain, response = self.assertEncoded('/api/analytics/students/', 'gzip', gzip.decompress)
+        self.assertEqual(response['ETag'], plain['ETag'][:-1] + '-gzip"')
+        revalidated = self.client.get('/api/analytics/students/', HTTP_ACCEPT_ENCODING='gzip',
+                                      HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertIn('Accept-Encoding', revalidated['Vary'])
+
+    @unittest.skipIf(compression.brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        self.assertEncoded('/api/users/list/?page_size=100', 'br', compression.brotli.decompress)
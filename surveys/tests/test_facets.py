@@ -0,0 +1,70 @@
+import random
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from surveys.facets import facet_counts
+from surveys.factories import build_student
+from surveys.models import StudentSurvey
+
+
+def add(index, willing, length):
+    survey = build_student(random.Random(index), index)
+    survey.willing_to_try = willing
+    survey.preferred_session_length = length
+    survey.save()
+    return survey
+
+
+@override_settings(FACET_CACHE_SECONDS=60)
+class FacetCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.model_admin = admin.site._registry[StudentSurvey]
+        for index, (willing, length) in enumerate([(True, 30), (True, 30), (True, 45), (False, 30)]):
+            add(index, willing, length)
+
+    def counts(self, **params):
+        request = RequestFactory().get('/admin/surveys/studentsurvey/', params)
+        request.user = self.admin
+        changelist = self.model_admin.get_changelist_instance(request)
+        return {name: counts for name, (_values, counts) in facet_counts(changelist).items()}
+
+    def test_counts_under_the_other_selected_facets(self):
+        counts = self.counts()
+        self.assertEqual(counts['willing_to_try__exact'], {True: 3, False: 1})
+        self.assertEqual(counts['preferred_session_length__exact'], {30: 3, 45: 1})
+
+        counts = self.counts(willing_to_try__exact='1')
+        # A facet's own selection does not narrow its counts
+        self.assertEqual(counts['willing_to_try__exact'], {True: 3, False: 1})
+        self.assertEqual(counts['preferred_session_length__exact'], {30: 2, 45: 1})
+
+        counts = self.counts(willing_to_try__exact='1', preferred_session_length__exact='45')
+        self.assertEqual(counts['willing_to_try__exact'], {True: 1})
+        self.assertEqual(counts['preferred_session_length__exact'], {30: 2, 45: 1})
+
+    def test_search_hides_the_counts(self):
+        self.assertIsNone(self.counts(q='teacher')['willing_to_try__exact'])
+
+    def test_summary_is_kept_across_submissions(self):
+        self.counts()
+        add(10, False, 45)
+        request = RequestFactory().get('/admin/surveys/studentsurvey/')
+        request.user = self.admin
+        changelist = self.model_admin.get_changelist_instance(request)
+        with self.assertNumQueries(0):
+            counts = facet_counts(changelist)
+        self.assertEqual(counts['willing_to_try__exact'][1], {True: 3, False: 1})
+
+    def test_admin_edit_discards_the_summary(self):
+        self.counts()
+        survey = StudentSurvey.objects.filter(willing_to_try=False).get()
+        survey.willing_to_try = True
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        self.model_admin.save_model(request, survey, None, True)
+        self.assertEqual(self.counts()['willing_to_try__exact'], {True: 4})
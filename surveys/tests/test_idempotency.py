@@ -0,0 +1,44 @@
+import hashlib
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from surveys.models import StudentSurvey
+from surveys.tests.utils import student
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def post(self, payload, key, address='10.0.0.1'):
+        return self.client.post('/api/student-surveys/', payload, format='json', REMOTE_ADDR=address,
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_is_replayed(self):
+        first = self.post(student(1), 'key-1')
+        retry = self.post(student(1), 'key-1', address='10.0.0.2')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(StudentSurvey.objects.count(), 1)
+
+    def test_reused_key_with_other_body(self):
+        self.post(student(1), 'key-1')
+        response = self.post(student(2), 'key-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(StudentSurvey.objects.count(), 1)
+
+    def test_request_in_flight(self):
+        digest = hashlib.blake2b(b'key-1', digest_size=16).hexdigest()
+        cache.add(f'idempotency:student-survey:{digest}:lock', 1, 60)
+        response = self.post(student(1), 'key-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(StudentSurvey.objects.exists())
+
+    def test_malformed_key(self):
+        self.assertEqual(self.post(student(1), 'x' * 300).status_code, 400)
@@ -0,0 +1,56 @@
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from surveys import jobs
+from surveys.models import Job
+
+
+def crash(job_id):
+    # Runs in the pool's child process: die the way a segfault or OOM kill would
+    os._exit(1)
+
+
+class JobQueueTests(TestCase):
+    def test_exclusive_kind_is_queued_once(self):
+        jobs.enqueue('rebuild_snapshot')
+        with self.assertRaises(jobs.JobConflict):
+            jobs.enqueue('rebuild_snapshot')
+        Job.objects.update(status=Job.DONE)
+        jobs.enqueue('rebuild_snapshot')
+        self.assertEqual(Job.objects.filter(kind='rebuild_snapshot').count(), 2)
+
+    def test_params_are_checked_against_the_handler(self):
+        with self.assertRaises(jobs.InvalidParams):
+            jobs.enqueue('export_surveys', {'bogus': 1})
+        with self.assertRaises(jobs.InvalidParams):
+            jobs.enqueue('export_surveys', {'job': 1})
+        self.assertEqual(jobs.enqueue('export_surveys', {'survey_type': 'teacher'}).params, {'survey_type': 'teacher'})
+        self.assertFalse(Job.objects.filter(params__has_key='bogus').exists())
+
+    def test_lost_jobs_are_requeued_until_out_of_attempts(self):
+        first, second, done = (jobs.enqueue('export_surveys') for _ in range(3))
+        Job.objects.filter(pk__in=[first.pk, second.pk, done.pk]).update(status=Job.RUNNING, attempts=1)
+        Job.objects.filter(pk=second.pk).update(attempts=3)
+        Job.objects.filter(pk=done.pk).update(status=Job.DONE)
+        self.assertEqual(jobs.requeue_lost([first.pk, second.pk, done.pk]), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual((statuses[first.pk], statuses[second.pk], statuses[done.pk]),
+                         (Job.QUEUED, Job.FAILED, Job.DONE))
+
+
+class WorkerCrashTests(TestCase):
+    def test_dead_child_process_does_not_strand_its_job(self):
+        job = jobs.enqueue('export_surveys')
+        output, errors = StringIO(), StringIO()
+        with mock.patch('surveys.worker.execute', crash), mock.patch('signal.signal'):
+            call_command('run_worker', '--burst', '--processes', '1', '--poll', '0.1', stdout=output, stderr=errors)
+
+        # Requeued after each crash, then failed once out of attempts; the worker keeps running throughout
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.FAILED, 3, 'Worker process died'))
+        self.assertEqual(errors.getvalue().count('Worker process died'), 3)
+        self.assertIn('Worker stopped', output.getvalue())
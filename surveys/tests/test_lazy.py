@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from surveys.lazy import lazy_view
+
+# Resolving every lazy route must not import its view module
+COLD_START = '''
+import os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'my_survey.settings')
+import django
+django.setup()
+from django.urls import resolve
+for path in ('/api/jobs/', '/api/analytics/filtered/', '/api/users/list/', '/api/token/'):
+    resolve(path)
+print(' '.join(name for name in ('surveys.job_views', 'surveys.analytics_views', 'rest_framework_simplejwt.views')
+               if name in sys.modules))
+'''
+
+
+class LazyViewTests(SimpleTestCase):
+    def test_view_module_is_imported_on_first_request(self):
+        result = subprocess.run([sys.executable, '-c', COLD_START], capture_output=True, text=True,
+                                cwd=settings.BASE_DIR, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_target_is_imported_once(self):
+        target = mock.Mock(return_value=HttpResponse('ok'))
+        with mock.patch('surveys.lazy.import_string', return_value=target) as import_string:
+            view = lazy_view('surveys.job_views.job_list')
+            self.assertEqual((view.__module__, view.__name__, view.csrf_exempt),
+                             ('surveys.job_views', 'job_list', True))
+            import_string.assert_not_called()
+
+            request = RequestFactory().get('/api/jobs/')
+            view(request)
+            view(request, job_id=1)
+        import_string.assert_called_once_with('surveys.job_views.job_list')
+        target.assert_called_with(request, job_id=1)
@@ -0,0 +1,54 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from surveys import matching
+from surveys.tests.utils import add_student, add_teacher
+
+
+@override_settings(MATCHING_REPORT_CACHE_SECONDS=60)
+class MatchingReportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for index, price in enumerate((100, 200, 300)):
+            add_student(index, ['Tajweed'], 30, price)
+        add_teacher(0, ['Tajweed'], 30, 150, 2)
+        add_teacher(1, ['Hifz'], 60, 50, 5)
+
+    def test_buckets(self):
+        buckets = {(row['subject'], row['session_length']): row for row in matching.report()['buckets']}
+        self.assertEqual(set(buckets), {('Tajweed', 30), ('Hifz', 60)})
+        tajweed = buckets['Tajweed', 30]
+        self.assertEqual(
+            {key: tajweed[key] for key in ('demand', 'teachers', 'capacity', 'gap', 'median_price', 'median_rate',
+                                           'affordability', 'students_above_median_rate')},
+            {'demand': 3, 'teachers': 1, 'capacity': 2, 'gap': 1, 'median_price': 200.0, 'median_rate': 150.0,
+             'affordability': 0.667, 'students_above_median_rate': 2},
+        )
+        hifz = buckets['Hifz', 60]
+        self.assertEqual((hifz['demand'], hifz['capacity'], hifz['capacity_ratio'], hifz['gap']), (0, 5, None, -5))
+
+    def test_report_is_kept_for_its_ttl(self):
+        first = matching.report()
+        add_student(3, ['Tajweed'], 30, 400)
+        # New submissions do not invalidate the report
+        self.assertEqual(matching.report(), first)
+
+        expired = time.time() + 61
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=expired):
+            rebuilt = matching.report()
+        self.assertEqual([row['demand'] for row in rebuilt['subjects'] if row['subject'] == 'Tajweed'], [4])
+        self.assertGreaterEqual(rebuilt['generated_at'], first['generated_at'])
+
+    def test_endpoint_filters_buckets(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('analyst', password='pw'))
+        response = client.get('/api/analytics/matching/', {'subject': 'Hifz'})
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual([row['subject'] for row in report['buckets'] + report['subjects']], ['Hifz', 'Hifz'])
+        self.assertIn('generated_at', report)
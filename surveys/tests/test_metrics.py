@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from surveys import metrics
+from surveys.tests.utils import student
+
+
+class QueryMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+
+    def test_server_timing_header(self):
+        response = APIClient().get('/api/analytics/summary/')
+        self.assertEqual(response.status_code, 200)
+        timings = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual((timings[0], timings[-1]), ('db', 'total'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=\d+\.\d;desc="\d+ queries"')
+
+    def test_queries_are_counted_per_endpoint(self):
+        APIClient().post('/api/student-surveys/', student(1), format='json', REMOTE_ADDR='10.0.0.1')
+        endpoints = metrics.registry.snapshot()['endpoints']
+        self.assertEqual(len(endpoints), 1)
+        [(endpoint, stats)] = endpoints.items()
+        self.assertTrue(endpoint.startswith('POST '))
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreater(stats['max_queries'], 0)
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        self.client = APIClient()
+
+    def test_admin_only(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        self.client.force_authenticate(User.objects.create_user('staffless', password='pw'))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, 403)
+
+    def test_snapshot_and_reset(self):
+        self.client.get('/api/analytics/summary/')
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        endpoints = self.client.get('/api/metrics/').data['endpoints']
+        self.assertEqual([name for name in endpoints if name.startswith('GET ')], ['GET analytics-summary'])
+        self.assertEqual(endpoints['GET analytics-summary']['requests'], 1)
+
+        self.assertEqual(self.client.delete('/api/metrics/').status_code, 204)
+        # Only the DELETE itself has been recorded since the reset
+        self.assertEqual(list(self.client.get('/api/metrics/').data['endpoints']), ['DELETE request-metrics'])
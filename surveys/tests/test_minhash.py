@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from surveys import minhash
+from surveys.models import StudentSurvey
+from surveys.tests.utils import student
+
+
+class MinHashTests(TestCase):
+    answers = {
+        'teacher_challenges': 'hard to find a qualified teacher nearby and prices are too high',
+        'trust_factors': 'verified certificates and ratings from other students',
+        'desired_features': 'progress tracking and homework reminders',
+    }
+
+    def submit(self, index, address, **answers):
+        response = APIClient().post('/api/student-surveys/', student(index, **answers), format='json',
+                                    REMOTE_ADDR=address)
+        self.assertEqual(response.status_code, 201)
+        return StudentSurvey.objects.get(pk=response.data['id'])
+
+    def test_near_duplicates_are_flagged(self):
+        first = self.submit(1, '10.0.0.1', **self.answers)
+        copy = self.submit(2, '10.0.0.1', **dict(self.answers, desired_features='progress tracking and homework reminders please'))
+        other = self.submit(3, '10.0.0.2', teacher_challenges='my children need a patient female teacher for tajweed',
+                            trust_factors='recommendations from the mosque community',
+                            desired_features='flexible evening schedule with recorded lessons')
+        self.assertIsNone(first.duplicate_cluster)
+        self.assertIsNotNone(copy.duplicate_cluster)
+        self.assertIsNone(other.duplicate_cluster)
+        self.assertGreaterEqual(minhash.similarity(bytes(first.minhash), bytes(copy.minhash)), minhash.threshold())
+
+    def test_short_answers_must_match_exactly(self):
+        first = self.submit(1, '10.0.0.1')
+        copy = self.submit(2, '10.0.0.1')
+        other = self.submit(3, '10.0.0.1', teacher_challenges='hard to find female teachers')
+        elsewhere = self.submit(4, '10.0.0.2')
+        self.assertNotEqual(bytes(first.minhash), b'')
+        self.assertIsNone(first.duplicate_cluster)
+        self.assertIsNotNone(copy.duplicate_cluster)
+        self.assertIsNone(other.duplicate_cluster)
+        self.assertIsNone(elsewhere.duplicate_cluster)
+
+        self.assertEqual(minhash.rebuild(['student']), {'student': 1})
+        self.assertEqual(StudentSurvey.objects.get(pk=copy.pk).duplicate_cluster, copy.duplicate_cluster)
+
+    def test_surveys_without_open_text_are_not_signed(self):
+        survey = self.submit(1, '10.0.0.1', teacher_challenges='-', trust_factors='2024')
+        self.assertEqual(bytes(survey.minhash), b'')
+        self.assertIsNone(survey.duplicate_cluster)
+
+    def test_seeded_rows_are_signed(self):
+        call_command('generate_load', '--students', '20', '--teachers', '5', stdout=StringIO())
+        self.assertFalse(StudentSurvey.objects.filter(minhash=b'').exists())
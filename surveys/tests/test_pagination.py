@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.paginator import EmptyPage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from surveys import snapshot
+from surveys.factories import seed_surveys
+from surveys.models import StudentSurvey
+from surveys.pagination import EstimatedCountPaginator, estimated_count
+
+
+class EstimatedCountTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix='pagination-test-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(SNAPSHOT_PATH=f'{directory}/analytics.snapshot', ESTIMATED_COUNT_THRESHOLD=20)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        seed_surveys(students=30, seed=1)
+        snapshot.write()
+        # Rows the snapshot has not seen yet: the estimate is 5 short
+        seed_surveys(students=5, seed=2, start_index=30)
+
+    def test_estimate_only_for_large_unfiltered_tables(self):
+        students = StudentSurvey.objects.order_by('-pk')
+        self.assertEqual(estimated_count(students), 30)
+        self.assertIsNone(estimated_count(students.filter(gender='female')))
+        with override_settings(ESTIMATED_COUNT_THRESHOLD=31):
+            self.assertIsNone(estimated_count(students))
+
+    def test_pages_fetch_one_extra_row_instead_of_counting(self):
+        paginator = EstimatedCountPaginator(StudentSurvey.objects.order_by('-pk'), 10)
+        self.assertEqual((paginator.count, paginator.num_pages, paginator.estimated), (30, 3, True))
+
+        with self.assertNumQueries(1):
+            page = paginator.page(3)
+            self.assertEqual(len(page.object_list), 10)
+        self.assertTrue(page.has_next())
+
+        # Past the estimated last page
+        page = paginator.page(4)
+        self.assertEqual((len(page.object_list), page.has_next()), (5, False))
+        with self.assertRaises(EmptyPage):
+            paginator.page(5)
+
+    def test_user_list_flags_the_estimate(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('analyst', password='pw'))
+        response = client.get('/api/users/list/', {'user_type': 'student', 'page_size': 10})
+        self.assertEqual((response.data['total'], response.data['total_estimated']), (30, True))
+        response = client.get('/api/users/list/', {'user_type': 'student', 'gender': 'male', 'page_size': 10})
+        self.assertEqual(response.data['total'], StudentSurvey.objects.filter(gender='male').count())
+        self.assertFalse(response.data['total_estimated'])
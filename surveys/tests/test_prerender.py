@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from surveys.tests.utils import student
+
+
+class PrerenderedResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def summary(self, **headers):
+        return self.client.get('/api/analytics/summary/', **headers)
+
+    def test_if_none_match_returns_304(self):
+        first = self.summary()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['total_responses'], 0)
+        etag = first['ETag']
+
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            response = self.summary(HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual((response.content, response['ETag']), (b'', etag))
+        self.assertEqual(self.summary(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_new_data_changes_the_etag(self):
+        etag = self.summary()['ETag']
+        self.client.post('/api/student-surveys/', student(1), format='json', REMOTE_ADDR='10.0.0.1')
+        response = self.summary(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['total_responses'], 1)
+        self.assertEqual(self.summary(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
@@ -0,0 +1,77 @@
+import random
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from surveys import pricestats, sketches
+from surveys.models import AnalyticsSketch
+
+
+class SketchStorageTests(TestCase):
+    def test_modify_creates_missing_rows(self):
+        sketches.modify(pricestats.PriceStats, {'prices:a': lambda stats: stats.add(10)}, count=1)
+        sketches.modify(pricestats.PriceStats, {'prices:a': lambda stats: stats.add(30),
+                                                'prices:b': lambda stats: stats.add(20)}, count=1)
+        rows = {row.name: row for row in AnalyticsSketch.objects.all()}
+        self.assertEqual((rows['prices:a'].count, rows['prices:b'].count), (2, 1))
+        stats = pricestats.PriceStats.from_bytes(rows['prices:a'].data)
+        self.assertEqual((stats.count, stats.low, stats.high), (2, 10.0, 30.0))
+
+
+class SketchRaceTests(TransactionTestCase):
+    """Outside a SQLite transaction modify() locks rows, as on PostgreSQL"""
+
+    def test_row_created_concurrently_is_merged(self):
+        claim = sketches._claim
+
+        def racing_claim(names):
+            # Another first writer inserts the row between the locked read and the claim
+            other = pricestats.PriceStats()
+            other.add(50)
+            AnalyticsSketch.objects.create(name=names[0], data=other.to_bytes(), count=1)
+            claim(names)
+
+        with mock.patch.object(sketches, '_claim', racing_claim):
+            sketches.modify(pricestats.PriceStats, {'prices:a': lambda stats: stats.add(10),
+                                                    'prices:b': lambda stats: stats.add(20)}, count=1)
+
+        row = AnalyticsSketch.objects.get(name='prices:a')
+        stats = pricestats.PriceStats.from_bytes(row.data)
+        self.assertEqual((row.count, stats.count, stats.low, stats.high), (2, 2, 10.0, 50.0))
+        self.assertEqual(AnalyticsSketch.objects.get(name='prices:b').count, 1)
+
+
+class SketchMergeTests(SimpleTestCase):
+    def test_kll_merge_keeps_quantiles(self):
+        rng = random.Random(3)
+        values = [rng.uniform(0, 1000) for _ in range(20000)]
+        first = sketches.KLLSketch(rng=random.Random(1))
+        second = sketches.KLLSketch(rng=random.Random(2))
+        for index, value in enumerate(values):
+            (first if index % 2 else second).add(value)
+        first.merge(second)
+        restored = sketches.KLLSketch.from_bytes(first.to_bytes())
+        ordered = sorted(values)
+        for fraction in (0.1, 0.5, 0.9):
+            exact = ordered[int(fraction * len(ordered))]
+            self.assertAlmostEqual(restored.quantile(fraction), exact, delta=1000 * 0.02)
+
+    def test_histogram_merge_adds_counts(self):
+        first, second = sketches.FixedHistogram(25, 4), sketches.FixedHistogram(25, 4)
+        for value in (0, 10, 30, 500):
+            first.add(value)
+        for value in (26, 60):
+            second.add(value)
+        first.merge(second)
+        self.assertEqual(first.counts, [2, 2, 1, 1])
+        with self.assertRaises(ValueError):
+            first.merge(sketches.FixedHistogram(10, 4))
+
+    def test_price_stats_merge(self):
+        first, second = pricestats.PriceStats(), pricestats.PriceStats()
+        for value in (100, 200):
+            first.add(value)
+        second.add(50)
+        first.merge(second)
+        restored = pricestats.PriceStats.from_bytes(first.to_bytes())
+        self.assertEqual((restored.count, restored.total, restored.low, restored.high), (3, 350.0, 50.0, 200.0))
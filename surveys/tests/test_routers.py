@@ -0,0 +1,30 @@
+import random
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+
+from surveys.factories import build_student
+from surveys.models import StudentSurvey
+from surveys.routers import use_replica
+
+
+class ReplicaRoutingTests(TestCase):
+    def test_without_a_replica_everything_uses_default(self):
+        with use_replica():
+            self.assertEqual(StudentSurvey.objects.all().db, 'default')
+
+    def test_writes_go_to_default_and_pin_later_reads(self):
+        with mock.patch.dict(settings.DATABASES, {'replica': settings.DATABASES['default']}):
+            with use_replica():
+                self.assertEqual(StudentSurvey.objects.all().db, 'replica')
+                survey = build_student(random.Random(1), 1)
+                survey.save()
+                self.assertEqual(survey._state.db, 'default')
+                # Read-your-writes for the rest of the scope
+                self.assertEqual(StudentSurvey.objects.all().db, 'default')
+                self.assertTrue(StudentSurvey.objects.filter(pk=survey.pk).exists())
+
+            self.assertEqual(StudentSurvey.objects.all().db, 'default')
+            with use_replica():
+                self.assertEqual(StudentSurvey.objects.all().db, 'replica')
@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from surveys import analytics_views, filters, snapshot
+from surveys.factories import seed_surveys
+from surveys.models import StudentSurvey
+from surveys.tests.utils import student
+
+
+PLANS = [
+    {},
+    {'gender': 'female'},
+    {'age_range': '15-24', 'min_price': '100'},
+    {'max_price': '99.99', 'session_length': '30'},
+    {'gender': 'male', 'frequency': 'twice_week', 'platform_interest': 'willing'},
+    {'min_price': '150', 'max_price': '300', 'age_range': '24-32'},
+]
+
+
+class SnapshotParityTests(TestCase):
+    """Filtered analytics must not depend on whether the snapshot answers them"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix='snapshot-test-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(SNAPSHOT_PATH=f'{directory}/analytics.snapshot')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        seed_surveys(students=400, teachers=60, seed=7)
+        snapshot.write()
+
+    def assertParity(self):
+        for params in PLANS:
+            plan = filters.parse(params, filters.ANALYTICS_FILTERS)
+            self.assertIsNotNone(snapshot.grouped(plan), params)
+            fast = analytics_views.filtered_analytics(plan)
+            with override_settings(SNAPSHOT_ENABLED=False):
+                slow = analytics_views.filtered_analytics(plan)
+            self.assertEqual(fast, slow, params)
+
+    def test_fresh_snapshot(self):
+        self.assertParity()
+
+    def test_rows_submitted_after_the_snapshot(self):
+        client = APIClient()
+        for index in range(5):
+            response = client.post('/api/student-surveys/', student(90000000 + index, gender='female'),
+                                   format='json', REMOTE_ADDR=f'10.0.0.{index}')
+            self.assertEqual(response.status_code, 201)
+        self.assertParity()
+
+    def test_admin_edit_discards_snapshot(self):
+        survey = StudentSurvey.objects.filter(gender='male').first()
+        survey.gender = 'female'
+        request = RequestFactory().post('/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        admin.site._registry[StudentSurvey].save_model(request, survey, None, True)
+
+        # A kept snapshot would still count the survey as male
+        self.assertIsNone(snapshot.current())
+        snapshot.write()
+        self.assertParity()
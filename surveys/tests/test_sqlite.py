@@ -0,0 +1,60 @@
+import fcntl
+import os
+import random
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from surveys import sqlite
+from surveys.factories import build_student
+from surveys.models import StudentSurvey
+
+
+class SerializedWriteTests(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix='sqlite-test-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.lock_path = os.path.join(directory, 'db.sqlite3.write-lock')
+
+    def lock_is_free(self):
+        with open(self.lock_path, 'a') as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            return True
+
+    def test_locked_write_is_one_transaction(self):
+        with mock.patch.object(sqlite, '_lock_path', return_value=self.lock_path):
+            with sqlite.serialized_write():
+                self.assertTrue(connection.in_atomic_block)
+                # Other processes queue on the lock file
+                self.assertFalse(self.lock_is_free())
+            self.assertTrue(self.lock_is_free())
+
+            with self.assertRaises(ValueError), sqlite.serialized_write():
+                build_student(random.Random(1), 1).save()
+                raise ValueError
+        self.assertFalse(StudentSurvey.objects.exists())
+        self.assertTrue(self.lock_is_free())
+
+    def test_without_the_lock_file_writes_autocommit(self):
+        # SQLITE_PROFILE='default', in-memory databases and platforms without fcntl
+        with mock.patch.object(sqlite, '_lock_path', return_value=None):
+            with self.assertRaises(ValueError), sqlite.serialized_write():
+                self.assertFalse(connection.in_atomic_block)
+                build_student(random.Random(1), 1).save()
+                raise ValueError
+        self.assertEqual(StudentSurvey.objects.count(), 1)
+
+    def test_lock_path_only_for_the_concurrent_file_profile(self):
+        # The test database is in memory
+        self.assertIsNone(sqlite._lock_path())
+        with mock.patch.object(connection, 'is_in_memory_db', return_value=False):
+            self.assertEqual(sqlite._lock_path(), f"{connection.settings_dict['NAME']}.write-lock")
+            with self.settings(SQLITE_PROFILE='default'):
+                self.assertIsNone(sqlite._lock_path())
@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from surveys import textindex
+from surveys.models import StudentSurvey
+from surveys.tests.utils import student
+
+
+class TokenizerTests(SimpleTestCase):
+    def test_english(self):
+        self.assertEqual(textindex.tokenize('The teachers, the PRICES and 2024 prices!'), ['teachers', 'prices'])
+
+    def test_arabic_diacritics_and_letter_variants(self):
+        self.assertEqual(textindex.tokenize('الْقُرْآن'), textindex.tokenize('القران'))
+        self.assertEqual(textindex.tokenize('أحمد'), textindex.tokenize('احمد'))
+        self.assertEqual(textindex.tokenize('مدرسة'), textindex.tokenize('مدرسه'))
+
+    def test_arabic_article_is_stripped_from_long_words(self):
+        self.assertEqual(textindex.tokenize('والمعلم'), ['معلم'])
+        self.assertEqual(textindex.tokenize('الله'), ['الله'])
+
+    def test_ethiopic_punctuation_separates_words(self):
+        self.assertEqual(textindex.tokenize('ቁርአን፡መማር።ጥሩ'), ['ቁርአን', 'መማር', 'ጥሩ'])
+
+    def test_empty(self):
+        self.assertEqual(textindex.tokenize(None), [])
+
+
+class TextIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('analyst', password='pw'))
+
+    def test_submissions_are_searchable(self):
+        for index, challenge in enumerate(['Tajweed teachers are expensive', 'Expensive lessons, few teachers']):
+            self.client.post('/api/student-surveys/', student(index, teacher_challenges=challenge), format='json',
+                             REMOTE_ADDR=f'10.0.0.{index}')
+
+        response = self.client.get('/api/analytics/search/', {'q': 'expensive tajweed', 'survey_type': 'student'})
+        self.assertEqual((response.data['terms'], response.data['total']), (['expensive', 'tajweed'], 1))
+        self.assertIn('Tajweed', response.data['results'][0]['answers']['teacher_challenges'])
+
+        keywords = self.client.get('/api/analytics/keywords/', {'field': 'teacher_challenges', 'limit': 2}).data
+        self.assertEqual([(entry['term'], entry['answers']) for entry in keywords['terms']],
+                         [('expensive', 2), ('teachers', 2)])
+
+    def test_seeded_rows_are_indexed(self):
+        call_command('generate_load', '--students', '20', '--teachers', '5', stdout=StringIO())
+        survey = StudentSurvey.objects.order_by('pk').first()
+        term = textindex.tokenize(survey.teacher_challenges)[0]
+        _total, results = textindex.search([term], ['student'], 'teacher_challenges', limit=100)
+        self.assertIn(f'student_{survey.pk}', [result['id'] for result in results])
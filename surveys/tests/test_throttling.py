@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from surveys import throttling
+from surveys.models import StudentSurvey
+from surveys.tests.utils import student
+from surveys.throttling import client_ip, take_tokens
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rejected_request_spends_no_token(self):
+        hour = 1 / 3600
+        self.assertEqual(take_tokens([('ip', 1, hour)], now=0), (True, 0))
+        allowed, wait = take_tokens([('ip', 1, hour), ('phone', 1, hour)], now=1)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0)
+        self.assertTrue(take_tokens([('phone', 1, hour)], now=2)[0])
+
+    def test_client_ip_behind_trusted_proxies(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='6.6.6.6, 41.1.1.1')
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(client_ip(request), '41.1.1.1')
+            self.assertEqual(client_ip(RequestFactory().get('/', REMOTE_ADDR='10.0.0.9')), '10.0.0.9')
+            forged = RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='not-an-ip')
+            self.assertEqual(client_ip(forged), '10.0.0.9')
+        with override_settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(client_ip(request), '6.6.6.6')
+
+    def test_forwarded_header_without_trusted_proxies_is_logged_once(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.9', HTTP_X_FORWARDED_FOR='41.1.1.1')
+        throttling._forwarded_ignored = False
+        self.addCleanup(setattr, throttling, '_forwarded_ignored', False)
+        with override_settings(TRUSTED_PROXY_COUNT=0), self.assertLogs('surveys.throttling', 'WARNING') as logs:
+            self.assertEqual(client_ip(request), '10.0.0.9')
+            self.assertEqual(client_ip(request), '10.0.0.9')
+        self.assertEqual(len(logs.records), 1)
+
+    @override_settings(SURVEY_THROTTLE_RATES={'create': {'ip': '2/hour', 'phone': '5/hour'}}, TRUSTED_PROXY_COUNT=1)
+    def test_submissions_are_limited_per_client(self):
+        client = APIClient()
+
+        def submit(index, address):
+            return client.post('/api/student-surveys/', student(index), format='json',
+                               REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=address)
+
+        self.assertEqual([submit(index, '41.0.0.1').status_code for index in range(3)], [201, 201, 429])
+        # Same proxy, different client
+        response = submit(3, '41.0.0.2')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(StudentSurvey.objects.get(pk=response.data['id']).ip_address, '41.0.0.2')
+
+    @override_settings(SURVEY_THROTTLE_RATES={'create': {'phone': '1/hour'}})
+    def test_phone_bucket_uses_the_normalized_number(self):
+        client = APIClient()
+        first = client.post('/api/student-surveys/', student(1), format='json', REMOTE_ADDR='10.0.0.1')
+        again = client.post('/api/student-surveys/', student(2, phone_number='+251 9 0000 0001'), format='json',
+                            REMOTE_ADDR='10.0.0.2')
+        self.assertEqual((first.status_code, again.status_code), (201, 429))
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from surveys import timeseries
+from surveys.models import DailySubmissionCount
+from surveys.tests.utils import student
+
+
+def buckets():
+    return {
+        (row.survey_type, row.dimension, row.value): row.count
+        for row in DailySubmissionCount.objects.filter(date=timezone.localdate())
+    }
+
+
+class TimeseriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for index, (gender, age_range) in enumerate([('male', '15-24'), ('male', '24-32'), ('female', '15-24')]):
+            response = self.client.post('/api/student-surveys/', student(index, gender=gender, age_range=age_range),
+                                        format='json', REMOTE_ADDR=f'10.0.0.{index}')
+            self.assertEqual(response.status_code, 201)
+
+    def test_submissions_bump_their_daily_buckets(self):
+        self.assertEqual(buckets(), {
+            ('student', 'all', ''): 3,
+            ('student', 'gender', 'male'): 2,
+            ('student', 'gender', 'female'): 1,
+            ('student', 'age_range', '15-24'): 2,
+            ('student', 'age_range', '24-32'): 1,
+        })
+        counted = buckets()
+        timeseries.rebuild()
+        self.assertEqual(buckets(), counted)
+
+    def test_endpoint_series(self):
+        self.client.force_authenticate(User.objects.create_user('analyst', password='pw'))
+        today = timezone.localdate()
+        response = self.client.get('/api/analytics/timeseries/', {
+            'survey_type': 'student', 'dimension': 'gender', 'window': 2,
+            'start': (today - timedelta(days=1)).isoformat(), 'end': today.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        series = {entry['value']: entry for entry in response.data['series']}
+        self.assertEqual((series['male']['total'], series['female']['total']), (2, 1))
+        self.assertEqual(series['male']['points'], [
+            {'date': (today - timedelta(days=1)).isoformat(), 'count': 0, 'rolling': 0},
+            {'date': today.isoformat(), 'count': 2, 'rolling': 2},
+        ])
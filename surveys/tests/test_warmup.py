@@ -0,0 +1,64 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from surveys import warmup
+
+
+@override_settings(WARMUP_ENABLED=True)
+class ReadinessTests(TestCase):
+    def setUp(self):
+        state = mock.patch.object(warmup, 'state', warmup.WarmupState())
+        state.start()
+        self.addCleanup(state.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        steps = mock.patch.object(warmup, 'STEPS', [('blocked', lambda: self.release.wait(5))])
+        steps.start()
+        self.addCleanup(steps.stop)
+
+    def ready(self):
+        return APIClient().get('/api/health/ready/')
+
+    def wait_finished(self):
+        deadline = time.monotonic() + 5
+        while warmup.state.finished_at is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_not_started_is_ready(self):
+        response = self.ready()
+        self.assertEqual((response.status_code, response.data['status']), (200, 'not_started'))
+
+    def test_503_until_warm_up_finishes(self):
+        warmup.start()
+        response = self.ready()
+        self.assertEqual((response.status_code, response.data['status']), (503, 'warming_up'))
+
+        self.release.set()
+        self.wait_finished()
+        response = self.ready()
+        self.assertEqual((response.status_code, response.data['status']), (200, 'complete'))
+        self.assertEqual(list(response.data['steps']), ['blocked'])
+
+    @override_settings(WARMUP_BUDGET_SECONDS=0.05)
+    def test_ready_once_the_budget_runs_out(self):
+        warmup.start()
+        time.sleep(0.1)
+        response = self.ready()
+        self.assertEqual((response.status_code, response.data['status']), (200, 'budget_exceeded'))
+
+
+class WarmupStepTests(TestCase):
+    def test_steps_succeed(self):
+        cache.clear()
+        with mock.patch.object(warmup, 'state', warmup.WarmupState()):
+            warmup.state.started_at = time.monotonic()
+            warmup.state.budget = 30
+            warmup.run()
+            steps = warmup.state.steps
+        self.assertEqual(list(steps), ['imports', 'database', 'analytics'])
+        self.assertTrue(all(isinstance(outcome, float) for outcome in steps.values()), steps)
@@ -0,0 +1,41 @@
+import random
+from decimal import Decimal
+
+from surveys.factories import build_student, build_teacher
+
+
+def student(index, **overrides):
+    """A valid student survey payload with a unique phone number per index"""
+    payload = {
+        'full_name': f'Student {index}', 'phone_number': f'09{index:08d}', 'age_range': '15-24', 'gender': 'male',
+        'taken_online_lessons': True, 'teacher_challenges': 'hard to find teachers', 'time_preference': 'evenings',
+        'preferred_session_length': 30, 'preferred_frequency': 'once_week', 'fair_price_etb': '150.00',
+        'subjects_of_interest': ['Quran reading', 'Tajweed'], 'trust_factors': 'ratings', 'willing_to_try': True,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def add_student(index, subjects, session_length, price, **fields):
+    """Save a random student survey with the matching-relevant answers fixed"""
+    survey = build_student(random.Random(index), index)
+    survey.subjects_of_interest = subjects
+    survey.preferred_session_length = session_length
+    survey.fair_price_etb = Decimal(price)
+    for name, value in fields.items():
+        setattr(survey, name, value)
+    survey.save()
+    return survey
+
+
+def add_teacher(index, topics, session_length, rate, capacity, **fields):
+    """Save a random teacher survey with the matching-relevant answers fixed"""
+    survey = build_teacher(random.Random(index), index)
+    survey.confident_topics = topics
+    survey.preferred_session_length = session_length
+    survey.fair_rate_etb = Decimal(rate)
+    survey.students_per_week = capacity
+    for name, value in fields.items():
+        setattr(survey, name, value)
+    survey.save()
+    return survey
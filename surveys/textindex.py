@@ -0,0 +1,249 @@
+"""
+Inverted index over the open-text survey answers.
+
+``tokenize()`` turns English, Arabic and Amharic text into search terms:
+NFKC normalization and case folding, Arabic diacritics and tatweel removed,
+alef/yeh/teh marbuta variants unified and the article ال stripped. Ethiopic
+and Arabic punctuation separate words the way Latin punctuation does.
+Numbers, one-letter tokens and common stop words are dropped.
+
+Every new survey adds one TermPosting per distinct (field, term) and bumps
+the matching TermFrequency rows, in two statements inside the submission
+transaction. Search intersects the postings of the query terms through the
+term index, and keyword reports read TermFrequency, so neither scans the
+survey tables. bulk_create() and deletes outside the admin bypass the
+index; run ``manage.py rebuild_text_index`` after them.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import StudentSurvey, TeacherSurvey, TermFrequency, TermPosting
+
+SURVEY_MODELS = {
+    'student': StudentSurvey,
+    'teacher': TeacherSurvey,
+}
+
+# Open-text fields indexed per survey type
+TEXT_FIELDS = {
+    'student': ('teacher_challenges', 'trust_factors', 'desired_features', 'online_lessons_reason',
+                'willing_to_try_reason'),
+    'teacher': ('teaching_background_details', 'teaching_challenges', 'support_needed', 'platform_concerns',
+                'feedback_preferences', 'online_teaching_reason'),
+}
+
+MAX_TERM_LENGTH = 64
+
+# Letters and digits of any script; underscores and punctuation separate words
+WORD = re.compile(r'[^\W_]+')
+# Arabic harakat, Quranic annotation marks and tatweel
+ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+ARABIC_LETTERS = str.maketrans({
+    '\u0622': '\u0627', '\u0623': '\u0627', '\u0625': '\u0627', '\u0671': '\u0627',  # alef variants -> alef
+    '\u0649': '\u064a',  # alef maksura -> yeh
+    '\u0629': '\u0647',  # teh marbuta -> heh
+})
+# Ethiopic wordspace, full stop, comma, semicolon, colon, question mark and paragraph separator
+ETHIOPIC_PUNCTUATION = re.compile('[\u1360-\u1368]')
+# "and/with/like/so + the", then "the"
+ARABIC_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'ال')
+
+STOP_WORDS = frozenset("""
+a about all also am an and any are as at be been being but by can could did do does for from had has have he her
+him his how i if in into is it its just me more most my no not of on or our over she should so some than that
+the their them there these they this those to too us very was we were what when where which who why will with
+would you your
+في من على الى عن ان او ما لا هذا هذه ذلك تلك هو هي هم كان كانت مع كل قد لم لن ثم التي الذي انا نحن
+እና ነው ላይ ውስጥ ግን ወይም ይህ ያ እኔ እኛ አንተ እሱ እሷ እነሱ ነበር ናቸው
+""".split())
+
+
+def _strip_article(token):
+    for prefix in ARABIC_PREFIXES:
+        # Keep short words such as الله whole
+        if token.startswith(prefix) and len(token) - len(prefix) >= 3:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text):
+    """Distinct search terms of ``text``, in order of first occurrence"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = ETHIOPIC_PUNCTUATION.sub(' ', ARABIC_MARKS.sub('', text)).translate(ARABIC_LETTERS)
+    terms = {}
+    for token in WORD.findall(text):
+        token = _strip_article(token)
+        if len(token) < 2 or len(token) > MAX_TERM_LENGTH or token.isnumeric() or token in STOP_WORDS:
+            continue
+        terms.setdefault(token)
+    return list(terms)
+
+
+def postings(survey_type, survey):
+    """{(field, term)} for one survey's answers"""
+    return {(field, term) for field in TEXT_FIELDS[survey_type] for term in tokenize(getattr(survey, field))}
+
+
+def _add_frequencies(survey_type, deltas, batch_size=500):
+    """Add ``deltas`` ({(field, term): n}) to TermFrequency with one upsert per batch"""
+    table = connection.ops.quote_name(TermFrequency._meta.db_table)
+    field = connection.ops.quote_name('field')
+    items = sorted(deltas.items())
+    # INSERT ... ON CONFLICT is supported by both PostgreSQL and SQLite 3.24+
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            params = []
+            for (name, term), delta in batch:
+                params.extend([survey_type, name, term, delta])
+            cursor.execute(
+                f'INSERT INTO {table} (survey_type, {field}, term, documents) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT (survey_type, {field}, term) DO UPDATE SET documents = {table}.documents + excluded.documents',
+                params,
+            )
+
+
+def record_submission(survey_type, survey):
+    """Add one new survey's answers to the index"""
+    pairs = postings(survey_type, survey)
+    if not pairs:
+        return
+    TermPosting.objects.bulk_create([
+        TermPosting(term=term, survey_type=survey_type, field=field, survey_id=survey.pk) for field, term in pairs
+    ])
+    _add_frequencies(survey_type, dict.fromkeys(pairs, 1))
+
+
+def remove(survey_type, survey_ids, batch_size=500):
+    """Drop surveys from the index (for deletes)"""
+    survey_ids = list(survey_ids)
+    with transaction.atomic():
+        for start in range(0, len(survey_ids), batch_size):
+            rows = TermPosting.objects.filter(survey_type=survey_type, survey_id__in=survey_ids[start:start + batch_size])
+            deltas = {
+                (row['field'], row['term']): -row['answers']
+                for row in rows.values('field', 'term').annotate(answers=Count('pk')).order_by()
+            }
+            if deltas:
+                _add_frequencies(survey_type, deltas)
+                rows.delete()
+        TermFrequency.objects.filter(survey_type=survey_type, documents__lte=0).delete()
+
+
+def reindex(survey_type, survey):
+    """Re-read one survey's answers (for edits)"""
+    with transaction.atomic():
+        remove(survey_type, [survey.pk])
+        record_submission(survey_type, survey)
+
+
+def rebuild(survey_types=None, batch_size=5000):
+    """Recompute postings and frequencies from the survey tables; returns postings written per type"""
+    written = {}
+    for survey_type in survey_types or list(SURVEY_MODELS):
+        fields = TEXT_FIELDS[survey_type]
+        frequencies = Counter()
+        batch = []
+        written[survey_type] = 0
+        with transaction.atomic():
+            TermPosting.objects.filter(survey_type=survey_type).delete()
+            TermFrequency.objects.filter(survey_type=survey_type).delete()
+            rows = SURVEY_MODELS[survey_type].objects.order_by().values_list('pk', *fields)
+            for pk, *texts in rows.iterator(chunk_size=batch_size):
+                for field, text in zip(fields, texts):
+                    for term in tokenize(text):
+                        batch.append(TermPosting(term=term, survey_type=survey_type, field=field, survey_id=pk))
+                        frequencies[field, term] += 1
+                if len(batch) >= batch_size:
+                    TermPosting.objects.bulk_create(batch)
+                    written[survey_type] += len(batch)
+                    batch = []
+            TermPosting.objects.bulk_create(batch)
+            written[survey_type] += len(batch)
+            TermFrequency.objects.bulk_create(
+                [TermFrequency(survey_type=survey_type, field=field, term=term, documents=documents)
+                 for (field, term), documents in frequencies.items()],
+                batch_size=batch_size,
+            )
+    return written
+
+
+def keywords(survey_types, field=None, limit=20):
+    """Most frequent terms overall and per field, with the number of answers containing each"""
+    frequencies = TermFrequency.objects.filter(survey_type__in=survey_types, documents__gt=0)
+    if field:
+        frequencies = frequencies.filter(field=field)
+
+    # One pass over the vocabulary, never over the answers
+    overall = Counter()
+    per_term = {}
+    per_field = {name: Counter() for name in ([field] if field else
+                                              sorted({name for survey_type in survey_types
+                                                      for name in TEXT_FIELDS[survey_type]}))}
+    for name, term, documents in frequencies.values_list('field', 'term', 'documents').iterator(chunk_size=5000):
+        overall[term] += documents
+        per_field.setdefault(name, Counter())[term] += documents
+        fields = per_term.setdefault(term, {})
+        fields[name] = fields.get(name, 0) + documents
+
+    def top(counter):
+        return sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    return {
+        'terms': [{'term': term, 'answers': answers, 'fields': per_term[term]} for term, answers in top(overall)],
+        'fields': {
+            name: [{'term': term, 'answers': answers} for term, answers in top(counter)]
+            for name, counter in per_field.items()
+        },
+    }
+
+
+def matches(terms, survey_types, field=None):
+    """Queryset of (survey_type, survey_id) whose answers contain every term, newest first per type"""
+    found = TermPosting.objects.filter(term__in=terms, survey_type__in=survey_types)
+    if field:
+        found = found.filter(field=field)
+    return (found.values('survey_type', 'survey_id').annotate(matched=Count('term', distinct=True))
+            .filter(matched=len(terms)).order_by('survey_type', '-survey_id'))
+
+
+def search(terms, survey_types, field=None, offset=0, limit=20):
+    """(total, results) for one page of answers containing every term"""
+    found = matches(terms, survey_types, field)
+    total = found.count()
+    page = list(found[offset:offset + limit])
+
+    rows = {}
+    for survey_type in survey_types:
+        ids = [match['survey_id'] for match in page if match['survey_type'] == survey_type]
+        if ids:
+            fields = TEXT_FIELDS[survey_type]
+            for survey in SURVEY_MODELS[survey_type].objects.filter(pk__in=ids).only('submitted_at', *fields):
+                rows[survey_type, survey.pk] = survey
+
+    wanted = set(terms)
+    results = []
+    for match in page:
+        survey = rows.get((match['survey_type'], match['survey_id']))
+        if survey is None:
+            # Deleted since it was indexed
+            continue
+        answers = {}
+        for name in ([field] if field else TEXT_FIELDS[match['survey_type']]):
+            text = getattr(survey, name)
+            if wanted.intersection(tokenize(text)):
+                answers[name] = text
+        results.append({
+            'id': f"{match['survey_type']}_{survey.pk}",
+            'type': match['survey_type'],
+            'submitted_at': survey.submitted_at.isoformat() if survey.submitted_at else None,
+            'answers': answers,
+        })
+    return total, results
@@ -0,0 +1,202 @@
+"""
+Token-bucket throttles for the public survey endpoints.
+
+Buckets live in the default cache (shared between workers when it is Redis)
+and fall back to a bounded in-process store when the cache is unreachable.
+Each check reads all of a request's buckets at once and, only when every
+one has a token, charges them all; no database access.
+
+Rates are configured per ViewSet action in settings.SURVEY_THROTTLE_RATES:
+
+    SURVEY_THROTTLE_RATES = {
+        'check_phone': {'ip': '60/min', 'phone': '20/min'},
+        'create': {'ip': '20/hour', 'phone': '5/hour'},
+    }
+
+Actions without an entry are not throttled. Behind a reverse proxy set
+TRUSTED_PROXY_COUNT, or every client shares the proxy's bucket. The read-modify-write on the
+cache is not atomic, so concurrent requests may overshoot a limit slightly.
+"""
+import ipaddress
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .serializers import normalize_phone_number
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+
+
+def parse_rate(rate):
+    """'60/min' -> (capacity, tokens per second)"""
+    if not rate:
+        return None
+    count, _, period = rate.partition('/')
+    capacity = int(count)
+    seconds = PERIODS[period.strip().lower()]
+    return capacity, capacity / seconds
+
+
+class LocalBucketStore:
+    """In-process LRU of bucket states, used when the cache is unavailable"""
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+local_store = LocalBucketStore()
+
+
+# Set once the X-Forwarded-For warning has been logged by this process
+_forwarded_ignored = False
+
+
+def client_ip(request):
+    """
+    The client's address as seen by the first trusted proxy.
+
+    With TRUSTED_PROXY_COUNT proxies in front of the app (1 on Render)
+    REMOTE_ADDR is the nearest proxy, and the client is the X-Forwarded-For
+    entry the outermost trusted proxy appended. Entries left of it come from
+    the client and are ignored. Without trusted proxies, or when the header
+    has fewer hops than that, REMOTE_ADDR is used; a header arriving without
+    trusted proxies is logged once per process.
+    """
+    global _forwarded_ignored
+    remote = request.META.get('REMOTE_ADDR')
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxies <= 0:
+        if not _forwarded_ignored and request.META.get('HTTP_X_FORWARDED_FOR'):
+            _forwarded_ignored = True
+            logger.warning(
+                'X-Forwarded-For received with TRUSTED_PROXY_COUNT=0; throttling by the proxy address %s, '
+                'so every client behind it shares one bucket', remote,
+            )
+        return remote
+    hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+    hops = [hop for hop in hops if hop]
+    if len(hops) < proxies:
+        return remote
+    try:
+        return str(ipaddress.ip_address(hops[-proxies]))
+    except ValueError:
+        return remote
+
+
+def take_tokens(buckets, now=None):
+    """
+    Consume one token from every bucket in ``buckets`` ([(key, capacity, refill_rate)]) or from none.
+
+    Returns (allowed, seconds until every bucket has a token again).
+    """
+    now = time.time() if now is None else now
+    keys = [key for key, _, _ in buckets]
+    try:
+        states = cache.get_many(keys)
+        store = cache
+    except Exception:
+        logger.warning("Throttle cache unavailable, using in-process buckets", exc_info=True)
+        states = {key: local_store.get(key) for key in keys}
+        store = local_store
+
+    levels = []
+    for key, capacity, refill_rate in buckets:
+        tokens, updated = states.get(key) or (capacity, now)
+        levels.append(min(capacity, tokens + (now - updated) * refill_rate))
+
+    # All buckets are checked before any is charged, so a rejected request spends nothing
+    wait = max((1 - tokens) / refill_rate for tokens, (_, _, refill_rate) in zip(levels, buckets))
+    if wait > 0:
+        return False, wait
+
+    for tokens, (key, capacity, refill_rate) in zip(levels, buckets):
+        tokens -= 1
+        # Idle buckets expire once they would be full again anyway
+        timeout = int((capacity - tokens) / refill_rate) + 1
+        try:
+            store.set(key, (tokens, now), timeout)
+        except Exception:
+            logger.warning("Throttle cache unavailable, using in-process buckets", exc_info=True)
+            local_store.set(key, (tokens, now))
+    return True, 0
+
+
+def phone_ident(request):
+    """Normalized phone number from ?phone= or the submitted body, digits only"""
+    phone = request.query_params.get('phone')
+    if not phone and request.method == 'POST':
+        data = request.data
+        phone = data.get('phone_number') if hasattr(data, 'get') else None
+    if not phone or not isinstance(phone, str):
+        return None
+    # Digits only keeps odd input from producing invalid cache keys
+    return ''.join(ch for ch in normalize_phone_number(phone) if ch.isdigit())[:20] or None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses list their bucket ``scopes`` and implement ``get_ident(request, scope)``.
+
+    DRF asks every throttle class in turn, so one class owns all buckets of
+    a request; a request rejected by one bucket spends no token from the others.
+    """
+    scopes = ()
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        rates = getattr(settings, 'SURVEY_THROTTLE_RATES', {}).get(getattr(view, 'action', None), {})
+        buckets = []
+        for scope in self.scopes:
+            rate = parse_rate(rates.get(scope))
+            if rate is None:
+                continue
+            ident = self.get_ident(request, scope)
+            if not ident:
+                continue
+            buckets.append((f'throttle:{view.basename}:{view.action}:{scope}:{ident}', *rate))
+        if not buckets:
+            return True
+
+        allowed, self.wait_time = take_tokens(buckets)
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class SurveyThrottle(TokenBucketThrottle):
+    """Buckets per client address (client_ip(), as stored on submissions) and per normalized phone number"""
+    scopes = ('ip', 'phone')
+
+    def get_ident(self, request, scope):
+        if scope == 'ip':
+            return client_ip(request)
+        return phone_ident(request)
@@ -0,0 +1,138 @@
+"""
+Daily submission buckets backing the time-series analytics endpoint.
+
+Every new survey bumps one DailySubmissionCount row per dimension
+('all', 'gender', 'age_range'), so range queries read O(days) rows instead
+of scanning the survey tables. ``rebuild()`` recomputes the buckets from
+scratch with TruncDate, e.g. after bulk imports that bypass signals.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import StudentSurvey, TeacherSurvey, DailySubmissionCount
+
+SURVEY_MODELS = {
+    'student': StudentSurvey,
+    'teacher': TeacherSurvey,
+}
+
+DIMENSIONS = ('gender', 'age_range')
+
+
+def bucket_keys(survey):
+    """(dimension, value) pairs a single survey contributes to"""
+    keys = [('all', '')]
+    for dimension in DIMENSIONS:
+        keys.append((dimension, getattr(survey, dimension) or ''))
+    return keys
+
+
+def record_submission(survey_type, survey):
+    """Add one new survey to its daily buckets with a single upsert"""
+    date = timezone.localdate(survey.submitted_at)
+    keys = bucket_keys(survey)
+    table = connection.ops.quote_name(DailySubmissionCount._meta.db_table)
+    count = connection.ops.quote_name('count')
+    values = ', '.join(['(%s, %s, %s, %s, 1)'] * len(keys))
+    params = []
+    for dimension, value in keys:
+        params.extend([connection.ops.adapt_datefield_value(date), survey_type, dimension, value])
+
+    # INSERT ... ON CONFLICT is supported by both PostgreSQL and SQLite 3.24+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (date, survey_type, dimension, value, {count}) VALUES {values} '
+            f'ON CONFLICT (date, survey_type, dimension, value) '
+            f'DO UPDATE SET {count} = {table}.{count} + 1',
+            params,
+        )
+
+
+def rebuild(survey_types=None):
+    """Recompute all buckets for the given survey types from the survey tables"""
+    survey_types = survey_types or list(SURVEY_MODELS)
+    created = 0
+    with transaction.atomic():
+        DailySubmissionCount.objects.filter(survey_type__in=survey_types).delete()
+        for survey_type in survey_types:
+            model = SURVEY_MODELS[survey_type]
+            by_day = model.objects.annotate(date=TruncDate('submitted_at'))
+
+            rows = [
+                DailySubmissionCount(date=row['date'], survey_type=survey_type, dimension='all', count=row['count'])
+                for row in by_day.values('date').annotate(count=Count('id')).order_by()
+            ]
+            for dimension in DIMENSIONS:
+                rows.extend(
+                    DailySubmissionCount(
+                        date=row['date'], survey_type=survey_type, dimension=dimension,
+                        value=row[dimension] or '', count=row['count'],
+                    )
+                    for row in by_day.values('date', dimension).annotate(count=Count('id')).order_by()
+                )
+            DailySubmissionCount.objects.bulk_create(rows, batch_size=2000)
+            created += len(rows)
+    return created
+
+
+def _bucket_start(date, granularity):
+    if granularity == 'week':
+        return date - timedelta(days=date.weekday())
+    return date
+
+
+def query(survey_types, dimension, start, end, granularity='day', window=None):
+    """
+    Series of counts between start and end (inclusive), one per
+    (survey_type, value), with zero-filled buckets and an optional trailing
+    rolling sum over ``window`` buckets (which reaches back before ``start``).
+    """
+    step = timedelta(days=7 if granularity == 'week' else 1)
+    first = _bucket_start(start, granularity)
+    lead_in = (window - 1) if window else 0
+    fetch_from = first - step * lead_in
+
+    rows = DailySubmissionCount.objects.filter(
+        survey_type__in=survey_types, dimension=dimension, date__gte=fetch_from, date__lte=end
+    ).values_list('survey_type', 'value', 'date', 'count')
+
+    buckets = []
+    current = fetch_from
+    while current <= end:
+        buckets.append(current)
+        current += step
+
+    totals = {}
+    for survey_type, value, date, count in rows:
+        series = totals.setdefault((survey_type, value), {})
+        bucket = _bucket_start(date, granularity)
+        series[bucket] = series.get(bucket, 0) + count
+
+    result = []
+    for (survey_type, value), counts in sorted(totals.items()):
+        points = []
+        running = 0
+        total = 0
+        for index, bucket in enumerate(buckets):
+            count = counts.get(bucket, 0)
+            running += count
+            if window and index >= window:
+                running -= counts.get(buckets[index - window], 0)
+            if index < lead_in:
+                continue
+            total += count
+            point = {'date': bucket.isoformat(), 'count': count}
+            if window:
+                point['rolling'] = running
+            points.append(point)
+        result.append({
+            'survey_type': survey_type,
+            'value': value if dimension != 'all' else None,
+            'total': total,
+            'points': points,
+        })
+    return result
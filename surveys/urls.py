@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StudentSurveyViewSet, TeacherSurveyViewSet, SurveyQuestionViewSet, student_analytics, teacher_analytics, analytics_summary
-from .analytics_views import get_filtered_analytics, get_user_list
+from .views import StudentSurveyViewSet, TeacherSurveyViewSet, SurveyQuestionViewSet, student_analytics, teacher_analytics, analytics_summary, request_metrics, readiness
+from .lazy import lazy_view
 
 router = DefaultRouter()
 router.register(r'student-surveys', StudentSurveyViewSet, basename='student-survey')
@@ -12,12 +12,29 @@ urlpatterns = [
     # ViewSet routes
     path('', include(router.urls)),
     
-    # Analytics endpoints
+    # Analytics endpoints (rarely used views are imported on first request)
     path('analytics/students/', student_analytics, name='student-analytics'),
     path('analytics/teachers/', teacher_analytics, name='teacher-analytics'),
     path('analytics/summary/', analytics_summary, name='analytics-summary'),
-    path('analytics/filtered/', get_filtered_analytics, name='filtered-analytics'),
+    path('analytics/filtered/', lazy_view('surveys.analytics_views.get_filtered_analytics'), name='filtered-analytics'),
+    path('analytics/timeseries/', lazy_view('surveys.analytics_views.submission_timeseries'), name='submission-timeseries'),
+    path('analytics/prices/', lazy_view('surveys.analytics_views.price_statistics'), name='price-statistics'),
+    path('analytics/keywords/', lazy_view('surveys.analytics_views.text_keywords'), name='text-keywords'),
+    path('analytics/search/', lazy_view('surveys.analytics_views.text_search'), name='text-search'),
+    path('analytics/matching/', lazy_view('surveys.analytics_views.matching_report'), name='matching-report'),
+    path('analytics/matching/assign/', lazy_view('surveys.analytics_views.start_matching_assignment'), name='matching-assign'),
     
+    # Background jobs (admin only)
+    path('jobs/', lazy_view('surveys.job_views.job_list'), name='job-list'),
+    path('jobs/<int:job_id>/', lazy_view('surveys.job_views.job_detail'), name='job-detail'),
+    path('jobs/<int:job_id>/result/', lazy_view('surveys.job_views.job_result'), name='job-result'),
+
     # User management endpoint
-    path('users/list/', get_user_list, name='user-list'),
+    path('users/list/', lazy_view('surveys.analytics_views.get_user_list'), name='user-list'),
+
+    # Request instrumentation (admin only)
+    path('metrics/', request_metrics, name='request-metrics'),
+
+    # Load balancer readiness probe
+    path('health/ready/', readiness, name='readiness'),
 ]
@@ -1,98 +1,105 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django.db.models import Count, Q, Avg
 from .models import StudentSurvey, TeacherSurvey, SurveyQuestion
 from .serializers import StudentSurveySerializer, TeacherSurveySerializer, SurveyQuestionSerializer
-from .defaults import DEFAULT_STUDENT_QUESTIONS, DEFAULT_TEACHER_QUESTIONS
+from .throttling import SurveyThrottle, client_ip
+from . import datacache, metrics, prerender, warmup
+from .idempotency import IdempotentCreateMixin
+from .pagination import EstimatedCountPagination
+from .routers import replica_reads
+from .sqlite import serialized_write
 from rest_framework import serializers
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class StudentSurveyViewSet(viewsets.ModelViewSet):
+class StudentSurveyViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """ViewSet for student survey submissions"""
-    queryset = StudentSurvey.objects.all()
+    queryset = StudentSurvey.objects.order_by('pk')
     serializer_class = StudentSurveySerializer
+    pagination_class = EstimatedCountPagination
     http_method_names = ['get', 'post', 'head', 'options']
     permission_classes = [AllowAny]  # Allow public access for survey submissions
     authentication_classes = []  # Disable JWT authentication - surveys are public!
+    throttle_classes = [SurveyThrottle]  # Per-action rates in SURVEY_THROTTLE_RATES
     
     def perform_create(self, serializer):
         # Capture IP address
-        ip = self.request.META.get('REMOTE_ADDR')
-        serializer.save(ip_address=ip)
+        ip = client_ip(self.request)
+        with serialized_write():
+            serializer.save(ip_address=ip)
 
     @action(detail=False, methods=['get'], url_path='check-phone', permission_classes=[AllowAny])
     def check_phone(self, request):
-        logger.info(f"[STUDENT_CHECK_PHONE] Endpoint called")
-        logger.debug(f"[STUDENT_CHECK_PHONE] Headers: {dict(request.headers)}")
-        logger.debug(f"[STUDENT_CHECK_PHONE] User: {request.user}, Authenticated: {request.user.is_authenticated}")
-        logger.debug(f"[STUDENT_CHECK_PHONE] Permission classes: {self.permission_classes}")
+        logger.debug("[STUDENT_CHECK_PHONE] Endpoint called")
+        logger.debug("[STUDENT_CHECK_PHONE] User: %s, Authenticated: %s", request.user, request.user.is_authenticated)
         
         phone = request.query_params.get('phone', '')
-        logger.info(f"[STUDENT_CHECK_PHONE] Phone parameter: {phone}")
+        logger.debug("[STUDENT_CHECK_PHONE] Phone parameter: %s", phone)
         
         serializer = self.get_serializer()
         if not phone:
-            logger.warning("[STUDENT_CHECK_PHONE] Phone number missing")
+            logger.info("[STUDENT_CHECK_PHONE] Phone number missing")
             return Response(
                 {'valid': False, 'exists': False, 'error': ['Phone number is required.']},
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
             normalized = serializer.validate_phone_number(phone)
-            logger.debug(f"[STUDENT_CHECK_PHONE] Normalized phone: {normalized}")
+            logger.debug("[STUDENT_CHECK_PHONE] Normalized phone: %s", normalized)
         except serializers.ValidationError as exc:  # type: ignore[name-defined]
-            logger.warning(f"[STUDENT_CHECK_PHONE] Validation error: {exc.detail}")
+            logger.info("[STUDENT_CHECK_PHONE] Validation error: %s", exc.detail)
             return Response({'valid': False, 'exists': False, 'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
 
         exists = StudentSurvey.objects.filter(phone_number=normalized).exists()
-        logger.info(f"[STUDENT_CHECK_PHONE] Phone exists: {exists}")
+        logger.debug("[STUDENT_CHECK_PHONE] Phone exists: %s", exists)
         return Response({'valid': True, 'exists': exists})
 
 
-class TeacherSurveyViewSet(viewsets.ModelViewSet):
+class TeacherSurveyViewSet(IdempotentCreateMixin, viewsets.ModelViewSet):
     """ViewSet for teacher survey submissions"""
-    queryset = TeacherSurvey.objects.all()
+    queryset = TeacherSurvey.objects.order_by('pk')
     serializer_class = TeacherSurveySerializer
+    pagination_class = EstimatedCountPagination
     http_method_names = ['get', 'post', 'head', 'options']
     permission_classes = [AllowAny]  # Allow public access for survey submissions
     authentication_classes = []  # Disable JWT authentication - surveys are public!
+    throttle_classes = [SurveyThrottle]  # Per-action rates in SURVEY_THROTTLE_RATES
     
     def perform_create(self, serializer):
         # Capture IP address
-        ip = self.request.META.get('REMOTE_ADDR')
-        serializer.save(ip_address=ip)
+        ip = client_ip(self.request)
+        with serialized_write():
+            serializer.save(ip_address=ip)
 
     @action(detail=False, methods=['get'], url_path='check-phone', permission_classes=[AllowAny])
     def check_phone(self, request):
-        logger.info(f"[TEACHER_CHECK_PHONE] Endpoint called")
-        logger.debug(f"[TEACHER_CHECK_PHONE] Headers: {dict(request.headers)}")
-        logger.debug(f"[TEACHER_CHECK_PHONE] User: {request.user}, Authenticated: {request.user.is_authenticated}")
-        logger.debug(f"[TEACHER_CHECK_PHONE] Permission classes: {self.permission_classes}")
+        logger.debug("[TEACHER_CHECK_PHONE] Endpoint called")
+        logger.debug("[TEACHER_CHECK_PHONE] User: %s, Authenticated: %s", request.user, request.user.is_authenticated)
         
         phone = request.query_params.get('phone', '')
-        logger.info(f"[TEACHER_CHECK_PHONE] Phone parameter: {phone}")
+        logger.debug("[TEACHER_CHECK_PHONE] Phone parameter: %s", phone)
         
         serializer = self.get_serializer()
         if not phone:
-            logger.warning("[TEACHER_CHECK_PHONE] Phone number missing")
+            logger.info("[TEACHER_CHECK_PHONE] Phone number missing")
             return Response(
                 {'valid': False, 'exists': False, 'error': ['Phone number is required.']},
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
             normalized = serializer.validate_phone_number(phone)
-            logger.debug(f"[TEACHER_CHECK_PHONE] Normalized phone: {normalized}")
+            logger.debug("[TEACHER_CHECK_PHONE] Normalized phone: %s", normalized)
         except serializers.ValidationError as exc:  # type: ignore[name-defined]
-            logger.warning(f"[TEACHER_CHECK_PHONE] Validation error: {exc.detail}")
+            logger.info("[TEACHER_CHECK_PHONE] Validation error: %s", exc.detail)
             return Response({'valid': False, 'exists': False, 'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
 
         exists = TeacherSurvey.objects.filter(phone_number=normalized).exists()
-        logger.info(f"[TEACHER_CHECK_PHONE] Phone exists: {exists}")
+        logger.debug("[TEACHER_CHECK_PHONE] Phone exists: %s", exists)
         return Response({'valid': True, 'exists': exists})
 
 
@@ -103,9 +110,26 @@ class SurveyQuestionViewSet(viewsets.ModelViewSet):
     filterset_fields = ['survey_type', 'section', 'is_active']
     permission_classes = [AllowAny]  # You can change this based on your requirements
 
+    def list(self, request, *args, **kwargs):
+        # The catalog only changes through edits that bump the data version;
+        # the key covers the page and the host used in next/previous links
+        listing = super().list
+        rendered = prerender.cached(
+            prerender.cache_key('questions:list', request.build_absolute_uri()),
+            lambda: listing(request, *args, **kwargs).data,
+        )
+        return prerender.respond(request, rendered)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        datacache.bump()
+
     @action(detail=False, methods=['post'])
     def reset(self, request):
         """Reset questions to default for a specific survey type"""
+        # All question text; only needed here, so keep it out of startup
+        from .defaults import DEFAULT_STUDENT_QUESTIONS, DEFAULT_TEACHER_QUESTIONS
+
         survey_type = request.data.get('survey_type')
         if survey_type not in ['student', 'teacher']:
             return Response(
@@ -115,6 +139,7 @@ class SurveyQuestionViewSet(viewsets.ModelViewSet):
 
         # Delete existing questions for this type
         SurveyQuestion.objects.filter(survey_type=survey_type).delete()
+        datacache.bump()
 
         # Load defaults
         defaults = DEFAULT_STUDENT_QUESTIONS if survey_type == 'student' else DEFAULT_TEACHER_QUESTIONS
@@ -143,15 +168,21 @@ class SurveyQuestionViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def student_analytics(request):
     """Get analytics data for student surveys"""
-    logger.info(f"[STUDENT_ANALYTICS] Endpoint called")
-    logger.debug(f"[STUDENT_ANALYTICS] Headers: {dict(request.headers)}")
-    logger.debug(f"[STUDENT_ANALYTICS] User: {request.user}, Authenticated: {request.user.is_authenticated}")
-    logger.debug(f"[STUDENT_ANALYTICS] Permission decorators: IsAuthenticated")
-    
+    logger.debug("[STUDENT_ANALYTICS] Endpoint called")
+    logger.debug("[STUDENT_ANALYTICS] User: %s, Authenticated: %s", request.user, request.user.is_authenticated)
+    return prerender.respond(request, rendered_student_analytics())
+
+
+def rendered_student_analytics():
+    return prerender.cached('analytics:students', build_student_analytics)
+
+
+def build_student_analytics():
     total_count = StudentSurvey.objects.count()
-    logger.info(f"[STUDENT_ANALYTICS] Total student surveys: {total_count}")
+    logger.debug("[STUDENT_ANALYTICS] Total student surveys: %d", total_count)
     
     # Experience level distribution
     experience_data = StudentSurvey.objects.values('quran_experience').annotate(
@@ -210,7 +241,7 @@ def student_analytics(request):
             for subject in survey.subjects_of_interest:
                 age_subjects[age][subject] = age_subjects[age].get(subject, 0) + 1
     
-    return Response({
+    return {
         'total_responses': total_count,
         'experience_distribution': list(experience_data),
         'session_length_preferences': list(session_length_data),
@@ -228,19 +259,25 @@ def student_analytics(request):
         'subjects_interest': subjects_data,
         'age_distribution': list(age_data),
         'age_subjects_interest': age_subjects
-    })
+    }
 
 
 @api_view(['GET'])
+@replica_reads
 def teacher_analytics(request):
     """Get analytics data for teacher surveys"""
-    logger.info(f"[TEACHER_ANALYTICS] Endpoint called")
-    logger.debug(f"[TEACHER_ANALYTICS] Headers: {dict(request.headers)}")
-    logger.debug(f"[TEACHER_ANALYTICS] User: {request.user}, Authenticated: {request.user.is_authenticated}")
-    logger.debug(f"[TEACHER_ANALYTICS] Permission decorators: NONE (missing @permission_classes)")
-    
+    logger.debug("[TEACHER_ANALYTICS] Endpoint called")
+    logger.debug("[TEACHER_ANALYTICS] User: %s, Authenticated: %s", request.user, request.user.is_authenticated)
+    return prerender.respond(request, rendered_teacher_analytics())
+
+
+def rendered_teacher_analytics():
+    return prerender.cached('analytics:teachers', build_teacher_analytics)
+
+
+def build_teacher_analytics():
     total_count = TeacherSurvey.objects.count()
-    logger.info(f"[TEACHER_ANALYTICS] Total teacher surveys: {total_count}")
+    logger.debug("[TEACHER_ANALYTICS] Total teacher surveys: %d", total_count)
     
     # Teaching background distribution
     background_data = TeacherSurvey.objects.values('teaching_background').annotate(
@@ -283,7 +320,7 @@ def teacher_analytics(request):
         count=Count('id')
     ).order_by('age_range')
     
-    return Response({
+    return {
         'total_responses': total_count,
         'background_distribution': list(background_data),
         'session_length_preferences': list(session_length_data),
@@ -300,20 +337,25 @@ def teacher_analytics(request):
         'average_rate': round(float(avg_rate) if avg_rate else 0, 2),
         'confident_topics': topics_data,
         'age_distribution': list(age_data)
-    })
+    }
 
 
 @api_view(['GET'])
 def analytics_summary(request):
     """Get overall summary of both surveys"""
-    logger.info(f"[ANALYTICS_SUMMARY] Endpoint called")
-    logger.debug(f"[ANALYTICS_SUMMARY] Headers: {dict(request.headers)}")
-    logger.debug(f"[ANALYTICS_SUMMARY] User: {request.user}, Authenticated: {request.user.is_authenticated}")
-    logger.debug(f"[ANALYTICS_SUMMARY] Permission decorators: NONE (missing @permission_classes)")
-    
+    logger.debug("[ANALYTICS_SUMMARY] Endpoint called")
+    logger.debug("[ANALYTICS_SUMMARY] User: %s, Authenticated: %s", request.user, request.user.is_authenticated)
+    return prerender.respond(request, rendered_summary())
+
+
+def rendered_summary():
+    return prerender.cached('analytics:summary', build_summary)
+
+
+def build_summary():
     student_count = StudentSurvey.objects.count()
     teacher_count = TeacherSurvey.objects.count()
-    logger.info(f"[ANALYTICS_SUMMARY] Student count: {student_count}, Teacher count: {teacher_count}")
+    logger.debug("[ANALYTICS_SUMMARY] Student count: %d, Teacher count: %d", student_count, teacher_count)
     
     last_student = StudentSurvey.objects.order_by('-submitted_at').first()
     last_teacher = TeacherSurvey.objects.order_by('-submitted_at').first()
@@ -326,9 +368,28 @@ def analytics_summary(request):
     elif last_teacher:
         last_updated = last_teacher.submitted_at
     
-    return Response({
+    return {
         'total_student_responses': student_count,
         'total_teacher_responses': teacher_count,
         'total_responses': student_count + teacher_count,
         'last_updated': last_updated
-    })
+    }
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    """Per-endpoint query/latency histograms collected by this worker process"""
+    if request.method == 'DELETE':
+        metrics.registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(metrics.registry.snapshot())
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def readiness(request):
+    """Readiness probe: 503 until this worker has finished warming up (or its warm-up budget ran out)"""
+    snapshot = warmup.state.snapshot()
+    return Response(snapshot, status=status.HTTP_200_OK if snapshot['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,133 @@
+"""
+Per-process warm-up before a worker reports ready.
+
+``start()`` is called from the WSGI/ASGI entry points, so management
+commands never warm up. It runs the steps below in a daemon thread: import
+the lazily loaded views, open the database connection, and pre-render the
+analytics payloads into the cache. Only work a later request reuses is a
+step: per-URL caches such as the question catalog are keyed on the absolute
+URI of the real request, so warming them from here would miss. The readiness
+endpoint (/api/health/ready/) answers 503 until the steps finish or
+WARMUP_BUDGET_SECONDS pass, whichever is first, so a slow or stuck step
+delays traffic by at most the budget and never blocks startup itself.
+
+Each gunicorn worker imports the entry point (unless --preload is used) and
+so warms its own per-process caches.
+"""
+import logging
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+STEPS = []
+
+
+def step(name):
+    def decorator(func):
+        STEPS.append((name, func))
+        return func
+    return decorator
+
+
+class WarmupState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+        self.budget = 0.0
+        self.steps = {}
+
+    def snapshot(self):
+        with self.lock:
+            if self.started_at is None:
+                # Not started (tests, management commands, WARMUP_ENABLED=False): nothing to wait for
+                return {'ready': True, 'status': 'not_started', 'steps': {}}
+            elapsed = time.monotonic() - self.started_at
+            if self.finished_at is not None:
+                status = 'complete'
+            elif elapsed >= self.budget:
+                status = 'budget_exceeded'
+            else:
+                status = 'warming_up'
+            return {
+                'ready': status != 'warming_up',
+                'status': status,
+                'elapsed_ms': round(((self.finished_at or time.monotonic()) - self.started_at) * 1000, 1),
+                'budget_ms': round(self.budget * 1000),
+                'steps': dict(self.steps),
+            }
+
+
+state = WarmupState()
+
+
+@step('imports')
+def warm_imports():
+    # Deferred at startup (surveys/lazy.py); load them before traffic instead
+    for module in ('surveys.analytics_views', 'surveys.job_views', 'surveys.defaults',
+                   'rest_framework_simplejwt.views', 'rest_framework_simplejwt.authentication'):
+        import_module(module)
+
+
+@step('database')
+def warm_database():
+    from . import datacache
+    from .models import StudentSurvey, TeacherSurvey
+
+    datacache.data_version()
+    StudentSurvey.objects.exists()
+    TeacherSurvey.objects.exists()
+
+
+@step('analytics')
+def warm_analytics():
+    from . import analytics_views, filters, views
+    from .routers import use_replica
+
+    with use_replica():
+        views.rendered_summary()
+        views.rendered_student_analytics()
+        views.rendered_teacher_analytics()
+        analytics_views.rendered_filtered_analytics(filters.parse({}, filters.ANALYTICS_FILTERS))
+        analytics_views.rendered_matching_report()
+
+
+def run():
+    for name, func in STEPS:
+        with state.lock:
+            remaining = state.budget - (time.monotonic() - state.started_at)
+        if remaining <= 0:
+            logger.warning("Warm-up budget exhausted before step %s", name)
+            with state.lock:
+                state.steps[name] = 'skipped'
+            continue
+        started = time.monotonic()
+        try:
+            func()
+            outcome = round((time.monotonic() - started) * 1000, 1)
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+            outcome = 'failed'
+        with state.lock:
+            state.steps[name] = outcome
+    connections.close_all()
+    with state.lock:
+        state.finished_at = time.monotonic()
+    logger.info("Warm-up finished: %s", state.steps)
+
+
+def start():
+    """Start warming up in the background; returns immediately"""
+    if not getattr(settings, 'WARMUP_ENABLED', True):
+        return
+    with state.lock:
+        if state.started_at is not None:
+            return
+        state.started_at = time.monotonic()
+        state.budget = getattr(settings, 'WARMUP_BUDGET_SECONDS', 30)
+    threading.Thread(target=run, name='surveys-warmup', daemon=True).start()
@@ -0,0 +1,24 @@
+"""
+Entry points for `manage.py run_worker` child processes.
+
+Children are spawned, so this module is imported before Django is set up and
+must not import models at module level.
+"""
+import signal
+
+
+def init_process():
+    # Ctrl-C reaches the whole process group; only the parent should react
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import django
+    django.setup()
+
+
+def execute(job_id):
+    from django.db import connections
+    from . import jobs
+
+    try:
+        return jobs.execute(job_id)
+    finally:
+        connections.close_all()